@@ -0,0 +1,298 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from mysql_wrap import MysqlWrap
+from .fakeserver import FakeServer
+
+
+"""
+    Benchmarks of the bulk and DataFrame methods, run from the project root with the package installed
+    (pip install -e .), or with PYTHONPATH=src:
+
+        python -m benchmarks.bench                          # all cases against the in-process fake server
+        python -m benchmarks.bench --rows 200000 --width 20 --case getTable --case insertFromDataFrame
+        python -m benchmarks.bench --host 127.0.0.1 --port 3307 --user root --passwd "" --db bench
+        python -m benchmarks.bench --save-baseline          # store the results in benchmarks/baseline.json
+
+    Every case runs in a subprocess of its own, so the peak RSS reported is the one of that case only.
+    A case is timed over --repeat runs after one warm up run, and reports rows/s of the median run, latency
+    percentiles of the runs and peak RSS. Results are compared with the stored baseline of the same target and
+    frame size, and the exit code is 1 when a case is slower, or uses more memory, than the baseline by more
+    than --tolerance.
+
+    Without --host the cases run against fakeserver.FakeServer, measuring the client side only.
+    With --host they run against a real, throwaway, MySQL or MariaDB database: bench_* tables are created
+    there and dropped afterwards.
+"""
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+CASES = ("insertBatch", "insertFromDataFrame", "upsertUnique", "upsertStaging", "getTable", "getAll", "inferTypes")
+
+COLUMN_KINDS = ("int", "float", "text", "datetime", "bool", "nullable")
+
+TABLE = "bench_table"
+
+
+def synthetic_frame(rows : int, width : int, seed : int = 0) -> pd.DataFrame:
+    """
+    A reproducible frame with a unique integer id, a unique text name and width - 2 columns
+    cycling through ints, floats, short texts, datetimes, booleans and floats with missing values
+    """
+
+    random = np.random.default_rng(seed)
+    columns = {"id" : np.arange(rows, dtype=np.int64),
+               "name" : pd.Series(["name_%08d" % row for row in range(rows)], dtype=object)}
+
+    for position in range(max(width - 2, 0)):
+        kind = COLUMN_KINDS[position % len(COLUMN_KINDS)]
+        name = "%s_%d" % (kind, position)
+        if kind == "int":
+            columns[name] = random.integers(-1000000, 1000000, rows)
+        elif kind == "float":
+            columns[name] = random.normal(0, 1000, rows).round(4)
+        elif kind == "text":
+            words = np.array(["alpha", "beta", "gamma", "delta", "epsilon", "zeta", "eta", "theta"], dtype=object)
+            columns[name] = words[random.integers(0, len(words), rows)] + "_" + random.integers(0, 1000, rows).astype(str)
+        elif kind == "datetime":
+            columns[name] = pd.Timestamp("2024-01-01") + pd.to_timedelta(random.integers(0, 86400 * 365, rows), unit="s")
+        elif kind == "bool":
+            columns[name] = random.integers(0, 2, rows).astype(bool)
+        else:
+            values = random.normal(0, 1, rows)
+            values[random.random(rows) < 0.2] = np.nan
+            columns[name] = values
+
+    return pd.DataFrame(columns)
+
+
+def _peak_rss_mb() -> float:
+    """Peak resident set size of this process, ru_maxrss is in KB on Linux and in bytes on macOS"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class Target:
+    """Where the cases run, the fake server or a real database, with the tables each case needs"""
+
+    def __init__(self, args):
+        self.args = args
+        self.server = None
+
+    def __enter__(self):
+        if self.args.host is None:
+            self.server = FakeServer().start()
+        return self
+
+    def __exit__(self, type, value, traceback):
+        if self.server is not None:
+            self.server.close()
+
+    def connect(self) -> MysqlWrap:
+        if self.server is not None:
+            return MysqlWrap(host=self.server.host, port=self.server.port, db="bench", user="bench", passwd="")
+        return MysqlWrap(host=self.args.host, port=self.args.port, db=self.args.db, user=self.args.user,
+                         passwd=self.args.passwd)
+
+    def prepare(self, db : MysqlWrap, data : pd.DataFrame, key_field : str = "id", filled : bool = False):
+        """An empty, or filled, table with the columns of data, key_field as the primary key"""
+
+        if self.server is not None:
+            self.server.addTable(TABLE, data if filled else data.iloc[0:0], key_field=key_field)
+            return
+        db.query("DROP TABLE IF EXISTS %s" % TABLE)
+        db.createTable(TABLE, data, key_field)
+        if key_field != "name":
+            db.addIndex(TABLE, "bench_name", ["name"])
+        if filled:
+            db.insertFromDataFrame(TABLE, data)
+        db.commit()
+
+    def reset(self, db : MysqlWrap):
+        """Empty the table between two runs of an insert"""
+        if self.server is None:
+            db.query("TRUNCATE TABLE %s" % TABLE)
+
+    def cleanup(self, db : MysqlWrap):
+        if self.server is None:
+            db.query("DROP TABLE IF EXISTS %s" % TABLE)
+
+
+def _case(name : str, db : MysqlWrap, target : Target, data : pd.DataFrame):
+    """Set up the table of a case, returns the function timed and whether the table is emptied between runs"""
+
+    if name == "insertBatch":
+        records = data.to_dict("records")
+        target.prepare(db, data)
+        return lambda : (db.insertBatch(TABLE, records), db.commit()), True
+    if name == "insertFromDataFrame":
+        target.prepare(db, data)
+        return lambda : (db.insertFromDataFrame(TABLE, data), db.commit()), True
+    if name == "upsertUnique":
+        # INSERT ... ON DUPLICATE KEY UPDATE on the primary key, over existing rows
+        target.prepare(db, data, filled=True)
+        return lambda : (db.insertOrUpdateFromDataFrame(TABLE, data, "id"), db.commit()), False
+    if name == "upsertStaging":
+        # name is not unique in the table definition, so this goes through the staging table join
+        target.prepare(db, data, filled=True)
+        return lambda : (db.insertOrUpdateFromDataFrame(TABLE, data, "name"), db.commit()), False
+    if name == "getTable":
+        target.prepare(db, data, filled=True)
+        return lambda : db.getTable(TABLE), False
+    if name == "getAll":
+        target.prepare(db, data, filled=True)
+        return lambda : db.getAll(TABLE), False
+    if name == "inferTypes":
+        return lambda : db._serialize_datatypes(data, "id"), False
+    raise ValueError("unknown case {0}, expected one of {1}".format(name, ", ".join(CASES)))
+
+
+def run_case(name : str, args) -> dict:
+    """Run one case in this process, returns its timings"""
+
+    data = synthetic_frame(args.rows, args.width, args.seed)
+
+    with Target(args) as target:
+        db = target.connect()
+        try:
+            function, reset = _case(name, db, target, data)
+            latencies = []
+            for run in range(args.repeat + 1):
+                if reset:
+                    target.reset(db)
+                started = time.perf_counter()
+                function()
+                seconds = time.perf_counter() - started
+                # the first run warms up the caches of the wrapper and the server
+                if run:
+                    latencies.append(seconds)
+            target.cleanup(db)
+        finally:
+            db.end()
+
+    median = float(np.median(latencies))
+    return {"case" : name,
+            "rows" : args.rows,
+            "width" : args.width,
+            "repeat" : args.repeat,
+            "rows_per_second" : args.rows / median if median else None,
+            "seconds_p50" : median,
+            "seconds_p90" : float(np.percentile(latencies, 90)),
+            "seconds_p99" : float(np.percentile(latencies, 99)),
+            "seconds_min" : min(latencies),
+            "peak_rss_mb" : _peak_rss_mb()}
+
+
+def run_isolated(name : str, args) -> dict:
+    """Run one case in a fresh interpreter, so that its peak RSS isn´t inflated by the previous cases"""
+
+    command = [sys.executable, "-m", "benchmarks.bench", "--run-case", name,
+               "--rows", str(args.rows), "--width", str(args.width), "--repeat", str(args.repeat),
+               "--seed", str(args.seed)]
+    if args.host is not None:
+        command += ["--host", args.host, "--port", str(args.port), "--user", args.user, "--passwd", args.passwd,
+                    "--db", args.db]
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run(command, cwd=root, check=True, stdout=subprocess.PIPE).stdout
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+
+def _target_name(args) -> str:
+    return "fake" if args.host is None else "mysql"
+
+
+def _baseline_key(args) -> str:
+    return "%s/%dx%d" % (_target_name(args), args.rows, args.width)
+
+
+def compare(results, baseline, tolerance : float):
+    """Cases slower, or using more memory, than their baseline by more than tolerance, as messages"""
+
+    regressions = []
+    for result in results:
+        reference = baseline.get(result["case"])
+        if reference is None:
+            continue
+        if reference["rows_per_second"] and result["rows_per_second"] < reference["rows_per_second"] * (1 - tolerance):
+            regressions.append("{0}: {1:,.0f} rows/s, baseline {2:,.0f} rows/s".format(
+                result["case"], result["rows_per_second"], reference["rows_per_second"]))
+        if result["peak_rss_mb"] > reference["peak_rss_mb"] * (1 + tolerance):
+            regressions.append("{0}: peak RSS {1:.0f} MB, baseline {2:.0f} MB".format(
+                result["case"], result["peak_rss_mb"], reference["peak_rss_mb"]))
+    return regressions
+
+
+def report(results, baseline):
+    print("{0:<22}{1:>14}{2:>10}{3:>10}{4:>10}{5:>10}{6:>12}".format(
+        "case", "rows/s", "p50 ms", "p90 ms", "p99 ms", "RSS MB", "vs baseline"))
+    for result in results:
+        reference = baseline.get(result["case"])
+        change = ""
+        if reference and reference["rows_per_second"]:
+            change = "{0:+.1%}".format(result["rows_per_second"] / reference["rows_per_second"] - 1)
+        print("{0:<22}{1:>14,.0f}{2:>10.1f}{3:>10.1f}{4:>10.1f}{5:>10.0f}{6:>12}".format(
+            result["case"], result["rows_per_second"], result["seconds_p50"] * 1000, result["seconds_p90"] * 1000,
+            result["seconds_p99"] * 1000, result["peak_rss_mb"], change))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="mysql_wrap benchmarks")
+    parser.add_argument("--case", action="append", choices=CASES, help="case to run, repeatable, defaults to all")
+    parser.add_argument("--rows", type=int, default=50000, help="rows of the synthetic frame")
+    parser.add_argument("--width", type=int, default=12, help="columns of the synthetic frame")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per case, after one warm up run")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--host", help="MySQL / MariaDB server, the fake server is used when not set")
+    parser.add_argument("--port", type=int, default=3306)
+    parser.add_argument("--user", default="root")
+    parser.add_argument("--passwd", default="")
+    parser.add_argument("--db", default="bench", help="database the bench_* tables are created in")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline results file")
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown before a case fails")
+    parser.add_argument("--run-case", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.run_case:
+        print(json.dumps(run_case(args.run_case, args)))
+        return 0
+
+    baselines = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as file:
+            baselines = json.load(file)
+    baseline = {result["case"] : result for result in baselines.get(_baseline_key(args), {}).get("results", [])}
+
+    results = [run_isolated(name, args) for name in args.case or CASES]
+    report(results, baseline)
+
+    if args.save_baseline:
+        stored = {result["case"] : result for result in baselines.get(_baseline_key(args), {}).get("results", [])}
+        stored.update({result["case"] : result for result in results})
+        baselines[_baseline_key(args)] = {"python" : platform.python_version(),
+                                          "pandas" : pd.__version__,
+                                          "machine" : platform.machine(),
+                                          "results" : list(stored.values())}
+        with open(args.baseline, "w") as file:
+            json.dump(baselines, file, indent=2, sort_keys=True)
+        print("baseline saved to {0}".format(args.baseline))
+        return 0
+
+    regressions = compare(results, baseline, args.tolerance)
+    for regression in regressions:
+        print("REGRESSION " + regression)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
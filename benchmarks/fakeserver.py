@@ -0,0 +1,375 @@
+import re
+import socket
+import struct
+import threading
+
+import pandas as pd
+from mysql.connector.constants import FieldType, FieldFlag
+
+
+"""
+    A throwaway server speaking just enough of the MySQL protocol for the client side benchmarks.
+
+    The connector runs for real: handshake, statement escaping, packets on a local socket and result set parsing,
+    so what is measured is the cost paid by this library and the connector on the client, without a database
+    doing the work on the other end. Writes are acknowledged without being stored. Reads of a registered table
+    return its rows, encoded once when the table is added, so serving them costs next to nothing.
+
+    Not a database: WHERE, ORDER BY and joins are ignored, and anything unknown gets an OK or an empty result.
+"""
+
+CLIENT_LONG_PASSWORD = 0x1
+CLIENT_LONG_FLAG = 0x4
+CLIENT_CONNECT_WITH_DB = 0x8
+CLIENT_PROTOCOL_41 = 0x200
+CLIENT_TRANSACTIONS = 0x2000
+CLIENT_SECURE_CONNECTION = 0x8000
+CLIENT_MULTI_RESULTS = 0x20000
+CLIENT_PLUGIN_AUTH = 0x80000
+
+CAPABILITIES = (CLIENT_LONG_PASSWORD | CLIENT_LONG_FLAG | CLIENT_CONNECT_WITH_DB | CLIENT_PROTOCOL_41
+                | CLIENT_TRANSACTIONS | CLIENT_SECURE_CONNECTION | CLIENT_MULTI_RESULTS | CLIENT_PLUGIN_AUTH)
+
+SERVER_STATUS_IN_TRANS = 0x1
+SERVER_STATUS_AUTOCOMMIT = 0x2
+
+COM_QUIT = 0x01
+COM_INIT_DB = 0x02
+COM_QUERY = 0x03
+COM_PING = 0x0e
+
+UTF8MB4 = 255
+BINARY = 63
+MAX_PACKET = 0xffffff
+MAX_ALLOWED_PACKET = 64 * 1024 * 1024
+
+VARIABLES = {"max_allowed_packet" : MAX_ALLOWED_PACKET,
+             "sql_mode" : "ONLY_FULL_GROUP_BY,STRICT_TRANS_TABLES,NO_ZERO_DATE,ERROR_FOR_DIVISION_BY_ZERO",
+             "autocommit" : 0,
+             "time_zone" : "SYSTEM",
+             "version" : "8.0.36-fake"}
+
+FROM_TABLE = re.compile(r"\bFROM\s+`?(\w+)`?", re.IGNORECASE)
+SELECT_FIELDS = re.compile(r"^\s*SELECT\s+(.*?)\s+FROM\b", re.IGNORECASE | re.DOTALL)
+LIMIT = re.compile(r"\bLIMIT\s+(\d+)(?:\s*,\s*(\d+))?\s*$", re.IGNORECASE)
+FIRST_WORD = re.compile(r"^\s*(\w+)")
+SHOW_TABLES = re.compile(r"^\s*SHOW\s+TABLES\s+LIKE\s+'([^']*)'", re.IGNORECASE)
+EXPLAIN = re.compile(r"^\s*(?:EXPLAIN|DESCRIBE)\s+`?(\w+)`?", re.IGNORECASE)
+VARIABLE = re.compile(r"^\s*SELECT\s+@@(?:session\.|global\.)?(\w+)\s*$", re.IGNORECASE)
+TEMPORARY_TABLE = re.compile(r"^\s*CREATE\s+TEMPORARY\s+TABLE\s+`?(\w+)`?", re.IGNORECASE)
+
+
+def _lenenc_int(value : int) -> bytes:
+    if value < 251:
+        return struct.pack("<B", value)
+    if value < 2 ** 16:
+        return b"\xfc" + struct.pack("<H", value)
+    if value < 2 ** 24:
+        return b"\xfd" + struct.pack("<I", value)[:3]
+    return b"\xfe" + struct.pack("<Q", value)
+
+
+def _lenenc_str(value : bytes) -> bytes:
+    return _lenenc_int(len(value)) + value
+
+
+def _column_definition(table : str, name : str, type_code : int, charset : int, length : int, flags : int = 0,
+                       decimals : int = 0) -> bytes:
+    return (_lenenc_str(b"def") + _lenenc_str(b"bench") + _lenenc_str(table.encode()) + _lenenc_str(table.encode())
+            + _lenenc_str(name.encode()) + _lenenc_str(name.encode())
+            + struct.pack("<BHIBHBxx", 0x0c, charset, length, type_code, flags, decimals))
+
+
+def _eof(status : int = SERVER_STATUS_AUTOCOMMIT) -> bytes:
+    return struct.pack("<BHH", 0xfe, 0, status)
+
+
+def _ok(affected : int = 0, last_id : int = 0, status : int = SERVER_STATUS_AUTOCOMMIT) -> bytes:
+    return b"\x00" + _lenenc_int(affected) + _lenenc_int(last_id) + struct.pack("<HH", status, 0)
+
+
+def _error(errno : int, message : str) -> bytes:
+    return struct.pack("<BH", 0xff, errno) + b"#HY000" + message.encode()
+
+
+def _text_value(value) -> bytes:
+    if value is None:
+        return b"\xfb"
+    return _lenenc_str(value if isinstance(value, bytes) else str(value).encode())
+
+
+class FakeTable:
+    """Column definitions and pre encoded text protocol rows of a DataFrame"""
+
+    def __init__(self, name : str, data : pd.DataFrame, key_field : str = None):
+        self.name = name
+        self.key_field = key_field
+        self.columns = []
+        encoded = []
+        for column, values in data.items():
+            type_code, sql_type, charset, length, flags = self._column_type(values)
+            if column == key_field:
+                flags |= FieldFlag.PRI_KEY | FieldFlag.NOT_NULL
+            self.columns.append((column, type_code, sql_type, charset, length, flags))
+            encoded.append([_text_value(value) for value in self._text_values(values)])
+        self.rows = [b"".join(row) for row in zip(*encoded)] if encoded else []
+
+    def _column_type(self, values : pd.Series):
+        kind = values.dtype.kind
+        if values.dtype == "bool" or str(values.dtype) == "boolean":
+            return FieldType.TINY, "TINYINT(1)", BINARY, 1, 0
+        if kind in "iu":
+            return FieldType.LONGLONG, "BIGINT", BINARY, 20, 0
+        if kind == "f":
+            return FieldType.DOUBLE, "DOUBLE", BINARY, 22, 0
+        if kind == "M":
+            return FieldType.DATETIME, "DATETIME", BINARY, 19, FieldFlag.BINARY
+        return FieldType.VAR_STRING, "VARCHAR(255)", UTF8MB4, 1020, 0
+
+    def _text_values(self, values : pd.Series):
+        if values.dtype == "bool" or str(values.dtype) == "boolean":
+            values = values.astype("Int8")
+        elif values.dtype.kind == "M":
+            values = values.dt.strftime("%Y-%m-%d %H:%M:%S")
+        return values.astype(object).where(values.notna(), None)
+
+    def result(self, fields : str, limit : int = None) -> bytes:
+        """Payloads of a text protocol result set, fields is the select list"""
+
+        names = [field.strip().strip("`") for field in fields.split(",")]
+        if names == ["*"]:
+            positions = list(range(len(self.columns)))
+        else:
+            lookup = {column[0] : position for position, column in enumerate(self.columns)}
+            positions = [lookup[name] for name in names if name in lookup]
+
+        columns = [self.columns[position] for position in positions]
+        payloads = [_lenenc_int(len(columns))]
+        payloads += [_column_definition(self.name, name, type_code, charset, length, flags)
+                     for name, type_code, _, charset, length, flags in columns]
+        payloads.append(_eof())
+
+        rows = self.rows if limit is None else self.rows[:limit]
+        if positions == list(range(len(self.columns))):
+            payloads += rows
+        else:
+            payloads += [self._project(row, positions) for row in rows]
+
+        payloads.append(_eof())
+        return payloads
+
+    def _project(self, row : bytes, positions) -> bytes:
+        values = []
+        offset = 0
+        while offset < len(row):
+            first = row[offset]
+            if first == 0xfb:
+                values.append(row[offset:offset + 1])
+                offset += 1
+                continue
+            if first < 251:
+                size, header = first, 1
+            elif first == 0xfc:
+                size, header = struct.unpack_from("<H", row, offset + 1)[0], 3
+            elif first == 0xfd:
+                size, header = struct.unpack("<I", row[offset + 1:offset + 4] + b"\x00")[0], 4
+            else:
+                size, header = struct.unpack_from("<Q", row, offset + 1)[0], 9
+            values.append(row[offset:offset + header + size])
+            offset += header + size
+        return b"".join(values[position] for position in positions)
+
+    def explain(self):
+        return [(name, sql_type, "NO" if name == self.key_field else "YES", "PRI" if name == self.key_field else "", None, "")
+                for name, _, sql_type, _, _, _ in self.columns]
+
+
+class FakeServer:
+    """
+    Serve registered tables on a local port, in a background thread, eg:
+
+        with FakeServer() as server:
+            server.addTable("bench", frame, key_field="id")
+            db = MysqlWrap(host="127.0.0.1", port=server.port, db="bench", user="bench", passwd="")
+    """
+
+    def __init__(self, host : str = "127.0.0.1", port : int = 0, version : str = "8.0.36-fake"):
+        self.version = version
+        self.tables = {}
+        self.statements = 0
+        self._lock = threading.Lock()
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._socket.bind((host, port))
+        self._socket.listen(64)
+        self.host, self.port = self._socket.getsockname()
+        self._thread = None
+        self._closed = False
+        self._connection_id = 0
+        self._drop = None
+
+    def addTable(self, name : str, data : pd.DataFrame, key_field : str = None):
+        """Serve data as table name, key_field is reported as the primary key by EXPLAIN"""
+        table = FakeTable(name, data, key_field)
+        with self._lock:
+            self.tables[name] = table
+        return table
+
+    def dropNext(self, pattern : str):
+        """Close the connection sending the next statement matching pattern without answering it, like a crashed server"""
+        with self._lock:
+            self._drop = re.compile(pattern, re.IGNORECASE)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._accept, name="fake-mysql", daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        self._closed = True
+        try:
+            self._socket.close()
+        except OSError:
+            pass
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    def _accept(self):
+        while not self._closed:
+            try:
+                client, _ = self._socket.accept()
+            except OSError:
+                return
+            client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._connection_id += 1
+            threading.Thread(target=self._serve, args=(client, self._connection_id), daemon=True).start()
+
+    def _serve(self, client, connection_id):
+        session = {"status" : SERVER_STATUS_AUTOCOMMIT}
+        reader = client.makefile("rb", buffering=1024 * 1024)
+        try:
+            self._send(client, 0, [self._handshake(connection_id)])
+            sequence, _ = self._read(reader)
+            self._send(client, sequence + 1, [_ok(status=session["status"])])
+
+            while True:
+                sequence, packet = self._read(reader)
+                if not packet or packet[0] == COM_QUIT:
+                    return
+                if packet[0] == COM_QUERY and self._dropping(packet[1:]):
+                    return
+                if packet[0] == COM_QUERY:
+                    payloads = self._query(packet[1:], session)
+                elif packet[0] in (COM_PING, COM_INIT_DB):
+                    payloads = [_ok(status=session["status"])]
+                else:
+                    payloads = [_error(1047, "command not supported by the benchmark server")]
+                self._send(client, sequence + 1, payloads)
+        except (ConnectionError, OSError, EOFError):
+            return
+        finally:
+            reader.close()
+            client.close()
+
+    def _dropping(self, packet : bytes) -> bool:
+        with self._lock:
+            if self._drop is None or not self._drop.search(packet.decode("utf-8", "replace")):
+                return False
+            self._drop = None
+            return True
+
+    def _handshake(self, connection_id : int) -> bytes:
+        scramble = b"0123456789abcdefghij"
+        return (b"\x0a" + self.version.encode() + b"\x00" + struct.pack("<I", connection_id) + scramble[:8] + b"\x00"
+                + struct.pack("<HBHH", CAPABILITIES & 0xffff, UTF8MB4, SERVER_STATUS_AUTOCOMMIT, CAPABILITIES >> 16)
+                + struct.pack("<B", len(scramble) + 1) + b"\x00" * 10 + scramble[8:] + b"\x00"
+                + b"mysql_native_password\x00")
+
+    def _read(self, reader):
+        """Read one client packet, joining the packets of statements larger than 16MB"""
+        payload = b""
+        while True:
+            header = reader.read(4)
+            if len(header) < 4:
+                raise EOFError()
+            length = header[0] | header[1] << 8 | header[2] << 16
+            sequence = header[3]
+            payload += reader.read(length)
+            if length < MAX_PACKET:
+                return sequence, payload
+
+    def _send(self, client, sequence : int, payloads):
+        frames = []
+        for payload in payloads:
+            frames.append(struct.pack("<I", len(payload))[:3] + bytes((sequence & 0xff,)) + payload)
+            sequence += 1
+        client.sendall(b"".join(frames))
+
+    def _query(self, packet : bytes, session : dict):
+        self.statements += 1
+        sql = packet.decode("utf-8", "replace")
+        word = FIRST_WORD.match(sql)
+        word = word.group(1).upper() if word else ""
+
+        if word in ("INSERT", "REPLACE"):
+            session["status"] |= SERVER_STATUS_IN_TRANS
+            rows = packet.count(b"),(") + 1
+            return [_ok(rows, 1, session["status"])]
+        if word in ("UPDATE", "DELETE"):
+            session["status"] |= SERVER_STATUS_IN_TRANS
+            return [_ok(0, 0, session["status"])]
+        if word in ("BEGIN", "START"):
+            session["status"] |= SERVER_STATUS_IN_TRANS
+            return [_ok(status=session["status"])]
+        if word in ("COMMIT", "ROLLBACK"):
+            session["status"] &= ~SERVER_STATUS_IN_TRANS
+            return [_ok(status=session["status"])]
+        if word == "SELECT":
+            return self._select(sql)
+        if word in ("EXPLAIN", "DESCRIBE"):
+            table = self.tables.get(EXPLAIN.match(sql).group(1))
+            if table is None:
+                return [_error(1146, "Table doesn't exist")]
+            return self._rows(["Field", "Type", "Null", "Key", "Default", "Extra"], table.explain())
+        if word == "SHOW":
+            match = SHOW_TABLES.match(sql)
+            if match:
+                return self._rows(["Tables"], [(match.group(1),)] if match.group(1) in self.tables else [])
+            return self._rows(["Level", "Code", "Message"], [])
+        if word == "CREATE":
+            match = TEMPORARY_TABLE.match(sql)
+            source = FROM_TABLE.search(sql)
+            if match and source and source.group(1) in self.tables:
+                # staging tables take the definition of their source, without rows
+                source = self.tables[source.group(1)]
+                self.tables[match.group(1)] = FakeTable(match.group(1), pd.DataFrame(), source.key_field)
+        return [_ok(status=session["status"])]
+
+    def _select(self, sql : str):
+        variable = VARIABLE.match(sql)
+        if variable:
+            return self._rows(["@@" + variable.group(1)], [(VARIABLES.get(variable.group(1).lower()),)])
+        if re.search(r"\bCOUNT\(", sql, re.IGNORECASE):
+            return self._rows(["COUNT(*)"], [(0,)])
+
+        source = FROM_TABLE.search(sql)
+        table = self.tables.get(source.group(1)) if source else None
+        if table is None or not table.columns:
+            return self._rows(["result"], [])
+
+        limit = LIMIT.search(sql)
+        if limit:
+            limit = int(limit.group(2) or limit.group(1))
+        return table.result(SELECT_FIELDS.match(sql).group(1), limit)
+
+    def _rows(self, names, rows):
+        payloads = [_lenenc_int(len(names))]
+        payloads += [_column_definition("", name, FieldType.VAR_STRING, UTF8MB4, 1020) for name in names]
+        payloads.append(_eof())
+        payloads += [b"".join(_text_value(value) for value in row) for row in rows]
+        payloads.append(_eof())
+        return payloads
@@ -1 +1,14 @@
-from .mysqlwrap import MysqlWrap, ConnectionOptions
\ No newline at end of file
+from .mysqlwrap import MysqlWrap, ConnectionOptions
+from .cache import TTLCache
+from .instrumentation import Instrumentation, QueryEvent, fingerprint
+from .pool import ConnectionPool
+from .replicas import ReplicaSet
+from .writer import BufferedWriter
+
+
+def __getattr__(name):
+    # the asyncio wrapper needs mysql-connector-python 8.3 or later, only imported when used
+    if name in ("AsyncMysqlWrap", "AsyncConnectionPool"):
+        from . import asyncmysqlwrap
+        return getattr(asyncmysqlwrap, name)
+    raise AttributeError("module {0!r} has no attribute {1!r}".format(__name__, name))
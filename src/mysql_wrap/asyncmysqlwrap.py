@@ -0,0 +1,830 @@
+import asyncio
+import logging
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+import mysql.connector as mysql
+import pandas as pd
+
+try:
+    import mysql.connector.aio as mysql_aio
+except ImportError:
+    raise ImportError("AsyncMysqlWrap needs the asyncio connector of mysql-connector-python 8.3 or later")
+
+from .cache import TTLCache
+from .pool import _PoolBase
+from .mysqlwrap import (MysqlWrap, SQL_CACHE_SIZE, SCHEMA_SQL, ARROW_BATCH_ROWS, FieldType,
+                        _import_pyarrow, _arrow_schema, _arrow_batch, _boolean_names, _chain_first, _iter_frame_values,
+                        _upsert_result, _aggregate_columns, _explain_columns, _schema_tables, _staging_statements,
+                        _written_tables)
+
+logger = logging.getLogger("mysql_wrap")
+
+
+"""
+    asyncio version of MysqlWrap, for use inside an event loop.
+
+    Every call awaits an AsyncConnectionPool instead of blocking, so many small queries running in
+    concurrent tasks overlap their network round trips, each task using its own connection.
+    The SQL is built by the same helpers as MysqlWrap, so both wrappers send the same statements.
+"""
+
+
+class AsyncConnectionPool(_PoolBase):
+    """
+    An asyncio set of mysql connections, the counterpart of ConnectionPool with the same parameters,
+    but factory is a coroutine function returning a new, open mysql.connector.aio connection.
+    Tasks waiting for a connection are woken in turn as connections are given back,
+    so a burst of tasks is throttled to the pool size instead of opening a connection each.
+    """
+
+    def __init__(self, factory, size : int = 10, max_overflow : int = 0, max_idle : int = None,
+                 timeout : float = None, ping_after : float = 1.0):
+        super().__init__(factory, size, max_overflow, max_idle, timeout, ping_after)
+        self._lock = asyncio.Condition()
+
+    async def checkout(self):
+        """Get a live connection from the pool, opening a new one if allowed"""
+
+        deadline = self._deadline()
+
+        async with self._lock:
+            slot = self._take()
+            while slot is None:
+                remaining = self._wait_time(deadline)
+                try:
+                    await asyncio.wait_for(self._lock.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+                slot = self._take()
+        conn, last_used = slot
+
+        try:
+            if conn is not None and self._needs_ping(last_used) and not await conn.is_connected():
+                await self._close(conn)
+                self._counters["discarded"] += 1
+                conn = None
+            if conn is None:
+                conn = await self._factory()
+                self._counters["created"] += 1
+            else:
+                self._counters["reused"] += 1
+        except BaseException:
+            async with self._lock:
+                self._untake()
+                self._lock.notify()
+            raise
+
+        return conn
+
+    async def checkin(self, conn):
+        """Give a connection back. Open transactions are rolled back before the connection is reused"""
+
+        healthy = True
+        try:
+            if conn.unread_result:
+                await conn.consume_results()
+            if conn.in_transaction:
+                await conn.rollback()
+        except mysql.Error:
+            healthy = False
+
+        async with self._lock:
+            keep = self._give_back(conn, healthy)
+            self._lock.notify()
+
+        if not keep:
+            await self._close(conn)
+
+    async def discard(self, conn):
+        """Drop a broken connection instead of returning it to the pool"""
+        async with self._lock:
+            self._drop()
+            self._lock.notify()
+        await self._close(conn)
+
+    async def close(self):
+        """Close all idle connections, connections still checked out are closed when returned"""
+        async with self._lock:
+            idle = self._drain()
+            self._lock.notify_all()
+
+        for conn in idle:
+            await self._close(conn)
+
+    async def _close(self, conn):
+        try:
+            await conn.close()
+        except Exception:
+            pass
+
+
+class AsyncMysqlWrap:
+    """
+    The MysqlWrap methods as coroutines, eg:
+
+        async with AsyncMysqlWrap(host="127.0.0.1", db="mydatabase", user="username", passwd="password") as db:
+            book = await db.getOne("books", ["id", "name"], ("id=%s", [1]))
+
+    Always pooled: each task checks out its own connection for every call, and a connection with
+    uncommitted writes stays with its task until commit() or rollback().
+    """
+    conf = None
+    pool = None
+    schema_cache = None
+    instrumentation = None
+
+    def __init__(self, **kwargs):
+        """ db = AsyncMysqlWrap(
+	        host="127.0.0.1",
+	        db="mydatabase",
+	        user="username",
+	        passwd="password",
+            )
+            await db.connect()  # or use the wrapper in an async with block
+
+            takes the MysqlWrap options, pool_size defaults to 10.
+            an instrumentation object sees every statement, the DataFrame methods are not timed as a whole.
+            prepared_statements is not supported, the asyncio connector has no prepared cursor.
+        """
+        self.conf = kwargs
+        self.conf["keep_alive"] = kwargs.get("keep_alive", False)
+        self.conf["charset"] = kwargs.get("charset", "utf8")
+        self.conf["host"] = kwargs.get("host", "localhost")
+        self.conf["port"] = kwargs.get("port", 3306)
+        self.conf["autocommit"] = kwargs.get("autocommit", False)
+        self.conf["ssl"] = kwargs.get("ssl", False)
+        self.conf["pool_size"] = kwargs.get("pool_size", None) or 10
+        self.conf["pool_max_overflow"] = kwargs.get("pool_max_overflow", 0)
+        self.conf["pool_max_idle"] = kwargs.get("pool_max_idle", None)
+        self.conf["pool_timeout"] = kwargs.get("pool_timeout", None)
+        self.conf["allow_local_infile"] = kwargs.get("allow_local_infile", False)
+        self.conf["schema_cache_ttl"] = kwargs.get("schema_cache_ttl", None)
+        self.conf["schema_cache_preload"] = kwargs.get("schema_cache_preload", False)
+        self.conf["decimal_as_float"] = kwargs.get("decimal_as_float", False)
+        self.schema_cache = kwargs.get("schema_cache", None)
+        if self.schema_cache is None and self.conf["schema_cache_ttl"] is not None:
+            self.schema_cache = TTLCache(ttl=self.conf["schema_cache_ttl"])
+        self.instrumentation = kwargs.get("instrumentation", None)
+        self._tasks = weakref.WeakKeyDictionary()
+        self._sql_cache = TTLCache(max_size=SQL_CACHE_SIZE)
+        self._server = None
+        self._max_packet = None
+        self._last_cur = None
+
+    async def connect(self):
+        """Set up the connection pool, opening one connection straight away so bad credentials fail here"""
+
+        if self.pool is None or self.pool.closed:
+            self.pool = AsyncConnectionPool(self._new_connection,
+                                            size=self.conf["pool_size"],
+                                            max_overflow=self.conf["pool_max_overflow"],
+                                            max_idle=self.conf["pool_max_idle"],
+                                            timeout=self.conf["pool_timeout"])
+            async with self.connection() as conn:
+                self._server = (tuple(conn.server_version or ()), "mariadb" in (conn.server_info or "").lower())
+
+            if self.schema_cache is not None and self.conf["schema_cache_preload"]:
+                await self.loadSchema()
+
+        return self
+
+    async def _new_connection(self):
+        """Open a new asyncio connection using the wrapper configuration"""
+
+        # the asyncio connector doesn´t take the db and passwd aliases
+        options = dict(database=self.conf['db'], host=self.conf['host'],
+                       port=self.conf['port'], user=self.conf['user'],
+                       password=self.conf['passwd'],
+                       allow_local_infile=self.conf['allow_local_infile'],
+                       autocommit=self.conf["autocommit"],
+                       charset=self.conf['charset'])
+        if isinstance(self.conf["ssl"], dict):
+            options.update(self.conf["ssl"])
+
+        try:
+            conn = await mysql_aio.connect(**options)
+        except:
+            logger.exception("MySQL connection failed")
+            raise
+
+        return conn
+
+    @property
+    def conn(self):
+        """The connection bound to the calling task, None when it holds none"""
+        state = self._tasks.get(asyncio.current_task())
+        return state.conn if state is not None else None
+
+    @property
+    def cur(self):
+        """The last cursor used by the calling task"""
+        state = self._tasks.get(asyncio.current_task())
+        return state.cur if state is not None and state.cur is not None else self._last_cur
+
+    @asynccontextmanager
+    async def connection(self):
+        """
+        Hold one connection for the duration of an async with block, eg:
+
+            async with db.connection():
+                await db.insert("books", {"name": "Time Machine"})
+                await db.commit()
+
+        Connections are bound to the running task, tasks started inside the block get their own.
+        """
+
+        task = asyncio.current_task()
+        state = self._tasks.get(task)
+        if state is None or state.conn is None:
+            state = SimpleNamespace(conn=await self.pool.checkout(), depth=0, dirty=False, cur=None)
+            self._tasks[task] = state
+        state.depth += 1
+        try:
+            yield state.conn
+        finally:
+            state.depth -= 1
+            if state.depth == 0 and not state.dirty:
+                await self._release()
+
+    async def _release(self, broken : bool = False):
+        """Give the connection bound to this task back to the pool"""
+        state = self._tasks.get(asyncio.current_task())
+        if state is None or state.conn is None:
+            return
+        conn = state.conn
+        state.conn = None
+        state.dirty = False
+        if broken:
+            await self.pool.discard(conn)
+        else:
+            await self.pool.checkin(conn)
+
+    async def getOne(self, table=None, fields='*', where=None, order=None, limit=(0, 1)):
+        """Get a single result, see MysqlWrap.getOne()"""
+
+        cur = await self._select(table, fields, where, order, limit)
+        result = await cur.fetchall()
+
+        if not result:
+            return None
+
+        return dict(zip([f[0] for f in cur.description], result[0]))
+
+    async def getAll(self, table=None, fields='*', where=None, order=None, limit=None, as_array : bool = False):
+        """Get all results, see MysqlWrap.getAll()"""
+
+        cur = await self._select(table, fields, where, order, limit)
+        result = await cur.fetchall()
+
+        if as_array:
+            return self._rows_to_array(result, cur.description, await self._boolean_columns(table, cur.description))
+
+        rows = None
+        if result:
+            fields = [f[0] for f in cur.description]
+            rows = [dict(zip(fields, r)) for r in result]
+
+        return rows
+
+    def lastId(self):
+        """Get the last insert id of the calling task"""
+        return self.cur.lastrowid
+
+    def lastQuery(self):
+        """Get the last executed query of the calling task"""
+        return self.cur.statement
+
+    async def insert(self, table, data):
+        """Insert a record"""
+
+        return (await self.query(*self._compile_insert(table, data))).rowcount
+
+    async def insertBatch(self, table, data, chunk_rows : int = None, chunk_bytes : int = None, commit_every : int = None):
+        """Insert multiple records in chunks, see MysqlWrap.insertBatch()"""
+
+        rows = iter(data)
+        first = next(rows, None)
+        if first is None:
+            return 0
+
+        keys = list(first.keys())
+        values = (tuple(record.values()) for record in _chain_first(first, rows))
+
+        return await self._insert_chunks(table, keys, values, chunk_rows, chunk_bytes, commit_every)
+
+    async def _insert_chunks(self, table, keys, values, chunk_rows=None, chunk_bytes=None, commit_every=None,
+                             statement=None, on_chunk=None):
+        """
+        Send rows as multi row INSERT statements, see MysqlWrap._insert_chunks().
+        The next chunk is built in a worker thread while the current one is awaited, so converting
+        a large frame doesn´t stall the event loop. on_chunk is a coroutine function here.
+        """
+
+        if chunk_bytes is None:
+            chunk_bytes = await self._max_allowed_packet() // 2
+
+        build = self._chunk_builder(table, keys, values, chunk_rows, chunk_bytes, statement)
+
+        loop = asyncio.get_running_loop()
+        rowcount = 0
+        chunks = 0
+        builder = ThreadPoolExecutor(max_workers=1)
+        try:
+            async with self.connection():
+                pending = loop.run_in_executor(builder, build)
+                try:
+                    while True:
+                        chunk = await pending
+                        if chunk is None:
+                            break
+                        # prepare the next chunk while this one is on the wire
+                        pending = loop.run_in_executor(builder, build)
+                        sql, flattened_values, count = chunk
+                        if on_chunk is not None:
+                            await on_chunk(flattened_values, count)
+                        rowcount += (await self.query(sql, flattened_values)).rowcount
+                        chunks += 1
+                        if commit_every and chunks % commit_every == 0:
+                            await self.commit()
+                finally:
+                    if not pending.done():
+                        pending.cancel()
+        finally:
+            # a chunk still being built after an error finishes on its own, waiting for it would block the event loop
+            builder.shutdown(wait=False)
+
+        return rowcount
+
+    async def _max_allowed_packet(self) -> int:
+        """Server max_allowed_packet in bytes, read once per wrapper"""
+        if self._max_packet is None:
+            cur = await self.query("SELECT @@max_allowed_packet")
+            self._max_packet = int((await cur.fetchone())[0])
+        return self._max_packet
+
+    async def update(self, table, data, where=None):
+        """Update records"""
+
+        return (await self.query(*self._compile_update(table, data, where))).rowcount
+
+    async def insertOrUpdate(self, table, data, key_field):
+        insert_data = data.copy()
+
+        data = {k: data[k] for k in data if k not in key_field}
+
+        insert = self._serialize_insert(insert_data)
+        update = self._serialize_update(data)
+
+        sql = "INSERT INTO %s (%s) VALUES(%s) ON DUPLICATE KEY UPDATE %s" % (table, insert[0], insert[1], update)
+
+        return (await self.query(sql, tuple(insert_data.values()) + tuple(data.values()))).rowcount
+
+    async def insertOrUpdateBatch(self, table, data, key_field, chunk_rows : int = None, chunk_bytes : int = None,
+                                  commit_every : int = None, count_changes : bool = True):
+        """Insert or update multiple records in chunks, see MysqlWrap.insertOrUpdateBatch()"""
+
+        rows = iter(data)
+        first = next(rows, None)
+        if first is None:
+            return _upsert_result(0, 0, 0 if count_changes else None)
+
+        keys = list(first.keys())
+        values = (tuple(record.values()) for record in _chain_first(first, rows))
+
+        return await self._upsert_chunks(table, keys, values, key_field, chunk_rows, chunk_bytes, commit_every,
+                                         count_changes)
+
+    async def _upsert_chunks(self, table, keys, values, key_field, chunk_rows=None, chunk_bytes=None,
+                             commit_every=None, count_changes=True):
+        key_fields, statement, chunk_keys = self._upsert_plan(table, keys, key_field)
+
+        totals = {"rows" : 0, "existing" : 0}
+
+        async def count_existing(flattened_values, count):
+            totals["rows"] += count
+            if not count_changes:
+                return
+            totals["existing"] += await self._count_keys(table, key_fields, chunk_keys(flattened_values, count))
+
+        rowcount = await self._insert_chunks(table, keys, values, chunk_rows, chunk_bytes, commit_every,
+                                             statement=statement, on_chunk=count_existing)
+
+        return _upsert_result(rowcount, totals["rows"], totals["existing"] if count_changes else None)
+
+    async def _count_keys(self, table, key_fields, key_values) -> int:
+        """Count the rows of table matching any of the given key tuples"""
+
+        if not key_values:
+            return 0
+
+        cur = await self.query(*self._compile_count_keys(table, key_fields, key_values))
+
+        return int((await cur.fetchone())[0])
+
+    def _server_version(self):
+        """(version tuple, is_mariadb) of the connected server, read by connect()"""
+        if self._server is None:
+            raise mysql.InterfaceError("AsyncMysqlWrap is not connected, await connect() first")
+        return self._server
+
+    async def describe(self, table: str):
+        """Column definitions of a table, see MysqlWrap.describe()"""
+
+        columns = self._cached_columns(table)
+        if columns is not None:
+            return columns
+
+        cur = await self.query("EXPLAIN " + table)
+
+        columns = _explain_columns(await cur.fetchall())
+        self._cache_columns(table, columns)
+
+        return columns
+
+    async def loadSchema(self):
+        """Fill the schema cache with the definitions of all the tables in the database, see MysqlWrap.loadSchema()"""
+
+        if self.schema_cache is None:
+            self.schema_cache = TTLCache(ttl=self.conf["schema_cache_ttl"])
+
+        tables = _schema_tables(await (await self.query(SCHEMA_SQL)).fetchall())
+        for table, columns in tables.items():
+            self._cache_columns(table, columns)
+
+        return len(tables)
+
+    async def tableExist(self, table : str):
+        if self.schema_cache is not None:
+            exists = self.schema_cache.get(("exists", table))
+            if exists is not None:
+                return exists
+
+        cur = await self.query("SHOW TABLES LIKE '{0}'".format(table))
+        exists = bool(await cur.fetchone())
+
+        if self.schema_cache is not None:
+            self.schema_cache.set(("exists", table), exists, tags=(table,))
+
+        return exists
+
+    async def delete(self, table, where=None):
+        """Delete rows based on a where condition"""
+
+        return (await self.query(*self._compile_delete(table, where))).rowcount
+
+    async def query(self, sql, params=None):
+        """
+        Run a raw query. The cursor is buffered, its rows are already fetched but the fetch methods
+        still have to be awaited, eg: rows = await (await db.query(sql)).fetchall()
+        """
+
+        async with self.connection() as conn:
+            if self.instrumentation is None:
+                cur = await self._execute(conn, sql, params)
+            else:
+                started = time.perf_counter()
+                try:
+                    cur = await self._execute(conn, sql, params)
+                except Exception as e:
+                    self.instrumentation.record(sql, params, time.perf_counter() - started, error=e)
+                    raise
+                self.instrumentation.record(sql, params, time.perf_counter() - started, cur.rowcount)
+
+            # uncommitted writes keep the connection bound to this task
+            if not cur.with_rows and conn.in_transaction:
+                self._tasks[asyncio.current_task()].dirty = True
+
+        if self.schema_cache is not None:
+            self._invalidate_schema(sql)
+
+        return cur
+
+    async def _execute(self, conn, sql, params=None):
+        """Execute on the given connection, reconnecting once if the server went away and the statement can be retried"""
+
+        state = self._tasks[asyncio.current_task()]
+        cur = await conn.cursor(buffered=True)
+
+        try:
+            await cur.execute(sql, params)
+        except (mysql.OperationalError, mysql.InterfaceError) as e:
+            # mysql timed out. reconnect and retry once, not inside a transaction and only reads after 2013 and 2055,
+            # see MysqlWrap._can_retry()
+            if e.errno in (2006, 2013, 2055) and not state.dirty and not conn.in_transaction and \
+                    (e.errno == 2006 or _written_tables(sql) is None):
+                await conn.reconnect()
+                cur = await conn.cursor(buffered=True)
+                await cur.execute(sql, params)
+            else:
+                logger.exception("Query failed: %s", sql)
+                raise
+        except:
+            logger.exception("Query failed: %s", sql)
+            raise
+
+        state.cur = self._last_cur = cur
+
+        return cur
+
+    async def commit(self):
+        """Commit the transaction of the calling task"""
+        state = self._tasks.get(asyncio.current_task())
+        if state is None or state.conn is None:
+            return
+        result = await state.conn.commit()
+        state.dirty = False
+        if state.depth == 0:
+            await self._release()
+        return result
+
+    async def rollback(self):
+        """Roll back the transaction of the calling task"""
+        state = self._tasks.get(asyncio.current_task())
+        if state is None or state.conn is None:
+            return
+        result = await state.conn.rollback()
+        state.dirty = False
+        if state.depth == 0:
+            await self._release()
+        return result
+
+    def is_open(self):
+        """Check if the pool is open"""
+        return self.pool is not None and not self.pool.closed
+
+    async def end(self):
+        """Close the pool"""
+        if self.pool is None:
+            return
+        await self._release()
+        await self.pool.close()
+
+    async def __aenter__(self):
+        return await self.connect()
+
+    async def __aexit__(self, type, value, traceback):
+        if type is not None:
+            await self.rollback()
+        await self.end()
+
+    async def _select(self, table=None, fields=(), where=None, order=None, limit=None, group=None, having=None):
+        """Run a select query"""
+
+        return await self.query(*self._compile_select(table, fields, where, order, limit, group, having))
+
+    # the SQL is built, and the results read, exactly as in MysqlWrap
+    _compile_insert = MysqlWrap._compile_insert
+    _compile_update = MysqlWrap._compile_update
+    _compile_delete = MysqlWrap._compile_delete
+    _compile_count_keys = MysqlWrap._compile_count_keys
+    _chunk_builder = MysqlWrap._chunk_builder
+    _upsert_plan = MysqlWrap._upsert_plan
+    _cached_columns = MysqlWrap._cached_columns
+    _cache_columns = MysqlWrap._cache_columns
+    _serialize_insert = MysqlWrap._serialize_insert
+    _serialize_values = MysqlWrap._serialize_values
+    _serialize_update = MysqlWrap._serialize_update
+    _serialize_upsert = MysqlWrap._serialize_upsert
+    _supports_row_alias = MysqlWrap._supports_row_alias
+    _compile_select = MysqlWrap._compile_select
+    _serialize_select = MysqlWrap._serialize_select
+    _compiled = MysqlWrap._compiled
+    _invalidate_schema = MysqlWrap._invalidate_schema
+
+    def sqlCacheStats(self) -> dict:
+        """Hits and misses of the compiled sql cache"""
+        return self._sql_cache.stats()
+
+    # ===
+
+    _infer_datatypes = MysqlWrap._infer_datatypes
+    _serialize_datatypes = MysqlWrap._serialize_datatypes
+    _serialize_create_table = MysqlWrap._serialize_create_table
+    _sync_columns_changes = MysqlWrap._sync_columns_changes
+    _serialize_sync_columns = MysqlWrap._serialize_sync_columns
+    _rows_to_frame = MysqlWrap._rows_to_frame
+    _rows_to_array = MysqlWrap._rows_to_array
+
+    async def getTable(self, table=None, fields='*', where=None, order=None, limit=None, chunksize : int = None,
+                       output : str = "pandas"):
+        """
+        Get all results and return as a DataFrame, or a pyarrow.Table with output="arrow", see MysqlWrap.getTable().
+        With chunksize, returns an async iterator of chunks instead, see iterTable().
+        """
+        if chunksize:
+            return self.iterTable(table, fields, where, order, limit, chunksize, output)
+
+        if output == "arrow":
+            pa = _import_pyarrow()
+            batches = self._iter_arrow_batches(table, fields, where, order, limit, ARROW_BATCH_ROWS)
+            schema = await batches.__anext__()
+            return pa.Table.from_batches([batch async for batch in batches], schema=schema)
+        if output != "pandas":
+            raise ValueError("output must be 'pandas' or 'arrow', not {0}".format(output))
+
+        cur = await self._select(table, fields, where, order, limit)
+        rows = await cur.fetchall()
+
+        return self._rows_to_frame(rows, cur.description, await self._boolean_columns(table, cur.description))
+
+    async def getAggregate(self, table, by=None, aggs : dict = None, where=None, having=None, order=None, limit=None,
+                           sort : bool = True):
+        """Group and aggregate on the server and return as a DataFrame, see MysqlWrap.getAggregate()"""
+
+        by = [] if by is None else [by] if isinstance(by, str) else list(by)
+        if not by and not aggs:
+            raise ValueError("getAggregate needs by fields or aggs")
+
+        group = ["`%s`" % field for field in by]
+        fields = group + ["%s AS `%s`" % (expression, name) for name, expression in _aggregate_columns(aggs or {})]
+        if order is None and sort and group:
+            order = [",".join(group)]
+
+        cur = await self._select(table, fields, where, order, limit, group, having)
+        rows = await cur.fetchall()
+
+        return self._rows_to_frame(rows, cur.description, await self._boolean_columns(table, cur.description) & set(by))
+
+    async def iterTable(self, table=None, fields='*', where=None, order=None, limit=None, chunksize : int = 10000,
+                        output : str = "pandas"):
+        """
+        Iterate over the results in chunks of chunksize rows, eg:
+
+            async for frame in db.iterTable("books", chunksize=50000):
+                ...
+
+        Rows are streamed from the server with an unbuffered cursor on a connection of its own,
+        so only one chunk is held in memory and other tasks keep querying meanwhile.
+        parameters:
+            same as getTable()
+            output = "pandas" for DataFrames, "arrow" for pyarrow.RecordBatches
+        """
+
+        if output == "arrow":
+            batches = self._iter_arrow_batches(table, fields, where, order, limit, chunksize)
+            try:
+                await batches.__anext__()
+                async for batch in batches:
+                    yield batch
+            finally:
+                await batches.aclose()
+            return
+        if output != "pandas":
+            raise ValueError("output must be 'pandas' or 'arrow', not {0}".format(output))
+
+        sql, params = self._compile_select(table, fields, where, order, limit)
+        boolean_columns = await self._boolean_columns(table)
+
+        async with self._stream_cursor(sql, params) as cur:
+            description = cur.description
+            while True:
+                rows = await cur.fetchmany(chunksize)
+                if not rows:
+                    break
+                yield self._rows_to_frame(rows, description, boolean_columns)
+
+    async def _iter_arrow_batches(self, table, fields, where, order, limit, batch_rows):
+        """Stream the results as arrow RecordBatches, the first item is the arrow schema"""
+
+        pa = _import_pyarrow()
+        sql, params = self._compile_select(table, fields, where, order, limit)
+        columns = await self._table_columns(table)
+
+        async with self._stream_cursor(sql, params) as cur:
+            description = cur.description
+            rows = await cur.fetchmany(batch_rows)
+            schema = _arrow_schema(pa, description, columns, rows)
+            yield schema
+            while rows:
+                yield _arrow_batch(pa, rows, description, schema)
+                rows = await cur.fetchmany(batch_rows)
+
+    @asynccontextmanager
+    async def _stream_cursor(self, sql, params=None):
+        """Unbuffered cursor for streaming a result set, on a connection of its own"""
+
+        conn = await self.pool.checkout()
+        cur = await conn.cursor()
+        try:
+            await cur.execute(sql, params)
+            yield cur
+        finally:
+            # drain what is left of an abandoned result set, so the connection can be used again
+            try:
+                if conn.unread_result:
+                    await conn.consume_results()
+                await cur.close()
+            except mysql.Error:
+                pass
+            await self.pool.checkin(conn)
+
+    async def _boolean_columns(self, table, description=None) -> set:
+        """Names of the TINYINT(1) columns of table, see MysqlWrap._boolean_columns()"""
+
+        if description is not None and not any(field[1] == FieldType.TINY for field in description):
+            return set()
+
+        return _boolean_names(await self._table_columns(table))
+
+    async def _table_columns(self, table) -> dict:
+        """describe() of table, empty when there´s no table or it can´t be described"""
+
+        if not table:
+            return {}
+        try:
+            return await self.describe(table)
+        except mysql.Error:
+            return {}
+
+    async def createTable(self, table, data : pd.DataFrame, key_field : str = None):
+        """Create a new table using a DataFrame as the base, see MysqlWrap.createTable()"""
+
+        if await self.tableExist(table):
+            print("table {0} already exists in the database".format(table))
+            return
+
+        return await self.query(self._serialize_create_table(table, data, key_field))
+
+    async def syncColumns(self, table, data : pd.DataFrame):
+        """Add missing columns and widen mismatched column types, see MysqlWrap.syncColumns()"""
+
+        sql = self._serialize_sync_columns(table, data, await self.describe(table))
+        if sql is None:
+            return
+
+        return await self.query(sql)
+
+    async def insertFromDataFrame(self, table, data : pd.DataFrame, syncColumns : bool = False,
+                                  chunk_rows : int = None, chunk_bytes : int = None, commit_every : int = None):
+        """
+        Insert new rows in the target table, derived from the input dataframe, see MysqlWrap.insertFromDataFrame().
+        Might require commit afterwards.
+        """
+        if syncColumns:
+            await self.syncColumns(table, data)
+
+        return await self._insert_chunks(table, list(data.keys()), _iter_frame_values(data),
+                                         chunk_rows, chunk_bytes, commit_every)
+
+    async def insertOrUpdateFromDataFrame(self, table, data : pd.DataFrame, key_field : str, syncColumns : bool = False,
+                                          chunk_rows : int = None, chunk_bytes : int = None, commit_every : int = None,
+                                          insert_missing : bool = False):
+        """
+        Update the rows matching key_field and insert the others, see MysqlWrap.insertOrUpdateFromDataFrame().
+        Might require commit.
+        """
+
+        if syncColumns:
+            await self.syncColumns(table, data)
+
+        target_description = await self.describe(table)
+        if key_field not in target_description.keys():
+            return print ("could not find key_field {0} in the target table")
+
+        if target_description[key_field]["Key"].lower() in ["pri", "uni"]:
+            return await self._upsert_chunks(table, list(data.keys()), _iter_frame_values(data), key_field,
+                                             chunk_rows, chunk_bytes, commit_every)
+
+        return await self._update_from_staging(table, data, key_field, insert_missing, chunk_rows, chunk_bytes)
+
+    async def _update_from_staging(self, table, data : pd.DataFrame, key_field : str, insert_missing : bool = False,
+                                   chunk_rows : int = None, chunk_bytes : int = None):
+        """Update the rows of table matching key_field through a temporary staging table, see MysqlWrap._update_from_staging()"""
+
+        columns = list(data.keys())
+        staging, statements = _staging_statements(table, columns, key_field)
+
+        # temporary tables live on one connection, and creating or dropping them doesn´t commit
+        async with self.connection():
+            await self.query(statements["drop"])
+            await self.query(statements["create"])
+            try:
+                rows = await self._insert_chunks(staging, columns, _iter_frame_values(data), chunk_rows, chunk_bytes)
+
+                updated = (await self.query(statements["update"])).rowcount
+
+                inserted = 0
+                if insert_missing:
+                    inserted = (await self.query(statements["insert"])).rowcount
+            finally:
+                await self.query(statements["drop"])
+
+        return {"rowcount" : updated + inserted, "rows" : rows, "inserted" : inserted, "updated" : updated, "unchanged" : None}
+
+    async def createInsertTable(self, table, data : pd.DataFrame, key_field : str = None, updateColumns : bool = False):
+        """Create the table if it doesn´t exist, then insert the frame, see MysqlWrap.createInsertTable()"""
+
+        if not await self.tableExist(table):
+            await self.createTable(table, data, key_field)
+        return await self.insertFromDataFrame(table, data, updateColumns)
+
+    async def createUpdateTable(self, table, data : pd.DataFrame, key_field, updateColumns : bool = False):
+        """Create the table if it doesn´t exist, then insert or update the frame, see MysqlWrap.createUpdateTable()"""
+
+        if not await self.tableExist(table):
+            await self.createTable(table, data, key_field)
+        return await self.insertOrUpdateFromDataFrame(table, data, key_field, updateColumns)
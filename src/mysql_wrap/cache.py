@@ -0,0 +1,107 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+"""
+    A small thread safe cache used by MysqlWrap for table definitions (schema_cache)
+    and for the results of reads (result_cache).
+
+    Entries expire after a time to live, the least recently used ones are evicted once the cache is full,
+    and every entry can be tagged with the tables it depends on, so it can be invalidated by table name:
+    the writes through MysqlWrap invalidate the results read from the tables they change.
+"""
+
+MISSING = object()
+
+
+class TTLCache:
+    """
+    parameters:
+        ttl = (float) seconds an entry stays valid, None keeps entries until they are invalidated
+        max_size = (int) max number of entries, None for no limit
+    """
+
+    def __init__(self, ttl : float = None, max_size : int = None):
+        self.ttl = ttl
+        self.max_size = max_size
+
+        self._entries = OrderedDict()
+        self._tags = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        """Get a valid entry, or default"""
+        with self._lock:
+            entry = self._entries.get(key, MISSING)
+            if entry is MISSING:
+                self.misses += 1
+                return default
+
+            expires, value, tags = entry
+            if expires is not None and expires < time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, tags=()):
+        """Store an entry, tagged with the names it can be invalidated by"""
+        expires = None if self.ttl is None else time.monotonic() + self.ttl
+        tags = frozenset(_tag(tag) for tag in tags)
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (expires, value, tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+
+            while self.max_size is not None and len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, *tags):
+        """Drop all entries tagged with any of the given names"""
+        with self._lock:
+            for tag in tags:
+                for key in list(self._tags.get(_tag(tag), ())):
+                    self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size" : len(self._entries),
+                    "max_size" : self.max_size,
+                    "ttl" : self.ttl,
+                    "hits" : self.hits,
+                    "misses" : self.misses,
+                    "evictions" : self.evictions}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove(self, key):
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+def _tag(name) -> str:
+    """Table names are matched without quoting or database"""
+    return str(name).replace("`", "").rsplit(".", 1)[-1]
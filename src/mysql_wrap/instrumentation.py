@@ -0,0 +1,232 @@
+import bisect
+import functools
+import logging
+import re
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+
+"""
+    Query instrumentation for MysqlWrap.
+
+    An Instrumentation object passed as instrumentation= (or assigned to db.instrumentation) is told about
+    every statement run through query() and about the DataFrame methods. It keeps counters and a latency
+    histogram per statement fingerprint, the statement with its literals and placeholders replaced by ?,
+    logs slow statements through the "mysql_wrap" logger and forwards every event to the registered callbacks.
+    Without it the wrapper only pays for a None check.
+"""
+
+logger = logging.getLogger("mysql_wrap")
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, float("inf"))
+MAX_FINGERPRINTS = 1000
+OTHER_FINGERPRINT = "(other)"
+
+QueryEvent = namedtuple("QueryEvent", ["operation", "sql", "params", "fingerprint", "seconds", "rows", "bytes_sent",
+                                       "error"])
+
+LITERALS = re.compile(r"""'(?:[^'\\]|\\.|'')*'|"(?:[^"\\]|\\.|"")*"|\b0x[0-9a-f]+\b|(?<![\w.`])-?\d+(?:\.\d+)?(?:e[+-]?\d+)?\b|%(?:\(\w+\))?s""",
+                      re.IGNORECASE)
+VALUE_LIST = re.compile(r"\?(?:\s*,\s*\?)+")
+ROW_LIST = re.compile(r"\bVALUES\s*(\(\?\+?\))(?:\s*,\s*\(\?\+?\))*", re.IGNORECASE)
+SPACES = re.compile(r"\s+")
+
+
+@functools.lru_cache(maxsize=4096)
+def fingerprint(sql : str) -> str:
+    """
+    Normalize a statement, so that the statements differing only by their values share one fingerprint:
+    literals and placeholders become ?, lists of them ?+ and VALUES lists of any number of rows (?+)+
+    """
+    if isinstance(sql, (bytes, bytearray)):
+        sql = sql.decode("utf-8", "replace")
+    sql = LITERALS.sub("?", sql)
+    sql = VALUE_LIST.sub("?+", sql)
+    sql = ROW_LIST.sub(r"VALUES \1+", sql)
+    return SPACES.sub(" ", sql).strip()
+
+
+def _params_size(params) -> int:
+    """Rough size of the parameters of a statement once sent"""
+    if not params:
+        return 0
+    if isinstance(params, dict):
+        params = params.values()
+    size = 0
+    for value in params:
+        if value is None:
+            size += 4
+        elif isinstance(value, (bytes, bytearray, str)):
+            size += len(value) + 2
+        else:
+            size += len(str(value))
+    return size
+
+
+def _result_rows(result):
+    """Number of rows of what a DataFrame method returned, None if unknown"""
+    if hasattr(result, "num_rows"):
+        return result.num_rows
+    if hasattr(result, "shape"):
+        return result.shape[0]
+    if isinstance(result, dict):
+        return result.get("rows", result.get("rowcount"))
+    if isinstance(result, int) and not isinstance(result, bool):
+        return result
+    return None
+
+
+class Instrumentation:
+    """
+    parameters:
+        slow_query_seconds = (float) statements slower than this are logged with their parameters, None disables the log
+        callbacks = list of callables, each called with a QueryEvent after every statement and DataFrame method
+        buckets = upper bounds in seconds of the latency histogram buckets
+        max_fingerprints = (int) max number of fingerprints tracked, the others are counted together
+        log_params = (bool) include the parameters in the slow query log
+    """
+
+    def __init__(self, slow_query_seconds : float = None, callbacks=(), buckets=LATENCY_BUCKETS,
+                 max_fingerprints : int = MAX_FINGERPRINTS, log_params : bool = True):
+        self.slow_query_seconds = slow_query_seconds
+        self.callbacks = list(callbacks)
+        self.buckets = tuple(sorted(buckets))
+        if self.buckets[-1] != float("inf"):
+            self.buckets += (float("inf"),)
+        self.max_fingerprints = max_fingerprints
+        self.log_params = log_params
+
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def addCallback(self, callback):
+        """Register a callable called with a QueryEvent for every statement and DataFrame method"""
+        self.callbacks.append(callback)
+
+    def record(self, sql, params=None, seconds : float = 0.0, rows : int = None, error : Exception = None,
+               operation : str = "query", bytes_sent : int = None):
+        """Account for one statement, or one DataFrame method when operation is its name"""
+
+        if operation == "query":
+            key = fingerprint(sql)
+            if bytes_sent is None:
+                bytes_sent = len(sql) + _params_size(params)
+        else:
+            key = "%s(%s)" % (operation, sql) if sql else operation
+
+        if rows is not None and rows < 0:
+            rows = None
+
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                if len(self._stats) >= self.max_fingerprints:
+                    key = OTHER_FINGERPRINT
+                    stats = self._stats.get(key)
+                if stats is None:
+                    stats = self._stats[key] = {"operation" : operation, "count" : 0, "errors" : 0, "seconds" : 0.0,
+                                                "min_seconds" : None, "max_seconds" : 0.0, "rows" : 0,
+                                                "bytes_sent" : 0, "histogram" : [0] * len(self.buckets)}
+            stats["count"] += 1
+            stats["seconds"] += seconds
+            stats["max_seconds"] = max(stats["max_seconds"], seconds)
+            stats["min_seconds"] = seconds if stats["min_seconds"] is None else min(stats["min_seconds"], seconds)
+            stats["histogram"][bisect.bisect_left(self.buckets, seconds)] += 1
+            if rows:
+                stats["rows"] += rows
+            if bytes_sent:
+                stats["bytes_sent"] += bytes_sent
+            if error is not None:
+                stats["errors"] += 1
+
+        if self.slow_query_seconds is not None and seconds >= self.slow_query_seconds:
+            if self.log_params and params is not None:
+                logger.warning("slow %s (%.3fs): %s params=%r", operation, seconds, sql, params)
+            else:
+                logger.warning("slow %s (%.3fs): %s", operation, seconds, sql)
+
+        if self.callbacks:
+            event = QueryEvent(operation, sql, params, key, seconds, rows, bytes_sent, error)
+            for callback in self.callbacks:
+                try:
+                    callback(event)
+                except Exception:
+                    logger.exception("instrumentation callback failed")
+
+    @contextmanager
+    def operation(self, name : str, table : str = None):
+        """
+        Time a block as one event, eg a DataFrame method:
+
+            with instrumentation.operation("insertFromDataFrame", "books") as op:
+                ...
+                op["rows"] = len(data)
+        """
+
+        op = {"rows" : None}
+        started = time.perf_counter()
+        try:
+            yield op
+        except Exception as e:
+            self.record(table, None, time.perf_counter() - started, op["rows"], e, operation=name)
+            raise
+        self.record(table, None, time.perf_counter() - started, op["rows"], operation=name)
+
+    def stats(self) -> dict:
+        """
+        Per fingerprint counters: count, errors, total / min / max / mean seconds, rows, bytes_sent,
+        p50 / p95 / p99 latency (upper bound of the histogram bucket) and the histogram as {bucket upper bound : count}
+        """
+
+        with self._lock:
+            snapshot = {key : dict(stats, histogram=list(stats["histogram"])) for key, stats in self._stats.items()}
+
+        for stats in snapshot.values():
+            histogram = stats["histogram"]
+            stats["mean_seconds"] = stats["seconds"] / stats["count"] if stats["count"] else 0.0
+            for name, quantile in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99)):
+                stats[name] = self._percentile(histogram, stats["count"], quantile)
+            stats["histogram"] = {bound : count for bound, count in zip(self.buckets, histogram) if count}
+
+        return snapshot
+
+    def slowest(self, count : int = 10) -> list:
+        """The fingerprints taking the most total time, as (fingerprint, stats) pairs"""
+        return sorted(self.stats().items(), key=lambda item: item[1]["seconds"], reverse=True)[:count]
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+    def _percentile(self, histogram, count, quantile):
+        if not count:
+            return None
+        rank = quantile * count
+        seen = 0
+        for bound, hits in zip(self.buckets, histogram):
+            seen += hits
+            if seen >= rank:
+                return bound
+        return self.buckets[-1]
+
+
+def instrumented(method):
+    """Time a MysqlWrap DataFrame method as one event when the wrapper is instrumented"""
+
+    name = method.__name__
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        instrumentation = self.instrumentation
+        if instrumentation is None:
+            return method(self, *args, **kwargs)
+
+        table = args[0] if args else kwargs.get("table")
+        with instrumentation.operation(name, table if isinstance(table, str) else None) as op:
+            result = method(self, *args, **kwargs)
+            op["rows"] = _result_rows(result)
+        return result
+
+    return wrapper
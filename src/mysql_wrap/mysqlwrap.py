@@ -1,14 +1,35 @@
 import mysql.connector as mysql
-from collections import namedtuple
+from mysql.connector.constants import FieldType, FieldFlag
+from collections import namedtuple, OrderedDict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from contextlib import contextmanager
 from itertools import repeat
-
+import multiprocessing
+import threading
+import time
+import weakref
+
+import datetime
+import decimal
+import hashlib
 import json
+import logging
+import os
+import re
+import tempfile
 
 import pandas as pd
 import numpy
 
+from .cache import TTLCache, MISSING
+from .instrumentation import instrumented
+from .pool import ConnectionPool
+from .replicas import ReplicaSet, CHECK_INTERVAL, RETRY_AFTER
+
 np = numpy
 
+logger = logging.getLogger("mysql_wrap")
+
 
 
 """
@@ -23,10 +44,18 @@ np = numpy
         insert() - insert a row
         insertBatch() - Batch Insert
         insertOrUpdate() - insert a row or update it if it exists
+        bufferedWriter() - queue single rows and write them in the background as multi row statements
         update() - update rows
         delete() - delete rows
         query()  - run a raw sql query
+        describe() - get the column definitions of a table
+        loadSchema() - fill the schema cache from information_schema
+        invalidateResults() - drop cached results of tables changed by other clients
+        replicaStats() - health, latency and lag of the read replicas
         commit() - commits a transaction for transactional engines
+        rollback() - rolls back the current transaction
+        connection() - context manager holding one connection for a block of queries (pooled mode)
+        transaction() - context manager committing a block of queries, or rolling it back on error
         leftJoin() - do an inner left join query and get results
         - create database()
         - clear records()
@@ -36,11 +65,18 @@ np = numpy
         createTable() - creates a Table using a DataFrame as the input
         syncColumns() - updates columns in the Table using the columns in the DataFrame as the source
         insertTable() - updates a Table using a DataFrame as the input
+        loadDataFrame() - bulk loads a DataFrame with LOAD DATA LOCAL INFILE
         insertOrUpdateTable() - updates a Table using a DataFrame as the input, adds missing columns and changes mismatched column types.
         createInsertTable() - creates a Table if it doesn´t exists, updates the records if it does
         createUpdateTable() - creates a Table if it doesn´t exists, updates the records if it does, adds missing columns and chages mismatched column types
         getTable() - get all rows, return as DataFrame  
-        - copyTable()
+        getAggregate() - group and aggregate rows on the server, return as DataFrame
+        iterTable() - stream rows as DataFrames of a given size
+        iterRows() - iterate over all the rows of a table, paging by key
+        dumpTable() - stream rows to a Parquet file
+        writeParallel() - insert or upsert a DataFrame over several connections at once
+        syncFromDataFrame() - write only the new and changed rows of a DataFrame, optionally delete the missing ones
+        copyTable() - copy a table, or part of it, on the server in key range chunks
         - deleteTable()     
         - renameColumns
 
@@ -57,27 +93,900 @@ np = numpy
     June 2024
 """
 
-DTypeDict  = {
-    "VARCHAR" : ['string'],
-    "DATETIME" : [ np.datetime64, 'datetime' , 'datetime64', 'datetime64[ns, <tz>]'],
-    "FLOAT" : ['float32', 'float64', np.float64, 'numpy.float64', numpy.float64],
-    "INT" : ['int8', 'int16', 'int32', 'int64', 'uint8', 'uint16', 'uint32', 'uint64'],
-    "TINYINT" : ['boolean'],
-    }
+# type inference, see _infer_datatype()
+INFERENCE_SAMPLE_ROWS = 100000
+JSON_HIT_RATIO = 1.0
+VARCHAR_MIN_LENGTH = 255
+VARCHAR_MAX_LENGTH = 4096
+# longest utf8mb4 VARCHAR InnoDB can index (3072 bytes)
+KEY_MAX_LENGTH = 768
+# InnoDB row size limit, shared by the VARCHAR columns of a table at their full length, TEXT and BLOB only count a pointer
+ROW_MAX_BYTES = 65535
+
+INTEGER_TYPES = [("TINYINT", -2 ** 7, 2 ** 7 - 1),
+                 ("SMALLINT", -2 ** 15, 2 ** 15 - 1),
+                 ("MEDIUMINT", -2 ** 23, 2 ** 23 - 1),
+                 ("INT", -2 ** 31, 2 ** 31 - 1),
+                 ("BIGINT", -2 ** 63, 2 ** 63 - 1)]
+INTEGER_RANK = {name : rank for rank, (name, _, _) in enumerate(INTEGER_TYPES)}
+INTEGER_RANK["INTEGER"] = INTEGER_RANK["INT"]
+# digits of the largest value, unsigned BIGINT included
+INTEGER_DIGITS = {"TINYINT" : 3, "SMALLINT" : 5, "MEDIUMINT" : 8, "INT" : 10, "INTEGER" : 10, "BIGINT" : 20}
+FLOAT_TYPES = ("FLOAT", "DOUBLE", "REAL")
+# longest text form of the values of fixed size types
+TEXT_WIDTHS = {"FLOAT" : 24, "DOUBLE" : 24, "REAL" : 24, "BIT" : 20, "YEAR" : 4,
+               "DATE" : 10, "TIME" : 17, "DATETIME" : 26, "TIMESTAMP" : 26}
+
+# max length in bytes
+TEXT_TYPES = [("TINYTEXT", 2 ** 8 - 1), ("TEXT", 2 ** 16 - 1), ("MEDIUMTEXT", 2 ** 24 - 1), ("LONGTEXT", 2 ** 32 - 1)]
+BLOB_TYPES = [("TINYBLOB", 2 ** 8 - 1), ("BLOB", 2 ** 16 - 1), ("MEDIUMBLOB", 2 ** 24 - 1), ("LONGBLOB", 2 ** 32 - 1)]
+TEXT_RANK = {name : rank for rank, (name, _) in enumerate(TEXT_TYPES)}
+TEXT_RANK.update({name : rank for rank, (name, _) in enumerate(BLOB_TYPES)})
+TEXT_SIZES = dict(TEXT_TYPES + BLOB_TYPES)
+
+DATATYPE = re.compile(r"^\s*([A-Z]+)\s*(?:\(([^)]*)\))?\s*(UNSIGNED)?", re.IGNORECASE)
+
+
+def _integer_datatype(minimum, maximum) -> str:
+    """Smallest integer type holding the range"""
+    for name, low, high in INTEGER_TYPES:
+        if low <= minimum and maximum <= high:
+            return name
+    return "BIGINT UNSIGNED"
+
+
+def _text_datatype(max_length : int, binary : bool = False) -> str:
+    """VARCHAR up to VARCHAR_MAX_LENGTH characters, TEXT types above, sized for 4 bytes per character"""
+    if max_length <= VARCHAR_MAX_LENGTH:
+        return "%s(%s)" % ("VARBINARY" if binary else "VARCHAR", max(int(max_length), VARCHAR_MIN_LENGTH))
+    for name, size in (BLOB_TYPES if binary else TEXT_TYPES):
+        if max_length * (1 if binary else 4) <= size:
+            return name
+    return "LONGBLOB" if binary else "LONGTEXT"
+
+
+def _decimal_precision_scale(values : pd.Series):
+    """Precision and scale of a column of decimal.Decimal values"""
+    text = values.map(lambda value : format(value, "f")).str.lstrip("-")
+    parts = text.str.partition(".")
+    integer_digits = parts[0].str.lstrip("0").str.len().max()
+    scale = parts[2].str.len().max()
+    return min(max(int(integer_digits) + int(scale), 1), 65), min(int(scale), 30)
+
+
+def _json_hit_ratio(values : pd.Series) -> float:
+    """Share of the string values which parse as a JSON object or array"""
+    if not len(values):
+        return 0.0
+    candidates = values[values.str.match(r"^\s*[\[{]")]
+    hits = 0
+    for value in candidates:
+        try:
+            json.loads(value)
+            hits += 1
+        except ValueError:
+            pass
+    return hits / len(values)
+
+
+def _infer_datatype(column : pd.Series, sample_rows : int = INFERENCE_SAMPLE_ROWS) -> str:
+    """
+    Tightest mysql type for a DataFrame column.
+    Ranges and lengths are computed over the whole column with vectorized reductions, while the checks
+    which need python objects (value types, JSON parsing) only look at up to sample_rows non null values.
+    """
+
+    dtype = column.dtype
+
+    if pd.api.types.is_bool_dtype(dtype):
+        return "TINYINT(1)"
+    if pd.api.types.is_integer_dtype(dtype):
+        values = column.dropna()
+        if not len(values):
+            return "INT"
+        return _integer_datatype(int(values.min()), int(values.max()))
+    if pd.api.types.is_float_dtype(dtype):
+        return "FLOAT" if dtype == np.float32 else "DOUBLE"
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        values = column.dropna()
+        fractional = len(values) and bool(((values.dt.microsecond != 0) | (values.dt.nanosecond != 0)).any())
+        return "DATETIME(6)" if fractional else "DATETIME"
+    if pd.api.types.is_timedelta64_dtype(dtype):
+        return "TIME"
+
+    values = column.dropna()
+    if isinstance(dtype, pd.CategoricalDtype):
+        values = values.astype(object)
+    if not len(values):
+        return "VARCHAR(%s)" % VARCHAR_MIN_LENGTH
+
+    sample = values if sample_rows is None or len(values) <= sample_rows else values.sample(sample_rows, random_state=0)
+    kinds = set(sample.map(type))
+
+    if kinds <= {bool, np.bool_}:
+        return "TINYINT(1)"
+    if kinds <= {int, np.int64, np.int32, np.int16, np.int8}:
+        return _integer_datatype(int(values.min()), int(values.max()))
+    if kinds <= {int, float, np.float64, np.float32, np.int64}:
+        return "DOUBLE"
+    if kinds <= {decimal.Decimal}:
+        return "DECIMAL(%s,%s)" % _decimal_precision_scale(values)
+    if kinds <= {datetime.date}:
+        return "DATE"
+    if kinds <= {datetime.datetime, datetime.date, pd.Timestamp}:
+        return "DATETIME"
+    if kinds <= {dict, list}:
+        return "JSON"
+    if kinds <= {bytes, bytearray}:
+        return _text_datatype(int(values.map(len).max()), binary=True)
+    if kinds <= {str}:
+        if _json_hit_ratio(sample) >= JSON_HIT_RATIO:
+            return "JSON"
+        return _text_datatype(int(values.str.len().max()))
+
+    return _text_datatype(int(values.astype(str).str.len().max()))
+
+
+def _parse_datatype(datatype : str):
+    """("BASE", (arguments), unsigned) of a mysql column type, eg "DECIMAL(10,2)" -> ("DECIMAL", (10, 2), False)"""
+    match = DATATYPE.match(datatype or "")
+    if not match:
+        return (str(datatype).upper(), (), False)
+    arguments = tuple(int(argument) for argument in (match.group(2) or "").split(",") if argument.strip().isdigit())
+    return (match.group(1).upper(), arguments, bool(match.group(3)))
+
+
+def _text_width(base : str, arguments : tuple, binary : bool = False):
+    """
+    Longest text form of the values of a column type, in characters, or in bytes for binary strings
+    (4 per character of utf8mb4 text). None when unbounded, or unknown
+    """
+    if base in ("VARCHAR", "CHAR"):
+        return (arguments or (1,))[0] * (4 if binary else 1)
+    if base in ("VARBINARY", "BINARY"):
+        return (arguments or (1,))[0]
+    if base in TEXT_SIZES:
+        return TEXT_SIZES[base] // (1 if binary or base in dict(BLOB_TYPES) else 4)
+    if base in INTEGER_DIGITS:
+        return INTEGER_DIGITS[base] + 1
+    if base == "DECIMAL":
+        # sign and decimal point
+        return (arguments or (10,))[0] + 2
+    return TEXT_WIDTHS.get(base)
+
+
+def _widen_text(dest : str, width, binary : bool = False) -> str:
+    """dest when it is a string type holding width characters (bytes when binary), else the smallest string type that does"""
+
+    dest_base, dest_args, _ = _parse_datatype(dest)
+    string_types, text_types = (("VARBINARY", "BINARY"), BLOB_TYPES) if binary else (("VARCHAR", "CHAR"), TEXT_TYPES)
+    unit = 1 if binary else 4
+
+    if dest_base in dict(text_types):
+        # TEXT types are never turned back into VARCHAR, and are compared by their size in bytes
+        for name, size in text_types[TEXT_RANK[dest_base]:]:
+            if width is not None and width * unit <= size:
+                return dest if name == dest_base else name
+        return text_types[-1][0]
+
+    if dest_base in string_types and width is not None and width <= dest_args[0]:
+        return dest
+    if width is None:
+        return text_types[-1][0]
+    return _text_datatype(width, binary)
+
+
+def _key_datatype(datatype : str) -> str:
+    """
+    Type of a primary key column: strings are capped at the longest key InnoDB can index,
+    TEXT, BLOB and JSON columns can´t be keys without a prefix length
+    """
+    base, arguments, _ = _parse_datatype(datatype)
+    if base in dict(TEXT_TYPES) or base == "JSON" or (base == "VARCHAR" and arguments[0] > KEY_MAX_LENGTH):
+        return "VARCHAR(%s)" % KEY_MAX_LENGTH
+    if base in dict(BLOB_TYPES) or (base == "VARBINARY" and arguments[0] > KEY_MAX_LENGTH * 4):
+        return "VARBINARY(%s)" % (KEY_MAX_LENGTH * 4)
+    return datatype
+
+
+def _row_bytes(datatype : str) -> int:
+    """Bytes a column takes of the row size limit, VARCHAR at 4 bytes per character"""
+    base, arguments, _ = _parse_datatype(datatype)
+    if base in ("VARCHAR", "VARBINARY"):
+        # and the length prefix
+        return arguments[0] * (4 if base == "VARCHAR" else 1) + 2
+    if base == "DECIMAL":
+        return ((arguments or (10,))[0] // 9 + 1) * 4
+    # numbers, dates, and the pointer of TEXT, BLOB and JSON columns
+    return 12
+
+
+def _fit_row(datatypes : list, key_index : int = None) -> list:
+    """Turn the longest VARCHAR columns into TEXT (VARBINARY into BLOB) until the row fits in ROW_MAX_BYTES"""
+
+    datatypes = list(datatypes)
+    excess = sum(map(_row_bytes, datatypes)) - ROW_MAX_BYTES
+    candidates = sorted((index for index, datatype in enumerate(datatypes)
+                         if index != key_index and datatype.startswith(("VARCHAR", "VARBINARY"))),
+                        key=lambda index : _row_bytes(datatypes[index]), reverse=True)
+    for index in candidates:
+        if excess <= 0:
+            break
+        excess -= _row_bytes(datatypes[index]) - _row_bytes("TEXT")
+        # VARCHAR_MAX_LENGTH characters fit in a TEXT
+        datatypes[index] = "BLOB" if datatypes[index].startswith("VARBINARY") else "TEXT"
+    return datatypes
+
+
+def _merge_datatype(source : str, dest : str) -> str:
+    """
+    Type of an existing column (dest) able to hold the values of source: dest itself when it already fits,
+    a widened type of the same family otherwise. Between families, integers widen to DOUBLE or DECIMAL
+    and DATE to DATETIME, a DECIMAL and a float column keep the existing type, anything else becomes
+    a string type holding the text of both. Used by syncColumns so that columns are only ever widened.
+    """
+
+    source_base, source_args, source_unsigned = _parse_datatype(source)
+    dest_base, dest_args, dest_unsigned = _parse_datatype(dest)
+
+    if source_base == dest_base and source_args == dest_args and source_unsigned == dest_unsigned:
+        return dest
+
+    # integers, display widths are ignored, TINYINT(1) holds booleans
+    if source_base in INTEGER_RANK and dest_base in INTEGER_RANK:
+        if dest_base == "TINYINT" and dest_args == (1,) and not (source_base == "TINYINT" and source_args == (1,)):
+            return source
+        if source_unsigned and not dest_unsigned:
+            return source if INTEGER_RANK[source_base] >= INTEGER_RANK[dest_base] else dest
+        if INTEGER_RANK[dest_base] >= INTEGER_RANK[source_base]:
+            return dest
+        return source
+    if source_base in INTEGER_RANK and dest_base in FLOAT_TYPES:
+        return dest
+    if source_base in FLOAT_TYPES and dest_base in INTEGER_RANK:
+        return "DOUBLE"
+
+    if source_base == "FLOAT" and dest_base in ("DOUBLE", "REAL"):
+        return dest
+    if source_base in ("DOUBLE", "REAL") and dest_base == "FLOAT":
+        return source
+
+    # DECIMAL columns keep their scale and get the integer digits of both
+    if "DECIMAL" in (source_base, dest_base) and {source_base, dest_base} <= {"DECIMAL", *INTEGER_DIGITS}:
+        source_precision, source_scale = (source_args + (10, 0))[:2] if source_base == "DECIMAL" else (INTEGER_DIGITS[source_base], 0)
+        dest_precision, dest_scale = (dest_args + (10, 0))[:2] if dest_base == "DECIMAL" else (INTEGER_DIGITS[dest_base], 0)
+        scale = max(source_scale, dest_scale)
+        precision = min(max(source_precision - source_scale, dest_precision - dest_scale) + scale, 65)
+        if dest_base == "DECIMAL" and (precision, scale) == (dest_precision, dest_scale):
+            return dest
+        return "DECIMAL(%s,%s)" % (precision, scale)
+    # exact and approximate numbers don´t widen into each other, the column keeps its type
+    if {source_base, dest_base} <= {"DECIMAL", *FLOAT_TYPES}:
+        return dest
+
+    if source_base in ("DATETIME", "DATE", "TIMESTAMP") and dest_base in ("DATETIME", "TIMESTAMP"):
+        if source_base == "DATE" or (source_args or (0,))[0] <= (dest_args or (0,))[0]:
+            return dest
+        return "%s(%s)" % (dest_base, source_args[0])
+    if source_base in ("DATETIME", "TIMESTAMP") and dest_base == "DATE":
+        return source
+
+    # strings, binary strings, and the families which don´t mix: a string type holding the text of both
+    binary = any(base in ("VARBINARY", "BINARY") or base in dict(BLOB_TYPES) for base in (source_base, dest_base))
+    widths = [_text_width(source_base, source_args, binary), _text_width(dest_base, dest_args, binary)]
+    width = None if None in widths else max(widths)
+    if dest_base in (*dict(TEXT_TYPES + BLOB_TYPES), "VARCHAR", "VARBINARY", "CHAR", "BINARY"):
+        # the existing values of a string column already fit it
+        width = widths[0]
+    return _widen_text(dest, width, binary)
+
+
+FRAME_SLICE_ROWS = 10000
+SQL_CACHE_SIZE = 1024
+RESULT_CACHE_SIZE = 256
+
+DDL_STATEMENT = re.compile(r"^\s*(ALTER|CREATE|DROP|RENAME|TRUNCATE)\b", re.IGNORECASE)
+DDL_TABLE = re.compile(r"^\s*(ALTER|CREATE|DROP|TRUNCATE)\s+(?:TEMPORARY\s+)?TABLE\s+(?:IF\s+(?:NOT\s+)?EXISTS\s+)?"
+                       r"([`\w.$]+(?:\s*,\s*[`\w.$]+)*)", re.IGNORECASE)
+
+
+def _ddl_tables(sql : str):
+    """
+    Tables changed by a DDL statement: None for statements which are not DDL,
+    an empty list when the tables can´t be told (RENAME, CREATE INDEX ...)
+    """
+    if not DDL_STATEMENT.match(sql):
+        return None
+    match = DDL_TABLE.match(sql)
+    if not match:
+        return []
+    tables = match.group(2).replace("`", "").split(",")
+    # only DROP takes a list of tables
+    if match.group(1).upper() != "DROP":
+        tables = tables[:1]
+    return [table.strip() for table in tables]
+
+
+READ_STATEMENT = re.compile(r"^\s*\(?\s*(SELECT|SHOW|EXPLAIN|DESCRIBE|DESC|SET|USE|BEGIN|START|COMMIT|ROLLBACK|SAVEPOINT|RELEASE|DO|HANDLER|CHECK|ANALYZE)\b",
+                            re.IGNORECASE)
+WRITE_TABLE = re.compile(r"^\s*(?:(?:INSERT|REPLACE)(?:\s+(?:LOW_PRIORITY|DELAYED|HIGH_PRIORITY|IGNORE))*\s+(?:INTO\s+)?"
+                         r"|UPDATE(?:\s+(?:LOW_PRIORITY|IGNORE))*\s+"
+                         r"|DELETE(?:\s+(?:LOW_PRIORITY|QUICK|IGNORE))*\s+FROM\s+"
+                         r"|LOAD\s+DATA\s+.*?\bINTO\s+TABLE\s+)([`\w.$]+)", re.IGNORECASE | re.DOTALL)
+
+
+def _written_tables(sql : str):
+    """
+    Tables changed by a statement: None for reads, an empty list when the tables can´t be told
+    (multi table deletes, stored procedures ...). For UPDATE ... JOIN only the first table is counted.
+    """
+    if isinstance(sql, (bytes, bytearray)):
+        sql = sql.decode("utf-8", "replace")
+    if READ_STATEMENT.match(sql):
+        return None
+    tables = _ddl_tables(sql)
+    if tables is not None:
+        return tables
+    match = WRITE_TABLE.match(sql)
+    if not match:
+        return []
+    return [match.group(1).replace("`", "")]
+
+
+def _copy_result(result):
+    """Copy of a cached result, so the caller can modify it"""
+    if result is None:
+        return None
+    if isinstance(result, (pd.DataFrame, np.ndarray)):
+        return result.copy()
+    if isinstance(result, dict):
+        return dict(result)
+    return [dict(row) for row in result]
+
+
+def _text(value) -> str:
+    """Decode bytes returned for text columns by some server and connector versions"""
+    if isinstance(value, (bytes, bytearray)):
+        return value.decode()
+    return value
+
+
+# table definitions of the whole database, see loadSchema()
+SCHEMA_SQL = ("SELECT TABLE_NAME, COLUMN_NAME, COLUMN_TYPE, IS_NULLABLE, COLUMN_KEY, COLUMN_DEFAULT, EXTRA "
+              "FROM information_schema.COLUMNS WHERE TABLE_SCHEMA = DATABASE() ORDER BY TABLE_NAME, ORDINAL_POSITION")
+
+
+def _explain_columns(rows) -> dict:
+    """Column definitions from the rows of EXPLAIN table, see describe()"""
+    return {field[0] : {"Field" : field[0],
+            "Type" : _text(field[1]).upper(),
+            "Null" : field[2],
+            "Key" : field[3],
+            "Default" : field[4],
+            "Extra" : field[5]} for field in rows}
+
+
+def _schema_tables(rows) -> dict:
+    """{table : column definitions} from the rows of SCHEMA_SQL"""
+    tables = {}
+    for field in rows:
+        tables.setdefault(_text(field[0]), {})[_text(field[1])] = {"Field" : _text(field[1]),
+                                                                  "Type" : _text(field[2]).upper(),
+                                                                  "Null" : _text(field[3]),
+                                                                  "Key" : _text(field[4]),
+                                                                  "Default" : field[5],
+                                                                  "Extra" : _text(field[6])}
+    return tables
+
+# mysql field types of result columns, see cursor.description
+INTEGER_FIELD_TYPES = {FieldType.TINY, FieldType.SHORT, FieldType.LONG, FieldType.LONGLONG, FieldType.INT24, FieldType.YEAR}
+FLOAT_FIELD_TYPES = {FieldType.FLOAT, FieldType.DOUBLE}
+DECIMAL_FIELD_TYPES = {FieldType.DECIMAL, FieldType.NEWDECIMAL}
+DATETIME_FIELD_TYPES = {FieldType.DATETIME, FieldType.TIMESTAMP, FieldType.DATE, FieldType.NEWDATE}
+
+
+def _column_array(values : tuple, type_code : int, flags : int = 0, boolean : bool = False, decimal_as_float : bool = False):
+    """
+    Typed array for one result column, picked from its mysql field type:
+    integers as int64 (uint64 for unsigned BIGINT, nullable Int64 with NULLs), TINYINT(1) as boolean,
+    FLOAT/DOUBLE as float64, DATE/DATETIME/TIMESTAMP as datetime64, TIME as timedelta64, anything else as object.
+    DECIMAL stays exact, as decimal.Decimal objects, unless decimal_as_float.
+    """
+
+    has_nulls = None in values
+
+    if type_code in INTEGER_FIELD_TYPES:
+        if boolean:
+            return pd.array(values, dtype="boolean") if has_nulls else np.array(values, dtype=bool)
+        if has_nulls:
+            return pd.array(values, dtype="UInt64" if flags & FieldFlag.UNSIGNED and type_code == FieldType.LONGLONG else "Int64")
+        if flags & FieldFlag.UNSIGNED and type_code == FieldType.LONGLONG:
+            return np.array(values, dtype=np.uint64)
+        return np.array(values, dtype=np.int64)
+    if type_code in FLOAT_FIELD_TYPES or (decimal_as_float and type_code in DECIMAL_FIELD_TYPES):
+        return np.array(values, dtype=np.float64)
+    if type_code in DATETIME_FIELD_TYPES:
+        return np.array(values, dtype="datetime64[us]")
+    if type_code == FieldType.TIME:
+        return np.array(values, dtype="timedelta64[us]")
+
+    array = np.empty(len(values), dtype=object)
+    array[:] = values
+    return array
+
+
+ARROW_BATCH_ROWS = 65536
+BINARY_CHARSET = 63
+# widest decimal128, wider DECIMAL columns (mysql allows 65 digits) get a decimal256
+ARROW_DECIMAL_PRECISION = 38
+# scale of a computed DECIMAL column when the first batch has no value to read it from
+ARROW_DECIMAL_SCALE = 10
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError("pyarrow is required for arrow and parquet output, install it with pip install mysql_wrap[arrow]")
+    return pyarrow
+
+
+def _arrow_type(pa, field, boolean : bool = False, declared : str = None, values=()):
+    """
+    Arrow type for a result column, from its mysql field type.
+    declared is the column type in the table definition and values the first fetched values of the column,
+    both only used for the precision and scale of DECIMAL columns when the description doesn´t have them.
+    """
+
+    type_code, flags = field[1], field[7] if len(field) > 7 else 0
+    charset = field[8] if len(field) > 8 else None
+    unsigned = bool(flags & FieldFlag.UNSIGNED)
+
+    if boolean:
+        return pa.bool_()
+    if type_code in (FieldType.TINY, FieldType.SHORT, FieldType.INT24, FieldType.LONG, FieldType.LONGLONG):
+        bits = {FieldType.TINY : 8, FieldType.SHORT : 16, FieldType.INT24 : 32, FieldType.LONG : 32, FieldType.LONGLONG : 64}[type_code]
+        return getattr(pa, ("uint%s" if unsigned else "int%s") % bits)()
+    if type_code == FieldType.YEAR:
+        return pa.int16()
+    if type_code == FieldType.BIT:
+        return pa.int64()
+    if type_code == FieldType.FLOAT:
+        return pa.float32()
+    if type_code in FLOAT_FIELD_TYPES:
+        return pa.float64()
+    if type_code in DECIMAL_FIELD_TYPES:
+        return _arrow_decimal(pa, field, declared, values)
+    if type_code in (FieldType.DATETIME, FieldType.TIMESTAMP):
+        return pa.timestamp("us")
+    if type_code in (FieldType.DATE, FieldType.NEWDATE):
+        return pa.date32()
+    if type_code == FieldType.TIME:
+        return pa.duration("us")
+    if type_code == FieldType.NULL:
+        return pa.null()
+    # JSON is reported with the binary charset, but it is text
+    if type_code == FieldType.JSON:
+        return pa.string()
+    if charset == BINARY_CHARSET or type_code == FieldType.GEOMETRY:
+        return pa.binary()
+    return pa.string()
+
+
+def _arrow_decimal(pa, field, declared : str = None, values=()):
+    """
+    decimal128 type of a DECIMAL column. The connector leaves precision and scale out of the cursor description,
+    so they come from the table definition, or for computed columns the widest precision
+    with the scale of the fetched values (mysql gives every value of a result column the same scale)
+    """
+
+    precision, scale = (field[4], field[5]) if len(field) > 5 else (None, None)
+    if precision is None or scale is None:
+        base, arguments, _ = _parse_datatype(declared)
+        if base == "DECIMAL":
+            # DECIMAL alone is DECIMAL(10,0)
+            precision, scale = (arguments + (10,))[0], (arguments[1:] + (0,))[0]
+        else:
+            values = [value for value in values if value is not None]
+            precision = ARROW_DECIMAL_PRECISION
+            scale = _decimal_precision_scale(pd.Series(values, dtype=object))[1] if values else ARROW_DECIMAL_SCALE
+
+    if precision > ARROW_DECIMAL_PRECISION:
+        return pa.decimal256(precision, scale)
+    return pa.decimal128(precision, scale)
+
+
+def _arrow_schema(pa, description, columns : dict = None, rows=()):
+    """
+    Arrow schema of a result, columns is the table definition (see describe()) for the TINYINT(1)
+    and DECIMAL columns, rows the first fetched batch for computed DECIMAL columns
+    """
+
+    columns = columns or {}
+    boolean_columns = _boolean_names(columns)
+    values = list(zip(*rows)) if rows else [()] * len(description)
+
+    return pa.schema([pa.field(field[0], _arrow_type(pa, field, field[0] in boolean_columns,
+                                                     columns.get(field[0], {}).get("Type"), column_values))
+                      for field, column_values in zip(description, values)])
+
+
+def _arrow_batch(pa, rows, description, schema):
+    """Build an arrow RecordBatch column by column from fetched row tuples"""
+
+    columns = list(zip(*rows)) if rows else [()] * len(description)
+    arrays = []
+    for values, field, arrow_field in zip(columns, description, schema):
+        flags = field[7] if len(field) > 7 else 0
+        if pa.types.is_boolean(arrow_field.type):
+            arrays.append(pa.array([None if value is None else bool(value) for value in values], type=arrow_field.type))
+        elif flags & FieldFlag.SET:
+            # the connector turns SET values into python sets, back to mysql´s comma separated text
+            arrays.append(pa.array([None if value is None else ",".join(sorted(value)) for value in values],
+                                   type=arrow_field.type))
+        else:
+            arrays.append(pa.array(values, type=arrow_field.type))
+
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def _boolean_names(columns : dict) -> set:
+    """Names of the TINYINT(1) columns in a table definition, see describe()"""
+    return {name for name, column in columns.items() if column["Type"] in ("TINYINT(1)", "BOOL", "BOOLEAN")}
+
+
+def _columns_from_rows(rows, description, boolean_columns=(), decimal_as_float : bool = False) -> list:
+    """Transpose fetched row tuples into one typed array per column"""
+
+    columns = list(zip(*rows)) if rows else [()] * len(description)
+
+    return [_column_array(values, field[1], field[7] if len(field) > 7 else 0, field[0] in boolean_columns, decimal_as_float)
+            for values, field in zip(columns, description)]
+
+
+
+def _chain_first(first, rest):
+    yield first
+    yield from rest
+
+
+def _estimate_row_size(row) -> int:
+    """Rough size of a row once escaped into an INSERT statement"""
+    size = 3
+    for value in row:
+        if value is None:
+            size += 5
+        elif isinstance(value, (bytes, str)):
+            size += len(value) + 3
+        else:
+            size += len(str(value)) + 1
+    return size
+
+
+def _nan_to_none(data : pd.DataFrame) -> pd.DataFrame:
+    return data.astype(object).where(data.notna(), None)
+
+
+def _iter_frame_values(data : pd.DataFrame, slice_rows : int = FRAME_SLICE_ROWS):
+    """Yield the rows of a DataFrame as tuples, NaN replaced by None, converting one slice at a time"""
+    for start in range(0, len(data), slice_rows):
+        yield from _nan_to_none(data.iloc[start:start + slice_rows]).itertuples(index=False, name=None)
+
+
+INFILE_CHUNK_ROWS = 100000
+INFILE_NULL = "\\N"
+
+
+def _infile_value(value) -> str:
+    """Text for a single value of an object column in a LOAD DATA file"""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    if isinstance(value, (bool, np.bool_)):
+        return "1" if value else "0"
+    if isinstance(value, (bytes, bytearray)):
+        return value.decode("utf-8", "replace")
+    if isinstance(value, pd.Timestamp):
+        return value.strftime("%Y-%m-%d %H:%M:%S.%f")
+    return str(value)
+
 
-def getDataTypefromDType(DType : str) -> str:
-    if isinstance(DType, str):
-        DType = DType.lower()
+def _infile_hex(value) -> str:
+    """Hex of a value of a binary column in a LOAD DATA file, text as its utf-8 bytes"""
+    return (value if isinstance(value, (bytes, bytearray)) else str(value).encode("utf-8")).hex()
 
-    for datatype, dtypes in DTypeDict.items():
-        if DType in dtypes:
-            return datatype
-    return "VARCHAR"
 
-DataTypeLength = {
-    "VARCHAR" : "255",
-    "TINYINT" : "1"
-}
+def _infile_binary(column : pd.Series) -> bool:
+    """Whether a column holds bytes, sent as hex and decoded by UNHEX() so that any byte gets through the text file"""
+    return column.dtype == object and bool(set(column.dropna().map(type)) & {bytes, bytearray})
+
+
+def _infile_column(column : pd.Series, binary : bool = False) -> pd.Series:
+    """Encode a column as LOAD DATA text: tab separated fields, backslash escapes and \\N for NULL"""
+
+    nulls = column.isna()
+
+    if binary:
+        text = column.map(_infile_hex, na_action="ignore")
+    elif pd.api.types.is_bool_dtype(column.dtype):
+        text = column.map({True : "1", False : "0"})
+    elif pd.api.types.is_datetime64_any_dtype(column.dtype):
+        text = column.dt.strftime("%Y-%m-%d %H:%M:%S.%f")
+    elif pd.api.types.is_numeric_dtype(column.dtype):
+        text = column.astype(str)
+    else:
+        text = column.map(_infile_value, na_action="ignore").astype(object)
+        text = text.where(nulls, text.str.replace("\\", "\\\\", regex=False)
+                                    .str.replace("\t", "\\t", regex=False)
+                                    .str.replace("\n", "\\n", regex=False)
+                                    .str.replace("\r", "\\r", regex=False))
+
+    return text.astype(object).where(~nulls, INFILE_NULL)
+
+
+def _infile_text(data : pd.DataFrame, binary=()) -> str:
+    """A slice of the frame as the text of a LOAD DATA file, the columns at the binary positions as hex"""
+    columns = [_infile_column(data.iloc[:, position], position in binary) for position in range(data.shape[1])]
+    lines = columns[0].str.cat(columns[1:], sep="\t") if len(columns) > 1 else columns[0]
+    return "\n".join(lines) + "\n"
+
+
+def _upsert_result(rowcount : int, rows : int, existing : int = None) -> dict:
+    """
+    Split the affected rows of INSERT ... ON DUPLICATE KEY UPDATE:
+    mysql counts 1 for an inserted row, 2 for an updated row, 0 for a row updated to its current values.
+    """
+    result = {"rowcount" : rowcount, "rows" : rows, "inserted" : None, "updated" : None, "unchanged" : None}
+    if existing is not None:
+        inserted = max(rows - existing, 0)
+        updated = max((rowcount - inserted) // 2, 0)
+        result.update(inserted=inserted, updated=updated, unchanged=max(existing - updated, 0))
+    return result
+
+
+def _staging_statements(table : str, columns : list, key_field : str):
+    """
+    (staging table, {name : sql}) of an update through a temporary staging table, see _update_from_staging():
+    drop and create the staging table, update the matching rows of table, insert the missing ones
+    """
+
+    staging = "_staging_%s" % setMySqlFieldName(table)
+    update_columns = [column for column in columns if column != key_field] or [key_field]
+
+    return staging, {
+        "drop" : "DROP TEMPORARY TABLE IF EXISTS %s" % staging,
+        "create" : "CREATE TEMPORARY TABLE %s (INDEX (%s)) SELECT %s FROM %s LIMIT 0" % (
+            staging, key_field, ",".join(columns), table),
+        "update" : "UPDATE %s t JOIN %s s ON t.%s = s.%s SET %s" % (
+            table, staging, key_field, key_field, ",".join("t.{0} = s.{0}".format(column) for column in update_columns)),
+        "insert" : "INSERT INTO %s (%s) SELECT %s FROM %s s LEFT JOIN %s t ON t.%s = s.%s WHERE t.%s IS NULL" % (
+            table, ",".join(columns), ",".join("s." + column for column in columns),
+            staging, table, key_field, key_field, key_field)}
+
+
+# delta sync, see syncFromDataFrame()
+FINGERPRINT_NULL = "\x00"
+FINGERPRINT_SEPARATOR = "\x1f"
+DELETE_CHUNK_KEYS = 1000
+
+
+def _float_text(value, single : bool = False) -> str:
+    """A float as mysql casts it to text, shortest round trip digits without a trailing .0, eg 1e20 and not 1e+20"""
+    text = str(np.float32(value)) if single else repr(float(value))
+    mantissa, exponent, power = text.partition("e")
+    if mantissa.endswith(".0"):
+        mantissa = mantissa[:-2]
+    return mantissa + exponent + (str(int(power)) if exponent else "")
+
+
+def _fingerprint_column(column : pd.Series, datatype : str) -> pd.Series:
+    """
+    The values of a frame column as the text the server gives for them once stored in a column of datatype,
+    NULL as FINGERPRINT_NULL. A value rendered differently only makes its row look changed.
+    """
+
+    base, arguments, _ = _parse_datatype(datatype)
+    nulls = column.isna().to_numpy()
+    values = column[~nulls]
+
+    if base in INTEGER_RANK or base in ("BOOL", "BOOLEAN", "YEAR"):
+        if pd.api.types.is_numeric_dtype(values.dtype):
+            text = values.astype("int64").astype(str)
+        else:
+            text = values.map(lambda value : str(int(value)))
+    elif base in ("DOUBLE", "REAL", "FLOAT"):
+        text = values.map(lambda value : _float_text(value, single=base == "FLOAT"))
+    elif base in ("DECIMAL", "NUMERIC"):
+        scale = arguments[1] if len(arguments) > 1 else 0
+        text = values.map(lambda value : format(decimal.Decimal(str(value)) if isinstance(value, float) else value,
+                                                ".%df" % scale))
+    elif base in ("DATETIME", "TIMESTAMP", "DATE"):
+        stamps = pd.to_datetime(values)
+        text = stamps.dt.strftime("%Y-%m-%d" if base == "DATE" else "%Y-%m-%d %H:%M:%S")
+        if base != "DATE" and arguments and arguments[0]:
+            text = text + "." + stamps.dt.strftime("%f").str[:arguments[0]]
+    else:
+        text = values.map(_infile_value)
+
+    # not np.full, it goes through a numpy string which drops the NUL
+    result = np.empty(len(column), dtype=object)
+    result[:] = FINGERPRINT_NULL
+    result[~nulls] = text.to_numpy(dtype=object)
+    return pd.Series(result, index=column.index)
+
+
+def _row_fingerprints(data : pd.DataFrame, datatypes) -> np.ndarray:
+    """Per row hash of the frame, matching the server side one of _fingerprint_sql() for columns of the given types"""
+
+    if not data.shape[1]:
+        return np.full(len(data), hashlib.md5(b"").hexdigest()[:16], dtype=object)
+
+    columns = [_fingerprint_column(data.iloc[:, position], datatype) for position, datatype in enumerate(datatypes)]
+    lines = columns[0].str.cat(columns[1:], sep=FINGERPRINT_SEPARATOR) if len(columns) > 1 else columns[0]
+    return np.array([hashlib.md5(line.encode("utf-8")).hexdigest()[:16] for line in lines], dtype=object)
+
+
+def _fingerprint_sql(table : str, key_field : str, columns) -> str:
+    """Key and hash of the given columns of every row of table, computed by the server"""
+    values = "CONCAT_WS(CHAR(31), %s)" % ",".join("IFNULL(%s, CHAR(0))" % column for column in columns) if columns else "''"
+    return "SELECT %s, LEFT(MD5(%s), 16) FROM %s" % (key_field, values, table)
+
+
+COPY_CHUNK_ROWS = 10000
+
+
+# online schema changes, see syncColumns()
+# ER_ALTER_OPERATION_NOT_SUPPORTED, ER_ALTER_OPERATION_NOT_SUPPORTED_REASON
+ONLINE_DDL_REFUSED = (1845, 1846)
+
+
+def _inplace_change(old : str, new : str) -> bool:
+    """
+    Whether a column type change can run INPLACE without a copy of the table: only widening a VARCHAR
+    as long as its length prefix stays the same size, 1 byte up to 255 bytes, 2 bytes above (4 bytes per character)
+    """
+    old_base, old_arguments, _ = _parse_datatype(old)
+    new_base, new_arguments, _ = _parse_datatype(new)
+    if old_base != new_base or old_base not in ("VARCHAR", "VARBINARY") or not old_arguments or not new_arguments:
+        return False
+    width = 1 if old_base == "VARBINARY" else 4
+    return new_arguments[0] >= old_arguments[0] and (old_arguments[0] * width > 255) == (new_arguments[0] * width > 255)
+
+
+PARALLEL_BARRIER_TIMEOUT = 600
+
+
+# pandas aggregation names, and the mysql expression of each
+AGGREGATES = {"sum" : "SUM(%s)",
+              "min" : "MIN(%s)",
+              "max" : "MAX(%s)",
+              "mean" : "AVG(%s)",
+              "count" : "COUNT(%s)",
+              "nunique" : "COUNT(DISTINCT %s)",
+              "size" : "COUNT(*)",
+              "std" : "STDDEV_SAMP(%s)",
+              "var" : "VAR_SAMP(%s)"}
+
+
+def _aggregate_columns(aggs : dict) -> list:
+    """
+    (name, expression) of the aggregated columns of getAggregate(), from
+    {"col" : "sum"} named col, {"col" : ["sum", "max"]} named col_sum and col_max, or {"name" : ("col", "sum")}
+    """
+    columns = []
+    for name, spec in aggs.items():
+        if isinstance(spec, tuple):
+            column, functions, names = spec[0], [spec[1]], [name]
+        elif isinstance(spec, str):
+            column, functions, names = name, [spec], [name]
+        else:
+            column, functions = name, list(spec)
+            names = ["%s_%s" % (name, function) for function in functions]
+
+        for function, alias in zip(functions, names):
+            template = AGGREGATES.get(str(function).lower())
+            if template is None:
+                raise ValueError("unknown aggregate {0}, use one of {1}".format(function, ", ".join(AGGREGATES)))
+            expression = template % ("`%s`" % column) if "%s" in template else template
+            columns.append((alias, expression))
+    return columns
+
+
+def _partition_frame(data : pd.DataFrame, partitions : int, key_fields=None) -> list:
+    """
+    Split a DataFrame in partitions, by contiguous row ranges, or by a hash of the key columns
+    so that all the rows of a key end up in the same partition.
+    """
+    if not key_fields:
+        bounds = np.linspace(0, len(data), partitions + 1).astype(int)
+        return [data.iloc[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+
+    codes = pd.util.hash_pandas_object(data[key_fields], index=False).to_numpy() % partitions
+    return [data[codes == partition] for partition in range(partitions)]
+
+
+def _range_bounds(low, high, slices : int) -> list:
+    """Up to slices + 1 increasing bounds splitting [low, high] in even ranges, for integers, datetimes or dates"""
+    if isinstance(low, (int, np.integer)):
+        bounds = [int(low) + (int(high) - int(low)) * index // slices for index in range(slices + 1)]
+    elif isinstance(low, datetime.datetime):
+        bounds = [low + (high - low) * index // slices for index in range(slices + 1)]
+    else:
+        # whole days, a DATE column has nothing in between
+        bounds = [low + datetime.timedelta(days=(high - low).days * index // slices) for index in range(slices + 1)]
+    # narrow ranges give the same bound more than once
+    return list(OrderedDict.fromkeys(bounds))
+
+
+def _read_partition(wrap, conf, table, fields, where, order) -> pd.DataFrame:
+    """Read one key range of a parallel getTable(), runs in a worker thread or process"""
+    owned = wrap is None
+    try:
+        if owned:
+            wrap = MysqlWrap(**conf)
+        return wrap.getTable(table, fields, where, order)
+    finally:
+        if owned and wrap is not None:
+            wrap.end()
+
+
+def _write_partition(wrap, conf, partition, table, data, mode, key_field, chunk_rows, chunk_bytes, commit_every,
+                     barrier=None, failed=None):
+    """
+    Write one partition of writeParallel() on its own connection.
+    wrap is a MysqlWrap to share (pooled, threads), or None to open one from conf (processes).
+    With a barrier, the partition is committed only once every partition is written and none failed.
+    """
+
+    started = time.perf_counter()
+    result = {"partition" : partition, "rows" : len(data), "rowcount" : 0, "committed" : False, "error" : None,
+              "write_seconds" : 0.0, "wait_seconds" : 0.0, "commit_seconds" : 0.0}
+
+    owned = wrap is None
+    try:
+        if owned:
+            wrap = MysqlWrap(**conf)
+        with wrap.connection():
+            try:
+                if mode == "upsert":
+                    counts = wrap._upsert_chunks(table, list(data.keys()), _iter_frame_values(data), key_field,
+                                                 chunk_rows, chunk_bytes, commit_every)
+                    result.update(counts)
+                else:
+                    result["rowcount"] = wrap._insert_chunks(table, list(data.keys()), _iter_frame_values(data),
+                                                             chunk_rows, chunk_bytes, commit_every)
+            except Exception as e:
+                result["error"] = e
+                if failed is not None:
+                    failed.set()
+            written = time.perf_counter()
+            result["write_seconds"] = written - started
+
+            if barrier is not None:
+                try:
+                    barrier.wait(PARALLEL_BARRIER_TIMEOUT)
+                except threading.BrokenBarrierError:
+                    failed.set()
+                result["wait_seconds"] = time.perf_counter() - written
+
+            if result["error"] is not None or (failed is not None and failed.is_set()):
+                wrap.rollback()
+            else:
+                committing = time.perf_counter()
+                wrap.commit()
+                result["committed"] = True
+                result["commit_seconds"] = time.perf_counter() - committing
+    except Exception as e:
+        # connecting or committing failed, the other partitions can´t wait for this one anymore
+        if result["error"] is None:
+            result["error"] = e
+        if barrier is not None:
+            failed.set()
+            barrier.abort()
+    finally:
+        if owned and wrap is not None:
+            wrap.end()
+
+    return result
 
 
 def setMySqlFieldName(name : str) -> str:
@@ -93,8 +1002,11 @@ class ConnectionOptions(dict):
 	passwd="password",
 	keep_alive=True # try and reconnect timedout mysql connections?
             )
+    set pool_size to share a pool of connections between threads, see MysqlWrap.connection()
         """
-    def __init__(self, db, user, passwd , host = "localhost", port = 3306, charset = "utf8", keep_alive = True, ssl = False, autocommit = False ):
+    def __init__(self, db, user, passwd , host = "localhost", port = 3306, charset = "utf8", keep_alive = True, ssl = False, autocommit = False,
+                 pool_size = None, pool_max_overflow = 0, pool_max_idle = None, pool_timeout = None,
+                 allow_local_infile = False ):
         self['db'] = db
         self['user'] = user
         self['passwd'] = passwd
@@ -104,12 +1016,20 @@ class ConnectionOptions(dict):
         self['keep_alive'] = keep_alive
         self['ssl'] = ssl
         self['autocommit'] = autocommit
+        self['pool_size'] = pool_size
+        self['pool_max_overflow'] = pool_max_overflow
+        self['pool_max_idle'] = pool_max_idle
+        self['pool_timeout'] = pool_timeout
+        self['allow_local_infile'] = allow_local_infile
 
 
 class MysqlWrap:
-    conn = None
-    cur = None
     conf = None
+    pool = None
+    schema_cache = None
+    result_cache = None
+    instrumentation = None
+    replicas = None
 
     def __init__(self, **kwargs):
         """ db = MysqlWrap(
@@ -119,6 +1039,44 @@ class MysqlWrap:
 	        passwd="password",
 	        keep_alive=True # try and reconnect timedout mysql connections?
             )
+
+            pooled mode, for sharing the wrapper between threads:
+            pool_size = (int) connections kept in the pool
+            pool_max_overflow = (int) extra connections opened under load
+            pool_max_idle = (int) max idle connections kept open
+            pool_timeout = (float) seconds to wait for a free connection
+
+            allow_local_infile = (bool) enable LOAD DATA LOCAL INFILE, needed by loadDataFrame()
+
+            prepared_statements = (bool) run insert, update, delete, getOne and getAll as server side prepared statements
+            prepared_cache_size = (int) max prepared statements kept open per connection
+
+            table definitions cache, for describe() and tableExist():
+            schema_cache_ttl = (float) seconds table definitions are cached for, None disables the cache
+            schema_cache_preload = (bool) load all the table definitions of the database at startup
+            schema_cache = (TTLCache) a cache to share between wrappers, instead of schema_cache_ttl
+
+            results cache, for getOne(), getAll() and getTable():
+            result_cache_ttl = (float) seconds results are cached for, None disables the cache
+            result_cache_size = (int) max number of results kept, least recently used are dropped first
+            result_cache_copy = (bool) return a copy of the cached result on every read. If False every read shares
+                                the same object, which must not be modified
+            result_cache = (TTLCache) a cache to share between wrappers, instead of result_cache_ttl
+
+            decimal_as_float = (bool) return DECIMAL columns of getTable() and getAll(as_array=True) as float64,
+                               instead of exact decimal.Decimal objects
+
+            instrumentation = (Instrumentation) collects timings of every query and DataFrame method, see instrumentation.py
+
+            read replicas, for getOne(), getAll(), getTable(), iterTable(), iterRows(), leftJoin() and describe():
+            replicas = list of replicas, "host", "host:port" or dicts of connection options overriding the primary ones.
+                       Reads inside a transaction, or with uncommitted writes, stay on the primary
+            replica_balance = "round_robin", or "latency" to read from the replica with the fastest health checks
+            replica_max_lag = (float) evict replicas lagging behind the primary more than this many seconds,
+                              checked with SHOW REPLICA STATUS (needs the REPLICATION CLIENT privilege). None skips the check
+            replica_check_interval = (float) seconds between the health checks of a replica
+            replica_retry = (float) seconds an evicted replica waits before it is checked again
+            read_your_writes = (float) seconds reads stay on the primary after a write or commit, None to always use the replicas
         """
         self.conf = kwargs
         self.conf["keep_alive"] = kwargs.get("keep_alive", False)
@@ -127,29 +1085,235 @@ class MysqlWrap:
         self.conf["port"] = kwargs.get("port", 3306)
         self.conf["autocommit"] = kwargs.get("autocommit", False)
         self.conf["ssl"] = kwargs.get("ssl", False)
+        self.conf["pool_size"] = kwargs.get("pool_size", None)
+        self.conf["pool_max_overflow"] = kwargs.get("pool_max_overflow", 0)
+        self.conf["pool_max_idle"] = kwargs.get("pool_max_idle", None)
+        self.conf["pool_timeout"] = kwargs.get("pool_timeout", None)
+        self.conf["allow_local_infile"] = kwargs.get("allow_local_infile", False)
+        self.conf["prepared_statements"] = kwargs.get("prepared_statements", False)
+        self.conf["prepared_cache_size"] = kwargs.get("prepared_cache_size", 64)
+        self.conf["schema_cache_ttl"] = kwargs.get("schema_cache_ttl", None)
+        self.conf["schema_cache_preload"] = kwargs.get("schema_cache_preload", False)
+        self.schema_cache = kwargs.get("schema_cache", None)
+        if self.schema_cache is None and self.conf["schema_cache_ttl"] is not None:
+            self.schema_cache = TTLCache(ttl=self.conf["schema_cache_ttl"])
+        self.conf["result_cache_ttl"] = kwargs.get("result_cache_ttl", None)
+        self.conf["result_cache_size"] = kwargs.get("result_cache_size", RESULT_CACHE_SIZE)
+        self.conf["result_cache_copy"] = kwargs.get("result_cache_copy", True)
+        self.conf["decimal_as_float"] = kwargs.get("decimal_as_float", False)
+        self.result_cache = kwargs.get("result_cache", None)
+        if self.result_cache is None and self.conf["result_cache_ttl"] is not None:
+            self.result_cache = TTLCache(ttl=self.conf["result_cache_ttl"], max_size=self.conf["result_cache_size"])
+        self.instrumentation = kwargs.get("instrumentation", None)
+        self.conf["replicas"] = kwargs.get("replicas", None)
+        self.conf["replica_balance"] = kwargs.get("replica_balance", "round_robin")
+        self.conf["replica_max_lag"] = kwargs.get("replica_max_lag", None)
+        self.conf["replica_check_interval"] = kwargs.get("replica_check_interval", CHECK_INTERVAL)
+        self.conf["replica_retry"] = kwargs.get("replica_retry", RETRY_AFTER)
+        self.conf["read_your_writes"] = kwargs.get("read_your_writes", None)
+        self._last_write = None
+        self._conn = None
+        self._cur = None
+        self._local = threading.local()
+        self._sql_cache = TTLCache(max_size=SQL_CACHE_SIZE)
+        self._prepared = weakref.WeakKeyDictionary()
+        self._prepared_lock = threading.Lock()
         self.connect()
 
+        if self.conf["replicas"]:
+            # replicas only serve reads, autocommit keeps them from holding a stale snapshot between reads
+            self.replicas = ReplicaSet(lambda endpoint : self._new_connection(dict(endpoint, autocommit=True)),
+                                       self.conf["replicas"],
+                                       balance=self.conf["replica_balance"],
+                                       max_lag=self.conf["replica_max_lag"],
+                                       check_interval=self.conf["replica_check_interval"],
+                                       retry_after=self.conf["replica_retry"],
+                                       pool_size=self.conf["pool_size"] or 1,
+                                       pool_max_overflow=self.conf["pool_max_overflow"],
+                                       pool_timeout=self.conf["pool_timeout"])
+
+        if self.schema_cache is not None and self.conf["schema_cache_preload"]:
+            self.loadSchema()
+
+    @property
+    def conn(self):
+        """The connection used by the calling thread. In pooled mode None when no connection is checked out"""
+        if self.pool is None:
+            return self._conn
+        return getattr(self._local, "conn", None)
+
+    @conn.setter
+    def conn(self, value):
+        self._conn = value
+
+    @property
+    def cur(self):
+        """The last cursor used by the calling thread"""
+        return getattr(self._local, "cur", None) or self._cur
+
+    @cur.setter
+    def cur(self, value):
+        self._cur = value
+
     def connect(self):
-        """Connect to the mysql server"""
+        """Connect to the mysql server, or set up the connection pool if pool_size is set"""
+
+        if self.conf["pool_size"]:
+            if self.pool is None or self.pool.closed:
+                self.pool = ConnectionPool(self._new_connection,
+                                           size=self.conf["pool_size"],
+                                           max_overflow=self.conf["pool_max_overflow"],
+                                           max_idle=self.conf["pool_max_idle"],
+                                           timeout=self.conf["pool_timeout"])
+                # open one connection straight away, so bad credentials fail here as before
+                with self.connection():
+                    pass
+            return
+
+        self.conn = self._new_connection()
+        self.cur = self.conn.cursor()
+        self._local.cur = None
 
+    def _new_connection(self, endpoint : dict = None):
+        """Open a new connection using the wrapper configuration, or to a replica endpoint overriding parts of it"""
+
+        conf = self.conf if endpoint is None else dict(self.conf, **endpoint)
         try:
-            if not self.conf["ssl"]:
-                self.conn = mysql.connect(db=self.conf['db'], host=self.conf['host'],
-                                          port=self.conf['port'], user=self.conf['user'],
-                                          passwd=self.conf['passwd'],
-                                          charset=self.conf['charset'])
+            if not conf["ssl"]:
+                conn = mysql.connect(db=conf['db'], host=conf['host'],
+                                          port=conf['port'], user=conf['user'],
+                                          passwd=conf['passwd'],
+                                          allow_local_infile=conf['allow_local_infile'],
+                                          charset=conf['charset'])
             else:
-                self.conn = mysql.connect(db=self.conf['db'], host=self.conf['host'],
-                                          port=self.conf['port'], user=self.conf['user'],
-                                          passwd=self.conf['passwd'],
-                                          ssl=self.conf['ssl'],
-                                          charset=self.conf['charset'])
-            self.cur = self.conn.cursor()
-            self.conn.autocommit = self.conf["autocommit"]
+                conn = mysql.connect(db=conf['db'], host=conf['host'],
+                                          port=conf['port'], user=conf['user'],
+                                          passwd=conf['passwd'],
+                                          ssl=conf['ssl'],
+                                          allow_local_infile=conf['allow_local_infile'],
+                                          charset=conf['charset'])
+            conn.autocommit = conf["autocommit"]
         except:
-            print("MySQL connection failed")
+            logger.exception("MySQL connection failed")
             raise
 
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """
+        Hold one connection for the duration of a with block, eg:
+
+            with db.connection():
+                db.insert("books", {"name": "Time Machine"})
+                db.commit()
+
+        In pooled mode every query outside such a block checks out a connection for that call only.
+        A connection with uncommitted writes stays with the calling thread until commit() or rollback().
+        Without a pool this just yields the single connection.
+        """
+
+        # a read routed to a replica, see _read()
+        replica = getattr(self._local, "replica", None)
+        if replica is not None:
+            yield replica
+            return
+
+        if self.pool is None:
+            yield self.conn
+            return
+
+        local = self._local
+        if getattr(local, "conn", None) is None:
+            local.conn = self.pool.checkout()
+            local.dirty = False
+            local.depth = 0
+        local.depth += 1
+        try:
+            yield local.conn
+        finally:
+            local.depth -= 1
+            if local.depth == 0 and not local.dirty:
+                self._release()
+
+    def _release(self, broken : bool = False):
+        """Give the connection bound to this thread back to the pool"""
+        local = self._local
+        conn = getattr(local, "conn", None)
+        if conn is None:
+            return
+        local.conn = None
+        local.dirty = False
+        if broken:
+            self.pool.discard(conn)
+        else:
+            self.pool.checkin(conn)
+
+    @contextmanager
+    def transaction(self, commit_every : int = None, commit_seconds : float = None):
+        """
+        Run a block of queries as a transaction, committed when the block ends, rolled back if it raises, eg:
+
+            with db.transaction():
+                db.insert("books", {"name": "Time Machine"})
+                with db.transaction():      # nested blocks are savepoints
+                    db.update("authors", {"books": 1}, ("name=%s", ["Wells"]))
+
+        For long streams of writes, the transaction can be committed along the way:
+            commit_every = (int) commit after every N write statements
+            commit_seconds = (float) commit at the first write statement N seconds after the last commit
+        An error then only rolls back the statements since the last commit. The policy is paused while a nested block is open,
+        a commit would release its savepoint. Holds one connection for the whole block, see connection().
+        """
+
+        with self.connection() as conn:
+            scope = getattr(self._local, "scope", None)
+
+            if scope is not None:
+                savepoint = "mysql_wrap_sp%d" % scope["depth"]
+                self._execute(conn, "SAVEPOINT %s" % savepoint)
+                scope["depth"] += 1
+                try:
+                    yield self
+                except BaseException:
+                    self._execute(conn, "ROLLBACK TO SAVEPOINT %s" % savepoint)
+                    raise
+                else:
+                    self._execute(conn, "RELEASE SAVEPOINT %s" % savepoint)
+                finally:
+                    scope["depth"] -= 1
+                return
+
+            if self.conf["autocommit"] and not conn.in_transaction:
+                conn.start_transaction()
+            self._local.scope = {"depth" : 1, "commit_every" : commit_every, "commit_seconds" : commit_seconds,
+                                 "statements" : 0, "committed_at" : time.monotonic()}
+            try:
+                yield self
+            except BaseException:
+                self.rollback()
+                raise
+            else:
+                self.commit()
+            finally:
+                self._local.scope = None
+
+    def _scope_statement(self, conn, scope):
+        """Count a write statement of a transaction() block, committing it when its policy says so"""
+
+        scope["statements"] += 1
+        if scope["depth"] > 1:
+            return
+        if (scope["commit_every"] and scope["statements"] >= scope["commit_every"]) or \
+                (scope["commit_seconds"] is not None and time.monotonic() - scope["committed_at"] >= scope["commit_seconds"]):
+            conn.commit()
+            scope["statements"] = 0
+            scope["committed_at"] = time.monotonic()
+            if self.pool is not None:
+                self._local.dirty = False
+            if self.conf["autocommit"]:
+                conn.start_transaction()
+
     def getOne(self, table=None, fields='*', where=None, order=None, limit=(0, 1)):
         """Get a single result
 
@@ -161,17 +1325,22 @@ class MysqlWrap:
             limit = [from, to]
         """
 
-        cur = self._select(table, fields, where, order, limit)
-        result = cur.fetchone()
+        def load():
+            with self.connection():
+                cur = self._select(table, fields, where, order, limit)
+                # fetch everything, a prepared statement cursor can´t leave rows unread
+                result = cur.fetchall()
 
-        row = None
-        if result:
-            fields = [f[0] for f in cur.description]
-            row = zip(fields, result)
+            row = None
+            if result:
+                names = [f[0] for f in cur.description]
+                row = zip(names, result[0])
+
+            return dict(row) if row is not None else None
 
-        return dict(row)
+        return self._cached_result("one", table, (fields, where, order, limit), load)
 
-    def getAll(self, table=None, fields='*', where=None, order=None, limit=None):
+    def getAll(self, table=None, fields='*', where=None, order=None, limit=None, as_array : bool = False):
         """Get all results
 
             table = (str) table_name
@@ -180,17 +1349,25 @@ class MysqlWrap:
                     eg: ("id=%s and name=%s", [1, "test"])
             order = [field, ASC|DESC]
             limit = [from, to]
+            as_array = (bool) return a NumPy structured array, with a typed field per column, instead of a list of dicts
         """
 
-        cur = self._select(table, fields, where, order, limit)
-        result = cur.fetchall()
+        def load():
+            with self.connection():
+                cur = self._select(table, fields, where, order, limit)
+                result = cur.fetchall()
 
-        rows = None
-        if result:
-            fields = [f[0] for f in cur.description]
-            rows = [dict(zip(fields, r)) for r in result]
+            if as_array:
+                return self._rows_to_array(result, cur.description, self._boolean_columns(table, cur.description))
 
-        return rows
+            rows = None
+            if result:
+                names = [f[0] for f in cur.description]
+                rows = [dict(zip(names, r)) for r in result]
+
+            return rows
+
+        return self._cached_result("array" if as_array else "all", table, (fields, where, order, limit), load)
     
 
 
@@ -217,12 +1394,15 @@ class MysqlWrap:
             limit = [limit1, limit2]
         """
 
-        cur = self._select_join(tables, fields, join_fields, where, order, limit)
-        result = cur.fetchall()
+        def load():
+            cur = self._select_join(tables, fields, join_fields, where, order, limit)
+            return cur.fetchall(), cur.description
+
+        result, description = self._read(load)
 
         rows = None
         if result:
-            Row = namedtuple("Row", [f[0] for f in cur.description])
+            Row = namedtuple("Row", [f[0] for f in description])
             rows = [Row(*r) for r in result]
 
         return rows
@@ -230,39 +1410,147 @@ class MysqlWrap:
     def insert(self, table, data):
         """Insert a record"""
 
-        query = self._serialize_insert(data)
+        return self._run(*self._compile_insert(table, data)).rowcount
+
+    def _compile_insert(self, table, data):
+        """Build the sql and parameters of insert(), the sql is cached by table and columns"""
+
+        def compile():
+            query = self._serialize_insert(data)
+
+            return "INSERT INTO %s (%s) VALUES(%s)" % (table, query[0], query[1])
+
+        return self._compiled(("insert", table, tuple(data.keys())), compile), tuple(data.values())
 
-        sql = "INSERT INTO %s (%s) VALUES(%s)" % (table, query[0], query[1])
+    def insertBatch(self, table, data, chunk_rows : int = None, chunk_bytes : int = None, commit_every : int = None):
+        """Insert multiple record
 
-        return self.query(sql, tuple(data.values())).rowcount
+            data = list (or any iterable) of dicts sharing the same keys
+            chunk_rows = max number of rows per INSERT statement
+            chunk_bytes = max estimated size of each statement, defaults to half the server max_allowed_packet
+            commit_every = commit after every N chunks, the last chunk is left to the caller
 
-    def insertBatch(self, table, data):
-        """Insert multiple record"""
+            the rows are sent in chunks, the next chunk is built while the previous one is sent.
+            Returns the total rowcount.
+        """
+
+        rows = iter(data)
+        first = next(rows, None)
+        if first is None:
+            return 0
+
+        keys = list(first.keys())
+        values = (tuple(record.values()) for record in _chain_first(first, rows))
+
+        return self._insert_chunks(table, keys, values, chunk_rows, chunk_bytes, commit_every)
 
-        query = self._serialize_batch_insert(data)
+    def bufferedWriter(self, **kwargs):
+        """
+        A BufferedWriter queueing single rows and writing them in the background as multi row statements, eg:
+
+            with db.bufferedWriter(flush_rows=1000, flush_seconds=0.5) as writer:
+                for event in events:
+                    writer.insert("events", event)
 
-        sql = "INSERT INTO %s (%s) VALUES %s" % (table, query[0], query[1])
-        flattened_values = [v for sublist in data for k, v in iter(sublist.items())]
+        see writer.py for the parameters
+        """
+        from .writer import BufferedWriter
 
-        return self.query(sql, flattened_values).rowcount
+        return BufferedWriter(self, **kwargs)
+
+    def _insert_chunks(self, table, keys, values, chunk_rows=None, chunk_bytes=None, commit_every=None, statement=None,
+                       on_chunk=None):
+        """
+        Send rows as multi row INSERT statements, sized by row count and estimated bytes.
+            keys = column names
+            values = iterable of value tuples, consumed lazily
+            statement = optional format string with {columns} and {values}, to build other multi row statements
+            on_chunk = optional callable(flattened_values, count), run before each chunk is sent
+        """
+
+        if chunk_bytes is None:
+            chunk_bytes = self._max_allowed_packet() // 2
+
+        build = self._chunk_builder(table, keys, values, chunk_rows, chunk_bytes, statement)
+
+        rowcount = 0
+        chunks = 0
+        with self.connection(), ThreadPoolExecutor(max_workers=1) as builder:
+            pending = builder.submit(build)
+            while True:
+                chunk = pending.result()
+                if chunk is None:
+                    break
+                # prepare the next chunk while this one is on the wire
+                pending = builder.submit(build)
+                sql, flattened_values, count = chunk
+                if on_chunk is not None:
+                    on_chunk(flattened_values, count)
+                rowcount += self.query(sql, flattened_values).rowcount
+                chunks += 1
+                if commit_every and chunks % commit_every == 0:
+                    self.commit()
+
+        return rowcount
+
+    def _chunk_builder(self, table, keys, values, chunk_rows, chunk_bytes, statement=None):
+        """
+        Callable building the next chunk of rows, (sql, flattened_values, count), None once values are exhausted.
+        See _insert_chunks() for the parameters
+        """
+
+        columns = ",".join(keys)
+        width = len(keys)
+        statement = statement or "INSERT INTO %s ({columns}) VALUES {values}" % table
+        statements = {}
+
+        def build():
+            flattened_values = []
+            size = 0
+            count = 0
+            for row in values:
+                flattened_values.extend(row)
+                count += 1
+                size += _estimate_row_size(row)
+                if (chunk_rows and count >= chunk_rows) or size >= chunk_bytes:
+                    break
+            if not count:
+                return None
+            if count not in statements:
+                statements[count] = statement.format(columns=columns, values=self._serialize_values(width, count))
+            return statements[count], flattened_values, count
+
+        return build
+
+    def _max_allowed_packet(self) -> int:
+        """Server max_allowed_packet in bytes, read once per wrapper"""
+        if getattr(self, "_max_packet", None) is None:
+            self._max_packet = int(self.query("SELECT @@max_allowed_packet").fetchone()[0])
+        return self._max_packet
 
     def update(self, table, data, where=None):
         """Insert a record"""
 
-        query = self._serialize_update(data)
+        return self._run(*self._compile_update(table, data, where)).rowcount
 
-        sql = "UPDATE %s SET %s" % (table, query)
+    def _compile_update(self, table, data, where=None):
+        """Build the sql and parameters of update(), the sql is cached by table, columns and where template"""
 
-        if where and len(where) > 0:
-            sql += " WHERE %s" % where[0]
+        def compile():
+            query = self._serialize_update(data)
 
-        values = tuple(data.values())
+            sql = "UPDATE %s SET %s" % (table, query)
+
+            if where and len(where) > 0:
+                sql += " WHERE %s" % where[0]
 
+            return sql
 
+        sql = self._compiled(("update", table, tuple(data.keys()), where[0] if where else None), compile)
+
+        values = tuple(data.values())
 
-        return self.query(
-            sql, values + where[1] if where and len(where) > 1 else values
-        ).rowcount
+        return sql, values + tuple(where[1]) if where and len(where) > 1 else values
 
     def insertOrUpdate(self, table, data, key_field):
         insert_data = data.copy()
@@ -276,31 +1564,171 @@ class MysqlWrap:
 
         return self.query(sql, tuple(insert_data.values()) + tuple(data.values())).rowcount
     
+    def insertOrUpdateBatch(self, table, data, key_field, chunk_rows : int = None, chunk_bytes : int = None,
+                            commit_every : int = None, count_changes : bool = True):
+        """
+        Insert multiple records, updating the rows which already exist, using multi row
+        INSERT ... ON DUPLICATE KEY UPDATE statements. key_field must be a primary or unique key.
+        Chunked like insertBatch.
+
+            data = list (or any iterable) of dicts sharing the same keys
+            key_field = name, or list of names, of the key columns
+            count_changes = count existing keys before each chunk, to split the rowcount in inserted and updated rows
+
+            Returns a dict with rowcount, rows, inserted, updated and unchanged.
+            inserted / updated / unchanged are None when count_changes is False.
+        """
+
+        rows = iter(data)
+        first = next(rows, None)
+        if first is None:
+            return _upsert_result(0, 0, 0 if count_changes else None)
+
+        keys = list(first.keys())
+        values = (tuple(record.values()) for record in _chain_first(first, rows))
+
+        return self._upsert_chunks(table, keys, values, key_field, chunk_rows, chunk_bytes, commit_every, count_changes)
+
+    def _upsert_chunks(self, table, keys, values, key_field, chunk_rows=None, chunk_bytes=None, commit_every=None,
+                       count_changes=True):
+        key_fields, statement, chunk_keys = self._upsert_plan(table, keys, key_field)
+
+        totals = {"rows" : 0, "existing" : 0}
+
+        def count_existing(flattened_values, count):
+            totals["rows"] += count
+            if not count_changes:
+                return
+            totals["existing"] += self._count_keys(table, key_fields, chunk_keys(flattened_values, count))
+
+        rowcount = self._insert_chunks(table, keys, values, chunk_rows, chunk_bytes, commit_every,
+                                       statement=statement, on_chunk=count_existing)
+
+        return _upsert_result(rowcount, totals["rows"], totals["existing"] if count_changes else None)
+
+    def _upsert_plan(self, table, keys, key_field):
+        """
+        (key_fields, statement, chunk_keys) of a multi row upsert: the key column names, the statement format
+        for _insert_chunks(), and a callable returning the set of key tuples of a chunk of flattened values
+        """
+
+        key_fields = [key_field] if isinstance(key_field, str) else list(key_field)
+        key_positions = [keys.index(key) for key in key_fields]
+        width = len(keys)
+
+        statement = "INSERT INTO %s ({columns}) VALUES {values} %s" % (table, self._serialize_upsert(keys, key_fields))
+
+        def chunk_keys(flattened_values, count):
+            return {tuple(flattened_values[row * width + position] for position in key_positions)
+                    for row in range(count)}
+
+        return key_fields, statement, chunk_keys
+
+    def _serialize_upsert(self, keys, key_fields):
+        """ON DUPLICATE KEY UPDATE clause of a multi row insert, using the row alias form where the server supports it"""
+
+        update_keys = [key for key in keys if key not in key_fields] or key_fields[:1]
+
+        if self._supports_row_alias():
+            return "AS new ON DUPLICATE KEY UPDATE " + ",".join("{0}=new.{0}".format(key) for key in update_keys)
+        return "ON DUPLICATE KEY UPDATE " + ",".join("{0}=VALUES({0})".format(key) for key in update_keys)
+
+    def _count_keys(self, table, key_fields, key_values) -> int:
+        """Count the rows of table matching any of the given key tuples"""
+
+        if not key_values:
+            return 0
+
+        return int(self.query(*self._compile_count_keys(table, key_fields, key_values)).fetchone()[0])
+
+    def _compile_count_keys(self, table, key_fields, key_values):
+        """Build the sql and parameters counting the rows of table matching any of the key tuples"""
+
+        if len(key_fields) == 1:
+            condition = "%s IN (%s)" % (key_fields[0], ",".join(repeat("%s", len(key_values))))
+            params = [key[0] for key in key_values]
+        else:
+            condition = "(%s) IN (%s)" % (",".join(key_fields), self._serialize_values(len(key_fields), len(key_values)))
+            params = [value for key in key_values for value in key]
+
+        return "SELECT COUNT(*) FROM %s WHERE %s" % (table, condition), params
+
+    def _server_version(self):
+        """(version tuple, is_mariadb) of the connected server, read once per wrapper"""
+
+        if getattr(self, "_server", None) is None:
+            with self.connection() as conn:
+                self._server = (tuple(conn.server_version or ()), "mariadb" in (conn.server_info or "").lower())
+        return self._server
+
+    def _supports_row_alias(self) -> bool:
+        """MySQL 8.0.19+ row alias in INSERT ... ON DUPLICATE KEY UPDATE, VALUES() is deprecated there"""
+        version, mariadb = self._server_version()
+        return not mariadb and version >= (8, 0, 19)
+
     def describe(self, table: str):
+        """
+        Column definitions of a table, {name : {"Field", "Type", "Null", "Key", "Default", "Extra"}}.
+        Served from the schema cache when enabled, which is invalidated by any DDL run through this wrapper.
+        """
+
+        columns = self._cached_columns(table)
+        if columns is not None:
+            return columns
 
         sql = "EXPLAIN "+ table
 
-        cursor = self.query(sql).fetchall()
+        cursor = self._read(lambda : self.query(sql).fetchall())
+
+        columns = _explain_columns(cursor)
+        self._cache_columns(table, columns)
+
+        return columns
 
-        return {field[0] : {"Field" : field[0],
-                "Type" : field[1].decode().upper(),
-                "Null" : field[2],
-                "Key" : field[3],
-                "Default" : field[4],
-                "Extra" : field[5]} for field in cursor}
+    def _cached_columns(self, table):
+        """Column definitions of table from the schema cache, None when not cached"""
+        if self.schema_cache is None:
+            return None
+        return self.schema_cache.get(("describe", table))
+
+    def _cache_columns(self, table, columns : dict):
+        if self.schema_cache is not None:
+            self.schema_cache.set(("describe", table), columns, tags=(table,))
+            self.schema_cache.set(("exists", table), True, tags=(table,))
+
+    def loadSchema(self):
+        """
+        Fill the schema cache with the definitions of all the tables in the database, in a single query.
+        Returns the number of tables loaded.
+        """
 
+        if self.schema_cache is None:
+            self.schema_cache = TTLCache(ttl=self.conf["schema_cache_ttl"])
 
+        tables = _schema_tables(self.query(SCHEMA_SQL).fetchall())
+        for table, columns in tables.items():
+            self._cache_columns(table, columns)
 
+        return len(tables)
 
     def delete(self, table, where=None):
         """Delete rows based on a where condition"""
 
-        sql = "DELETE FROM %s" % table
+        return self._run(*self._compile_delete(table, where)).rowcount
 
-        if where and len(where) > 0:
-            sql += " WHERE %s" % where[0]
+    def _compile_delete(self, table, where=None):
+        """Build the sql and parameters of delete(), the sql is cached by table and where template"""
+
+        def compile():
+            sql = "DELETE FROM %s" % table
+
+            if where and len(where) > 0:
+                sql += " WHERE %s" % where[0]
 
-        return self.query(sql, where[1] if where and len(where) > 1 else None).rowcount
+            return sql
+
+        return self._compiled(("delete", table, where[0] if where else None), compile), \
+            where[1] if where and len(where) > 1 else None
 
     def addIndex(self, table, index_name, fields=[]):
         sanitized_fields = ','.join(fields)
@@ -316,44 +1744,261 @@ class MysqlWrap:
     def query(self, sql, params=None):
         """Run a raw query"""
 
-        # check if connection is alive. if not, reconnect
+        with self.connection() as conn:
+            if self.instrumentation is None:
+                cur = self._execute(conn, sql, params)
+            else:
+                cur = self._execute_instrumented(conn, sql, params)
+
+            # in pooled mode, uncommitted writes keep the connection bound to this thread
+            if self.pool is not None and not cur.with_rows and conn.in_transaction:
+                self._local.dirty = True
+
+            scope = getattr(self._local, "scope", None)
+            if scope is not None and not cur.with_rows:
+                self._scope_statement(conn, scope)
+
+            if self.replicas is not None and not cur.with_rows:
+                self._last_write = time.monotonic()
+
+        if self.schema_cache is not None:
+            self._invalidate_schema(sql)
+        if self.result_cache is not None:
+            self._invalidate_results(sql)
+
+        return cur
+
+    def _invalidate_schema(self, sql):
+        """Drop the cached definitions of the tables changed by a DDL statement"""
+        tables = _ddl_tables(sql)
+        if tables is None:
+            return
+        if tables:
+            self.schema_cache.invalidate(*tables)
+        else:
+            self.schema_cache.clear()
+
+    def _invalidate_results(self, sql):
+        """Drop the cached results of the tables written by a statement, all of them when the tables can´t be told"""
+        tables = _written_tables(sql)
+        if tables is None:
+            return
+        if tables:
+            self.result_cache.invalidate(*tables)
+        else:
+            self.result_cache.clear()
+
+    def invalidateResults(self, *tables):
+        """Drop the cached results of the given tables, eg after they were changed by another client. All results without tables"""
+        if self.result_cache is None:
+            return
+        if tables:
+            self.result_cache.invalidate(*tables)
+        else:
+            self.result_cache.clear()
+
+    def resultCacheStats(self) -> dict:
+        """Size, hits, misses and evictions of the results cache, None when it is disabled"""
+        if self.result_cache is None:
+            return None
+        return self.result_cache.stats()
+
+    def _cached_result(self, kind, table, select, load):
+        """
+        Result of load() for a select, cached by its sql and parameters when the results cache is enabled
+        and tagged with table, so that writes to it through this wrapper drop it.
+            select = (fields, where, order, limit) of the query
+        """
+
+        if self.result_cache is None:
+            return self._read(load)
+
+        sql, params = self._compile_select(table, *select)
+        key = ("result", kind, sql, tuple(params) if params else None)
+        try:
+            result = self.result_cache.get(key, MISSING)
+        except TypeError:
+            # unhashable parameters
+            return self._read(load)
+
+        if result is MISSING:
+            result = self._read(load)
+            if isinstance(result, np.ndarray) and not self.conf["result_cache_copy"]:
+                result.flags.writeable = False
+            self.result_cache.set(key, result, tags=(table,))
+
+        return _copy_result(result) if self.conf["result_cache_copy"] else result
+
+    def _read(self, load):
+        """
+        Result of load(), with its queries sent to a replica when reads can go to one, see _use_replica().
+        A read failing on a connection error evicts the replica and is run again on the primary.
+        """
+
+        if getattr(self._local, "replica", None) is not None or not self._use_replica():
+            return load()
+        checkout = self.replicas.checkout()
+        if checkout is None:
+            return load()
+
+        replica, conn = checkout
+        self._local.replica = conn
+        try:
+            result = load()
+        except (mysql.OperationalError, mysql.InterfaceError) as e:
+            self._local.replica = None
+            self.replicas.checkin(replica, conn, e)
+            return load()
+        except BaseException:
+            self._local.replica = None
+            self.replicas.checkin(replica, conn)
+            raise
+        self._local.replica = None
+        self.replicas.checkin(replica, conn)
+
+        return result
+
+    def _use_replica(self) -> bool:
+        """Whether reads of the calling thread can go to a replica: no transaction, no uncommitted writes, no recent write"""
+
+        if self.replicas is None or getattr(self._local, "scope", None) is not None:
+            return False
+        if self.pool is not None:
+            # a connection held by the thread, by connection() or pending writes
+            if getattr(self._local, "conn", None) is not None:
+                return False
+        elif self.conn is not None and self.conn.in_transaction:
+            return False
+
+        window = self.conf["read_your_writes"]
+        return window is None or self._last_write is None or time.monotonic() - self._last_write >= window
+
+    def replicaStats(self) -> list:
+        """Health, latency, lag and reads of every replica, None without replicas"""
+        if self.replicas is None:
+            return None
+        return self.replicas.stats()
+
+    def _execute_instrumented(self, conn, sql, params=None, execute=None):
+        """Execute through _execute, or the given execute function, reporting the statement to the instrumentation"""
+
+        started = time.perf_counter()
+        try:
+            cur = (execute or self._execute)(conn, sql, params)
+        except Exception as e:
+            self.instrumentation.record(sql, params, time.perf_counter() - started, error=e)
+            raise
+        self.instrumentation.record(sql, params, time.perf_counter() - started, cur.rowcount)
+
+        return cur
+
+    def _execute(self, conn, sql, params=None):
+        """Execute on the given connection, reconnecting once if the server went away and the statement can be retried"""
+
+        replica = conn is getattr(self._local, "replica", None)
+        cur = self._cur if self.pool is None and not replica else conn.cursor(buffered=True)
 
         try:
-            self.cur.execute(sql, params)
-        except mysql.OperationalError as e:
-            # mysql timed out. reconnect and retry once
-            if e[0] == 2006:
-                self.connect()
-                self.cur.execute(sql, params)
+            cur.execute(sql, params)
+        except (mysql.OperationalError, mysql.InterfaceError) as e:
+            # mysql timed out. reconnect and retry once, a failed replica read is retried on the primary by _read()
+            if e.errno in (2006, 2013, 2055) and not replica and self._can_retry(conn, sql, e.errno):
+                if self.pool is None:
+                    self.connect()
+                    cur = self._cur
+                else:
+                    conn.reconnect()
+                    cur = conn.cursor(buffered=True)
+                cur.execute(sql, params)
             else:
+                logger.exception("Query failed: %s", sql)
                 raise
         except:
-            print("Query failed")
+            logger.exception("Query failed: %s", sql)
             raise
 
-        return self.cur
+        self._local.cur = cur
+
+        return cur
+
+    def _can_retry(self, conn, sql, errno) -> bool:
+        """
+        Whether a statement lost with its connection can run again on a new one. Not inside a transaction,
+        the earlier statements are gone with the connection and only the rest would be committed,
+        and only reads after 2013 and 2055, the server may have run the statement before the connection dropped
+        """
+
+        if conn.in_transaction or getattr(self._local, "dirty", False) or getattr(self._local, "scope", None) is not None:
+            return False
+        return errno == 2006 or _written_tables(sql) is None
 
     def commit(self):
         """Commit a transaction (transactional engines like InnoDB require this)"""
-        return self.conn.commit()
+        if self.replicas is not None:
+            self._last_write = time.monotonic()
+
+        if self.pool is None:
+            return self.conn.commit()
+
+        if self.conn is None:
+            return
+        result = self.conn.commit()
+        self._local.dirty = False
+        if self._local.depth == 0:
+            self._release()
+        return result
+
+    def rollback(self):
+        """Roll back the current transaction"""
+        # results read inside the transaction may hold the rows rolled back
+        if self.result_cache is not None:
+            self.result_cache.clear()
+
+        if self.pool is None:
+            return self.conn.rollback()
+
+        if self.conn is None:
+            return
+        result = self.conn.rollback()
+        self._local.dirty = False
+        if self._local.depth == 0:
+            self._release()
+        return result
 
     def is_open(self):
         """Check if the connection is open"""
-        return self.conn.open
+        if self.pool is not None:
+            return not self.pool.closed
+        return self.conn.is_connected()
 
     def end(self):
-        """Kill the connection"""
-        self.cur.close()
+        """Kill the connection, or close the pool"""
+        if self.replicas is not None:
+            self.replicas.close()
+
+        if self.pool is not None:
+            self._release()
+            self.pool.close()
+            return
+
+        self._cur.close()
         self.conn.close()
 
         # ===
 
     def tableExist(self, table : str):
+        if self.schema_cache is not None:
+            exists = self.schema_cache.get(("exists", table))
+            if exists is not None:
+                return exists
+
         sql = "SHOW TABLES LIKE '{0}'".format(table)
-        self.cur.execute(sql)
-        if self.cur.fetchone():
-            return True
-        return False
+        exists = bool(self.query(sql).fetchone())
+
+        if self.schema_cache is not None:
+            self.schema_cache.set(("exists", table), exists, tags=(table,))
+
+        return exists
     
     def _serialize_insert(self, data):
         """Format insert dict values into strings"""
@@ -362,28 +2007,51 @@ class MysqlWrap:
 
         return [keys, vals]
 
-    def _serialize_batch_insert(self, data):
-        """Format insert dict values into strings"""
-
-        keys = ",".join(data[0].keys())
-        v = "(%s)" % ",".join(tuple("%s".rstrip(',') for v in range(len(data[0]))))
-        l = ','.join(list(repeat(v, len(data))))
+    def _serialize_values(self, width, count):
+        """Format the placeholders of a multi row VALUES clause"""
+        v = "(%s)" % ",".join(repeat("%s", width))
 
-        return [keys, l]
+        return ",".join(repeat(v, count))
 
     def _serialize_update(self, data):
         """Format update dict values into string"""
         return "=%s,".join(data.keys()) + "=%s"
 
-    def _select(self, table=None, fields=(), where=None, order=None, limit=None):
+    def _select(self, table=None, fields=(), where=None, order=None, limit=None, group=None, having=None):
         """Run a select query"""
 
+        return self._run(*self._compile_select(table, fields, where, order, limit, group, having))
+
+    def _compile_select(self, table=None, fields=(), where=None, order=None, limit=None, group=None, having=None):
+        """Build the sql and parameters of a select query, the sql is cached by the shape of the query"""
+
+        key = ("select", table, fields if isinstance(fields, str) else tuple(fields), where[0] if where else None,
+               tuple(order) if order else None, tuple(limit) if limit else None,
+               tuple(group) if group else None, having[0] if having else None)
+
+        sql = self._compiled(key, lambda : self._serialize_select(table, fields, where, order, limit, group, having))
+
+        params = where[1] if where and len(where) > 1 else None
+        if having and len(having) > 1:
+            params = list(params or []) + list(having[1])
+        return sql, params
+
+    def _serialize_select(self, table=None, fields=(), where=None, order=None, limit=None, group=None, having=None):
+        """Format a select query"""
+
         sql = "SELECT %s FROM `%s`" % (",".join(fields), table)
 
         # where conditions
         if where and len(where) > 0:
             sql += " WHERE %s" % where[0]
 
+        # grouping
+        if group:
+            sql += " GROUP BY %s" % ",".join(group)
+
+        if having and len(having) > 0:
+            sql += " HAVING %s" % having[0]
+
         # order
         if order:
             sql += " ORDER BY %s" % order[0]
@@ -398,7 +2066,98 @@ class MysqlWrap:
             if len(limit) > 1:
                 sql += ", %s" % limit[1]
 
-        return self.query(sql, where[1] if where and len(where) > 1 else None)
+        return sql
+
+    def _compiled(self, key, compile):
+        """Get a compiled sql string from the cache, or compile and cache it"""
+
+        sql = self._sql_cache.get(key)
+        if sql is None:
+            sql = compile()
+            self._sql_cache.set(key, sql)
+        return sql
+
+    def _run(self, sql, params=None):
+        """
+        Run a statement built by the CRUD helpers. With prepared_statements enabled it runs as a server side
+        prepared statement, one prepared cursor per cached statement and connection, otherwise as a raw query.
+        """
+
+        if not self.conf["prepared_statements"]:
+            return self.query(sql, params)
+
+        with self.connection() as conn:
+            if self.instrumentation is None:
+                cur = self._execute_prepared(conn, sql, params)
+            else:
+                cur = self._execute_instrumented(conn, sql, params, self._execute_prepared)
+
+            if self.pool is not None and not cur.with_rows and conn.in_transaction:
+                self._local.dirty = True
+
+            scope = getattr(self._local, "scope", None)
+            if scope is not None and not cur.with_rows:
+                self._scope_statement(conn, scope)
+
+            if self.replicas is not None and not cur.with_rows:
+                self._last_write = time.monotonic()
+
+        if self.result_cache is not None:
+            self._invalidate_results(sql)
+
+        return cur
+
+    def _execute_prepared(self, conn, sql, params=None):
+        """Execute sql as a prepared statement on the given connection"""
+
+        try:
+            cur = self._prepared_cursor(conn, sql)
+            cur.execute(sql, params)
+        except mysql.Error as e:
+            # statement handles are lost when the connection drops, start over with a fresh cache
+            if e.errno in (1243, 2006, 2013, 2055):
+                self._forget_prepared(conn)
+                return self._execute(conn, sql, params)
+            logger.exception("Query failed: %s", sql)
+            raise
+
+        self._local.cur = cur
+
+        return cur
+
+    def _prepared_cursor(self, conn, sql):
+        """The prepared cursor of sql on conn, least recently used statements are closed past prepared_cache_size"""
+
+        with self._prepared_lock:
+            statements = self._prepared.get(conn)
+            if statements is None:
+                statements = self._prepared[conn] = OrderedDict()
+
+        cur = statements.get(sql)
+        if cur is not None:
+            statements.move_to_end(sql)
+            return cur
+
+        while len(statements) >= self.conf["prepared_cache_size"]:
+            _, evicted = statements.popitem(last=False)
+            try:
+                evicted.close()
+            except mysql.Error:
+                pass
+
+        cur = statements[sql] = conn.cursor(prepared=True)
+        return cur
+
+    def _forget_prepared(self, conn):
+        with self._prepared_lock:
+            self._prepared.pop(conn, None)
+
+    def sqlCacheStats(self) -> dict:
+        """Hits and misses of the compiled sql cache, and the number of open prepared statements"""
+        stats = self._sql_cache.stats()
+        with self._prepared_lock:
+            stats["prepared_statements"] = sum(len(statements) for statements in self._prepared.values())
+        return stats
 
     def _select_join(self, tables=(), fields=(), join_fields=(), where=None, order=None, limit=None):
         """Run an inner left join query"""
@@ -443,49 +2202,22 @@ class MysqlWrap:
 # PANDAS METHODS
 
     
-    def _is_json(self, _varchar : str):
-        if not _varchar.startswith(("{", "[")):
-            return False
-        try:
-            json.loads(_varchar)
-        except ValueError as e:
-            return False
-        return True
-    
-    def _column_max_length(self, _column):
-        return _column.str.len().max()
-
-    def _column_max_decimals(self, _column):
-        return _column.astype('str').str.split('.', expand=True).apply(lambda x:len(x)).max()
-    
-      
-    def _serialize_datatypes(self, data : pd.DataFrame, key_field : str = None):
+    def _infer_datatypes(self, data : pd.DataFrame, sample_rows : int = INFERENCE_SAMPLE_ROWS):
+        """mysql types of the DataFrame columns, see _infer_datatype()"""
+        return [_infer_datatype(column, sample_rows) for _, column in data.items()]
 
-        datatypes = []
+    def _serialize_datatypes(self, data : pd.DataFrame, key_field : str = None, sample_rows : int = INFERENCE_SAMPLE_ROWS):
 
-        for items, dtype in zip(data.items(), list(data.dtypes)):
-            key = items[0]
-            column = items[1]
-            datatype = getDataTypefromDType(str(dtype))
+        keys = list(data.keys())
+        key_index = keys.index(key_field) if key_field in keys else None
 
+        datatypes = self._infer_datatypes(data, sample_rows)
+        if key_index is not None:
+            datatypes[key_index] = _key_datatype(datatypes[key_index])
+        datatypes = _fit_row(datatypes, key_index)
 
-            if datatype == "VARCHAR" and self._is_json(column[column.first_valid_index()]):
-                datatype = "JSON"
-
-            # handle datatype length
-            if datatype == "VARCHAR" and self._column_max_length(column) > 255:
-                datatype +="(MAX)"
-            elif datatype in DataTypeLength.keys():
-                datatype += "(%s)" % (DataTypeLength[datatype])
-
-            if key == key_field:
-                datatype += " NOT NULL PRIMARY KEY"
-            else:
-                datatype += " NULL"
-            
-            datatypes.append(datatype)
-        
-        return datatypes
+        return [datatype + (" NOT NULL PRIMARY KEY" if index == key_index else " NULL")
+                for index, datatype in enumerate(datatypes)]
 
     """
     * createTable() - creates a Table using a DataFrame as the input
@@ -497,7 +2229,10 @@ class MysqlWrap:
     * getTable() - get all rows, return as DataTrame   
     """
     
-    def getTable(self, table=None, fields='*', where=None, order=None, limit=None) -> pd.DataFrame:
+    @instrumented
+    def getTable(self, table=None, fields='*', where=None, order=None, limit=None, chunksize : int = None,
+                 output : str = "pandas", parallel : int = None, partition_field : str = None,
+                 executor : str = "thread") -> pd.DataFrame:
         """
         Get all results and return as a DataFrame
         parameters:
@@ -507,21 +2242,428 @@ class MysqlWrap:
                     eg: ("id=%s and name=%s", [1, "test"])
             order = [field, ASC|DESC]
             limit = [from, to]
+            chunksize = (int) if set, returns an iterator of DataFrames of chunksize rows instead, see iterTable()
+            output = "pandas" for a DataFrame, "arrow" for a pyarrow.Table (requires pyarrow),
+                     built from the cursor in batches with strings stored as arrow strings
+            parallel = (int) split the rows in this many ranges of partition_field, read at once over a connection each
+                       and concatenated in key order. Ordered by partition_field, order and limit can´t be used
+            partition_field = integer or date column to split the ranges on, defaults to the (first) primary key column
+            executor = "thread", or "process" to also decode the ranges on several cores (each process opens its own connection)
+        """
+        if chunksize:
+            return self.iterTable(table, fields, where, order, limit, chunksize, output)
+
+        if parallel and parallel > 1:
+            if output != "pandas":
+                raise ValueError("parallel reads only support output='pandas'")
+            return self._read_parallel(table, fields, where, order, limit, parallel, partition_field, executor)
+
+        if output == "arrow":
+            pa = _import_pyarrow()
+            batches = self._iter_arrow_batches(table, fields, where, order, limit, ARROW_BATCH_ROWS)
+            schema = next(batches)
+            return pa.Table.from_batches(list(batches), schema=schema)
+        if output != "pandas":
+            raise ValueError("output must be 'pandas' or 'arrow', not {0}".format(output))
+
+        def load():
+            with self.connection():
+                cur = self._select(table, fields, where, order, limit)
+                # read before the connection goes back to the pool, a prepared statement cursor is unbuffered
+                rows = cur.fetchall()
+
+            return self._rows_to_frame(rows, cur.description, self._boolean_columns(table, cur.description))
+
+        return self._cached_result("frame", table, (fields, where, order, limit), load)
+
+    def iterTable(self, table=None, fields='*', where=None, order=None, limit=None, chunksize : int = 10000,
+                  output : str = "pandas", keyset : bool = False, key_field=None):
+        """
+        Iterate over the results in DataFrames of chunksize rows.
+        Rows are streamed from the server with an unbuffered cursor, so only one chunk is held in memory,
+        and the first chunk is available before the scan finishes.
+        Without a pool the stream occupies the connection: finish (or close) the iterator before running other queries.
+        In pooled mode the stream gets its own connection from the pool.
+        parameters:
+            same as getTable()
+            chunksize = (int) number of rows per DataFrame
+            output = "pandas" for DataFrames, "arrow" for pyarrow.RecordBatches
+            keyset = (bool) read every chunk with a query of its own instead, paging by key (see iterRows),
+                     so the connection is free between chunks. Ordered by the key, order and limit can´t be used
+            key_field = key to page by, implies keyset, defaults to the primary key
+        """
+
+        if keyset or key_field:
+            if output != "pandas":
+                raise ValueError("keyset pagination only supports output='pandas'")
+            for rows, description in self._iter_pages(table, fields, where, order, limit, key_field, chunksize):
+                yield self._rows_to_frame(rows, description, self._boolean_columns(table, description))
+            return
+
+        if output == "arrow":
+            _import_pyarrow()
+            batches = self._iter_arrow_batches(table, fields, where, order, limit, chunksize)
+            next(batches)
+            yield from batches
+            return
+
+        sql, params = self._compile_select(table, fields, where, order, limit)
+
+        # looked up before the stream starts, the connection is busy until it ends
+        boolean_columns = self._boolean_columns(table)
+
+        with self._stream_cursor(sql, params) as cur:
+            description = cur.description
+            while True:
+                rows = cur.fetchmany(chunksize)
+                if not rows:
+                    break
+                yield self._rows_to_frame(rows, description, boolean_columns)
+
+    def iterRows(self, table, fields='*', where=None, key_field=None, page_rows : int = 10000, as_tuple : bool = False):
+        """
+        Iterate over all the rows of a table, one page at a time, paging by key:
+        every page is a query of its own, WHERE key > last key seen ORDER BY key LIMIT page_rows,
+        so reading the whole table takes linear time, unlike increasing LIMIT offsets which re-read all the previous rows.
+        parameters:
+            table = (str) table_name
+            fields = (field1, field2 ...) list of fields to select, the key is read even if not listed
+            where = ("parameterizedstatement", [parameters]), combined with the key condition
+            key_field = name, or list of names, of a unique and indexed key, defaults to the primary key
+            page_rows = (int) number of rows per query
+            as_tuple = (bool) yield tuples instead of dicts
+        """
+
+        for rows, description in self._iter_pages(table, fields, where, None, None, key_field, page_rows):
+            if as_tuple:
+                yield from rows
+            else:
+                names = [field[0] for field in description]
+                for row in rows:
+                    yield dict(zip(names, row))
+
+    def _iter_pages(self, table, fields, where, order, limit, key_field, page_rows):
+        """Pages of (rows, description) of a keyset paginated scan, see iterRows()"""
+
+        if order or limit:
+            raise ValueError("keyset pagination orders by key_field, order and limit can´t be used")
+
+        key_fields = self._key_fields(table) if key_field is None else \
+            [key_field] if isinstance(key_field, str) else list(key_field)
+        if not key_fields:
+            raise ValueError("table {0} has no primary key, pass a key_field".format(table))
+
+        # keys missing from fields are selected at the end and dropped from the results
+        if fields == '*' or fields == ['*']:
+            extra = []
+        else:
+            fields = [fields] if isinstance(fields, str) else list(fields)
+            extra = [key for key in key_fields if key not in fields]
+            fields = fields + extra
+
+        if len(key_fields) == 1:
+            key_condition = "%s > %%s" % key_fields[0]
+        else:
+            key_condition = "(%s) > (%s)" % (",".join(key_fields), ",".join(repeat("%s", len(key_fields))))
+        where_sql = where[0] if where else None
+        where_params = list(where[1]) if where and len(where) > 1 else []
+
+        order = [",".join(key_fields), "ASC"]
+        last = None
+        while True:
+            if last is None:
+                page_where = where
+            elif where_sql:
+                page_where = ("(%s) AND %s" % (where_sql, key_condition), where_params + list(last))
+            else:
+                page_where = (key_condition, list(last))
+
+            def load():
+                with self.connection():
+                    cur = self._select(table, fields, page_where, order, [page_rows])
+                    return cur.fetchall(), cur.description
+
+            # every page is a query of its own, each can go to a replica
+            rows, description = self._read(load)
+            if not rows:
+                return
+
+            names = [field[0] for field in description]
+            key_positions = [names.index(key) for key in key_fields]
+            last = tuple(rows[-1][position] for position in key_positions)
+
+            if extra:
+                rows = [row[:-len(extra)] for row in rows]
+                description = description[:-len(extra)]
+            yield rows, description
+
+            if len(rows) < page_rows:
+                return
+
+    def _key_fields(self, table) -> list:
+        """Primary key columns of table"""
+        return [name for name, column in self.describe(table).items() if column["Key"].upper() == "PRI"]
+
+    def _read_parallel(self, table, fields, where, order, limit, slices, partition_field, executor) -> pd.DataFrame:
+        """DataFrame of the rows read in key ranges over several connections at once, see getTable()"""
+
+        if order or limit:
+            raise ValueError("parallel reads are ordered by partition_field, order and limit can´t be used")
+        if executor not in ("thread", "process"):
+            raise ValueError("executor must be 'thread' or 'process', not {0}".format(executor))
+
+        if partition_field is None:
+            key_fields = self._key_fields(table)
+            if not key_fields:
+                raise ValueError("table {0} has no primary key, pass a partition_field".format(table))
+            partition_field = key_fields[0]
+        column = self.describe(table).get(partition_field)
+        if column is None:
+            raise ValueError("{0} is not a column of {1}".format(partition_field, table))
+        base = _parse_datatype(column["Type"])[0]
+        if base not in INTEGER_RANK and base not in ("DATE", "DATETIME", "TIMESTAMP"):
+            raise ValueError("partition_field must be an integer or date column, {0} is {1}".format(partition_field, column["Type"]))
+
+        conditions = ["(%s)" % where[0]] if where else []
+        params = list(where[1]) if where and len(where) > 1 else []
+        sql = "SELECT MIN(%s), MAX(%s) FROM %s" % (partition_field, partition_field, table)
+        if conditions:
+            sql += " WHERE " + conditions[0]
+        low, high = self._read(lambda : self.query(sql, params).fetchone())
+
+        # the first range also takes the NULL keys and everything below the lowest bound, the last everything above,
+        # so rows written since the MIN/MAX lookup aren´t lost between the ranges
+        inner = _range_bounds(low, high, slices)[1:-1] if low is not None else []
+        ranges = []
+        for index in range(len(inner) + 1):
+            range_conditions, range_params = [], []
+            if index > 0:
+                range_conditions.append("%s >= %%s" % partition_field)
+                range_params.append(inner[index - 1])
+            if index < len(inner):
+                range_conditions.append("(%s < %%s OR %s IS NULL)" % (partition_field, partition_field) if index == 0
+                                        else "%s < %%s" % partition_field)
+                range_params.append(inner[index])
+            range_conditions = conditions + range_conditions
+            ranges.append((" AND ".join(range_conditions), params + range_params) if range_conditions else None)
+
+        if executor == "process":
+            pool = ProcessPoolExecutor(max_workers=len(ranges))
+            wrap = None
+        else:
+            pool = ThreadPoolExecutor(max_workers=len(ranges))
+            # a pool with a free connection per range is shared, otherwise every thread opens its own
+            wrap = self if self.pool is not None and \
+                self.pool.max_size - self.pool.stats()["in_use"] >= len(ranges) else None
+
+        # the workers can´t tell this thread is in a transaction or has just written
+        conf = self._worker_conf(executor, replicas=self._use_replica())
+        order = [partition_field, "ASC"]
+        with pool:
+            futures = [pool.submit(_read_partition, wrap, conf, table, fields, range_where, order) for range_where in ranges]
+            frames = [future.result() for future in futures]
+
+        # empty ranges carry no dtypes, leave them out unless all of them are empty
+        frames = [frame for frame in frames if len(frame)] or frames[:1]
+        return pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+
+    @instrumented
+    def getAggregate(self, table, by=None, aggs : dict = None, where=None, having=None, order=None, limit=None,
+                     sort : bool = True) -> pd.DataFrame:
+        """
+        Group and aggregate on the server, like getTable(table).groupby(by).agg(aggs) without fetching the rows.
+        Returns a DataFrame with a column per group field and aggregate.
+        parameters:
+            table = (str) table_name
+            by = field, or list of fields, to group by. None aggregates the whole table in one row
+            aggs = {"field" : "sum"}, {"field" : ["sum", "max"]} for field_sum and field_max columns,
+                   or {"name" : ("field", "sum")}. One of sum, min, max, mean, count, nunique, size, std, var
+            where = ("parameterizedstatement", [parameters]), filters the rows before grouping
+            having = ("parameterizedstatement", [parameters]), filters the groups, eg: ("amount_sum > %s", [100])
+            order = [field, ASC|DESC], defaults to the group fields unless sort is False
+            limit = [from, to]
+        SUM and AVG of integer and DECIMAL fields are DECIMAL in mysql, and come back as decimal.Decimal
+        objects unless the wrapper was created with decimal_as_float.
+        """
+
+        by = [] if by is None else [by] if isinstance(by, str) else list(by)
+        if not by and not aggs:
+            raise ValueError("getAggregate needs by fields or aggs")
+
+        group = ["`%s`" % field for field in by]
+        fields = group + ["%s AS `%s`" % (expression, name) for name, expression in _aggregate_columns(aggs or {})]
+        if order is None and sort and group:
+            order = [",".join(group)]
+
+        def load():
+            with self.connection():
+                cur = self._select(table, fields, where, order, limit, group, having)
+                rows = cur.fetchall()
+
+            # aggregates named after a TINYINT(1) field, like its sum, aren´t booleans
+            return self._rows_to_frame(rows, cur.description, self._boolean_columns(table, cur.description) & set(by))
+
+        return self._cached_result("frame", table, (fields, where, order, limit, group, having), load)
+
+    @instrumented
+    def dumpTable(self, table, path, fields='*', where=None, order=None, limit=None,
+                  row_group_rows : int = ARROW_BATCH_ROWS * 2, compression : str = "snappy"):
+        """
+        Write the results to a Parquet file (requires pyarrow).
+        Rows are streamed from the server and written one row group at a time, so memory is bounded by row_group_rows.
+        parameters:
+            table, fields, where, order, limit = same as getTable()
+            path = destination file path
+            row_group_rows = (int) rows per parquet row group
+            compression = parquet compression codec
+        returns the number of rows written
+        """
+
+        pa = _import_pyarrow()
+        import pyarrow.parquet as pq
+
+        batches = self._iter_arrow_batches(table, fields, where, order, limit, row_group_rows)
+        schema = next(batches)
+
+        rows = 0
+        with pq.ParquetWriter(path, schema, compression=compression) as writer:
+            for batch in batches:
+                writer.write_batch(batch, row_group_size=row_group_rows)
+                rows += batch.num_rows
+
+        return rows
+
+    def _iter_arrow_batches(self, table, fields, where, order, limit, batch_rows):
+        """Stream the results as arrow RecordBatches, the first item is the arrow schema"""
+
+        pa = _import_pyarrow()
+        sql, params = self._compile_select(table, fields, where, order, limit)
+        # looked up before the stream starts, the connection is busy until it ends
+        columns = self._table_columns(table)
+
+        with self._stream_cursor(sql, params) as cur:
+            description = cur.description
+            # the schema waits for the first batch, computed DECIMAL columns take their scale from it
+            rows = cur.fetchmany(batch_rows)
+            schema = _arrow_schema(pa, description, columns, rows)
+            yield schema
+            while rows:
+                yield _arrow_batch(pa, rows, description, schema)
+                rows = cur.fetchmany(batch_rows)
+
+    @contextmanager
+    def _stream_cursor(self, sql, params=None):
+        """
+        Unbuffered cursor for streaming a result set, on a connection of its own in pooled mode.
+        The stream goes to a replica when reads can go to one, see _use_replica(). It holds the replica connection
+        until it ends, past the load() of _read(), so it checks one out itself: a replica failing before the first row
+        is evicted and the stream runs on the primary, a failure later on evicts it and is raised.
         """
-        cur = self._select(table, fields, where, order, limit)
-        column_names = cur.column_names
 
-        records = [dict(zip(column_names, record)) for record in cur.fetchall()]
+        replica = cur = None
+        checkout = self.replicas.checkout() if self._use_replica() else None
+        if checkout is not None:
+            replica, conn = checkout
+            cur = conn.cursor()
+            try:
+                self._start_stream(conn, cur, sql, params)
+            except (mysql.OperationalError, mysql.InterfaceError) as e:
+                self.replicas.checkin(replica, conn, e)
+                replica = cur = None
+            except BaseException:
+                self.replicas.checkin(replica, conn)
+                raise
+
+        if replica is None:
+            conn = self.conn if self.pool is None else self.pool.checkout()
+        error = None
+        try:
+            if cur is None:
+                cur = conn.cursor()
+                self._start_stream(conn, cur, sql, params)
+            yield cur
+        except (mysql.OperationalError, mysql.InterfaceError) as e:
+            error = e
+            raise
+        finally:
+            # drain what is left of an abandoned result set, so the connection can be used again
+            try:
+                if conn.unread_result:
+                    conn.consume_results()
+                if cur is not None:
+                    cur.close()
+            except mysql.Error:
+                pass
+            if replica is not None:
+                self.replicas.checkin(replica, conn, error)
+            elif self.pool is not None:
+                self.pool.checkin(conn)
+
+    def _start_stream(self, conn, cur, sql, params=None):
+        """Send the query of a streaming cursor, reporting it to the instrumentation"""
+
+        if self.instrumentation is None:
+            cur.execute(sql, params)
+        else:
+            self._execute_instrumented(conn, sql, params, self._execute_stream(cur))
+
+    def _execute_stream(self, cur):
+        """execute function of _execute_instrumented for a streaming cursor"""
 
-        res_dataFrame = pd.DataFrame.from_dict(records)
+        def execute(conn, sql, params=None):
+            cur.execute(sql, params)
+            return cur
 
-        # dealing with Timestamps
-        for column in res_dataFrame.select_dtypes(include = [np.datetime64, 'datetime' , 'datetime64']):
-            pd.to_datetime(res_dataFrame[column], format = "%Y/%m/%d")
-            res_dataFrame[column].fillna(pd.Timedelta(days=0))
+        return execute
+
+    def _rows_to_frame(self, rows, description, boolean_columns=()) -> pd.DataFrame:
+        """Build a DataFrame column by column from fetched row tuples, with dtypes taken from the cursor description"""
+
+        arrays = _columns_from_rows(rows, description, boolean_columns, self.conf.get("decimal_as_float", False))
+
+        res_dataFrame = pd.DataFrame(dict(enumerate(arrays)), copy=False)
+        res_dataFrame.columns = [field[0] for field in description]
 
         return res_dataFrame
+
+    def _rows_to_array(self, rows, description, boolean_columns=()) -> np.ndarray:
+        """Build a NumPy structured array from fetched row tuples. Nullable integer and boolean columns become float64 / object"""
+
+        arrays = []
+        for array in _columns_from_rows(rows, description, boolean_columns, self.conf.get("decimal_as_float", False)):
+            if isinstance(array, pd.api.extensions.ExtensionArray):
+                array = array.to_numpy(dtype=np.float64, na_value=np.nan) if array.dtype.kind in "iu" \
+                    else array.to_numpy(dtype=object, na_value=None)
+            arrays.append(array)
+
+        result = np.empty(len(rows), dtype=[(field[0], array.dtype) for field, array in zip(description, arrays)])
+        for field, array in zip(description, arrays):
+            result[field[0]] = array
+
+        return result
+
+    def _boolean_columns(self, table, description=None) -> set:
+        """
+        Names of the TINYINT(1) columns of table, the cursor description has no column length
+        so this needs the table definition. With a description, only looked up when the result has TINYINT columns.
+        """
+
+        if description is not None and not any(field[1] == FieldType.TINY for field in description):
+            return set()
+
+        return _boolean_names(self._table_columns(table))
+
+    def _table_columns(self, table) -> dict:
+        """describe() of table, empty when there´s no table (a query) or it can´t be described"""
+
+        if not table:
+            return {}
+        try:
+            return self.describe(table)
+        except mysql.Error:
+            return {}
     
+    @instrumented
     def createTable(self, table, data : pd.DataFrame, key_field : str = None):
         """
         create a new table in the database using a DataFrame as the base.
@@ -536,6 +2678,12 @@ class MysqlWrap:
             print("table {0} already exists in the database".format(table))
             return 
 
+        # create table
+        return self.query(self._serialize_create_table(table, data, key_field))
+
+    def _serialize_create_table(self, table, data : pd.DataFrame, key_field : str = None) -> str:
+        """Format the CREATE TABLE statement of createTable()"""
+
         # extract datatypes from pandas <- how to understand that some columns might be jsons?
         # map keys and datatypes to mysql datatypes
         keys = [setMySqlFieldName(key)  for key in  data.keys()]
@@ -547,26 +2695,81 @@ class MysqlWrap:
             datatypes = ["INT NOT NULL PRIMARY KEY AUTO_INCREMENT"] + datatypes
 
         # serialize data from dataframe
-        sql = "CREATE TABLE {0} ({1})".format(table, ",".join([" ".join((key, datatype)) for key, datatype in zip(keys, datatypes)]))
-
-        # create table
-        return self.query(sql)
+        return "CREATE TABLE {0} ({1})".format(table, ",".join([" ".join((key, datatype)) for key, datatype in zip(keys, datatypes)]))
     
-    def syncColumns(self, table, data : pd.DataFrame): #, key_field : str = None):
+    @instrumented
+    def syncColumns(self, table, data : pd.DataFrame, online : bool = False, dry_run : bool = False,
+                    chunk_rows : int = COPY_CHUNK_ROWS, progress=None): #, key_field : str = None):
         """
         Checks that all the fields in the source DataFrame match the fields in the target Table.
         Checks for name, adding missing fields, and datatype, changing mismatched types. 
         Currently doesn´t change the primary key or its parameters, nor removes columns from the target Table which might be
         missing in the source DataFrame. 
+        The change is planned so that writes to the table aren´t blocked when the server allows it:
+        columns are added with ALGORITHM=INSTANT (MySQL 8.0.12+, MariaDB 10.3+) or INPLACE, LOCK=NONE,
+        VARCHAR columns are widened INPLACE, LOCK=NONE, and a statement the server refuses falls back to the next option.
+        Other type changes need a copy of the table, which blocks writes while it runs.
+        parameters:
+            table: name of the target table
+            data: the source DataFrame
+            online: run the changes needing a copy as a shadow table migration instead, see _shadow_migrate():
+                    a new table is created with the changes, kept in sync by triggers while the rows are copied
+                    in chunks of chunk_rows primary keys, then swapped in with an atomic RENAME TABLE.
+                    Needs a single column primary key and the TRIGGER privilege
+            dry_run: only return the plan, without changing anything
+            progress: callable called after every chunk of a shadow table copy, see copyTable()
+        returns the plan, a dict with the columns added and changed, the strategy ("instant", "inplace", "copy" or "shadow"),
+        whether writes are blocked, the estimated rows and bytes of the table, the chunks of a shadow copy and the statements
+        (the INSERT ... SELECT of a shadow copy runs once per chunk),
+        None when the table already matches the frame
         """
         # todo: check for primary keys, and sync primary keys. 
-         
+
+        changes = self._sync_columns_changes(table, data, self.describe(table))
+        if changes is None:
+            return
+
+        plan = self._plan_sync_columns(table, *changes, online, chunk_rows)
+        if dry_run:
+            return plan
+
+        logger.info("syncing columns of %s: %s, %s", table, plan["strategy"],
+                    "blocking writes" if plan["blocks_writes"] else "not blocking writes")
+
+        for position, (alterations, options) in enumerate(plan["steps"]):
+            if plan["strategy"] == "shadow":
+                self._shadow_migrate(table, alterations, chunk_rows, progress)
+                break
+            try:
+                self.query("ALTER TABLE %s %s" % (table, " , ".join(alterations + options)))
+            except mysql.Error as e:
+                if not options or e.errno not in ONLINE_DDL_REFUSED:
+                    raise
+                # the server can´t run it online, apply what is left with a copy
+                remaining = [alteration for step, _ in plan["steps"][position:] for alteration in step]
+                logger.warning("the server refused %s on %s, falling back to a %s: %s", ", ".join(options), table,
+                               "shadow table migration" if online else "copy", e)
+                plan.update(strategy="shadow" if online else "copy", blocks_writes=not online, fallback=True)
+                if online:
+                    self._shadow_migrate(table, remaining, chunk_rows, progress)
+                else:
+                    self.query("ALTER TABLE %s %s" % (table, " , ".join(remaining)))
+                break
+
+        return plan
+
+    def _sync_columns_changes(self, table, data : pd.DataFrame, dest_columns : dict):
+        """
+        Columns of the frame missing from the table, [(name, type)], and columns whose type has to be widened,
+        [(name, current type, new type)], or None when the table already matches the frame
+        """
+
         keys = data.keys()
-        datatypes = self._serialize_datatypes(data)
+        datatypes = self._infer_datatypes(data)
 
         source_columns = { setMySqlFieldName(key) : 
                      {"Field" : setMySqlFieldName(key),                      
-                      "Type" : str(datatype).split()[0],}
+                      "Type" : datatype,}
                                               for key, datatype in zip(keys, datatypes) }
         
         """ # we don´t need the other parameters until syncing key_field is implemented.                        
@@ -575,12 +2778,12 @@ class MysqlWrap:
                         "Default" : None,
                         "Extra" : ""
                         """
-       
-        dest_columns = self.describe(table)
-
-        sql = "ALTER TABLE {0} ".format(table)
 
         missing_keys = list(set(source_columns.keys()) - set(dest_columns.keys()))
+
+        # columns are only widened, to a type which holds both the existing and the new values
+        for key in set(dest_columns.keys()).intersection(set(source_columns.keys())):
+            source_columns[key]["Type"] = _merge_datatype(source_columns[key]["Type"], dest_columns[key]["Type"])
         mismatched_fields = [key for key 
                              in list(set(dest_columns.keys()).intersection(set(source_columns.keys() )))
                              if source_columns[key]["Type"] != dest_columns[key]["Type"]]
@@ -592,7 +2795,6 @@ class MysqlWrap:
         # adds missing keys
         if len(missing_keys) > 0:
             print("destination is missing these fields {0}".format(missing_keys))
-            sql += " , ".join(["ADD COLUMN {0} {1} NULL".format(key, source_columns[key]["Type"],) for key in missing_keys])
         else:
             print("all fields are already defined in the destination")
                 
@@ -602,42 +2804,250 @@ class MysqlWrap:
                 ["Field name: {0} from type {1} to type {2}".format(
             key, dest_columns[key]["Type"], source_columns[key]["Type"]) for key in mismatched_fields]
             ))) 
-            sql += " , ".join(["CHANGE COLUMN {0} {0} {1} NULL".format(key, source_columns[key]["Type"]) for key in mismatched_fields])
         else:
             print("all fields have matching types")
 
-        return self.query(sql)
+        return ([(key, source_columns[key]["Type"]) for key in missing_keys],
+                [(key, dest_columns[key]["Type"], source_columns[key]["Type"]) for key in mismatched_fields])
+
+    def _serialize_sync_columns(self, table, data : pd.DataFrame, dest_columns : dict):
+        """Format the ALTER TABLE statement of syncColumns(), None when the table already matches the frame"""
+
+        changes = self._sync_columns_changes(table, data, dest_columns)
+        if changes is None:
+            return
 
-    def insertFromDataFrame(self, table, data : pd.DataFrame, syncColumns : bool = False):
+        added, changed = changes
+        alterations = ["ADD COLUMN {0} {1} NULL".format(key, datatype) for key, datatype in added]
+        alterations += ["CHANGE COLUMN {0} {0} {1} NULL".format(key, datatype) for key, _, datatype in changed]
+
+        return "ALTER TABLE {0} ".format(table) + " , ".join(alterations)
+
+    def _plan_sync_columns(self, table, added, changed, online : bool = False, chunk_rows : int = COPY_CHUNK_ROWS) -> dict:
+        """
+        Plan of syncColumns(): steps are (alterations, ALGORITHM and LOCK options) run as one ALTER TABLE each,
+        or the alterations of a shadow table migration
+        """
+
+        version, mariadb = self._server_version()
+        instant_add = version >= ((10, 3) if mariadb else (8, 0, 12))
+
+        add = ["ADD COLUMN {0} {1} NULL".format(key, datatype) for key, datatype in added]
+        inplace = ["CHANGE COLUMN {0} {0} {1} NULL".format(key, new) for key, old, new in changed if _inplace_change(old, new)]
+        copy = ["CHANGE COLUMN {0} {0} {1} NULL".format(key, new) for key, old, new in changed if not _inplace_change(old, new)]
+
+        if copy:
+            steps = [(add + inplace + copy, [])]
+            strategy = "shadow" if online else "copy"
+        else:
+            steps = []
+            if add:
+                steps.append((add, ["ALGORITHM=INSTANT"] if instant_add else ["ALGORITHM=INPLACE", "LOCK=NONE"]))
+            if inplace:
+                steps.append((inplace, ["ALGORITHM=INPLACE", "LOCK=NONE"]))
+            strategy = "instant" if instant_add and not inplace else "inplace"
+
+        size = self.query("SELECT TABLE_ROWS, DATA_LENGTH + INDEX_LENGTH FROM information_schema.TABLES "
+                          "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s", (table,)).fetchone() or (0, 0)
+        rows, size = int(size[0] or 0), int(size[1] or 0)
+        chunks = -(-rows // chunk_rows) if strategy == "shadow" else 0
+
+        if strategy == "shadow":
+            # the copy statement runs once per chunk, with the bounds of its keys
+            shadow = self._shadow_statements(table, steps[0][0])
+            sql = shadow["setup"] + [shadow["copy"]] + shadow["swap"]
+        else:
+            sql = ["ALTER TABLE %s %s" % (table, " , ".join(alterations + options)) for alterations, options in steps]
+
+        return {"table" : table,
+                "add" : dict(added),
+                "change" : {key : (old, new) for key, old, new in changed},
+                "strategy" : strategy,
+                "blocks_writes" : strategy == "copy",
+                # instant changes only touch the table definition, adding columns in place rebuilds the table
+                "rewrites_table" : bool(copy) or (bool(add) and not instant_add),
+                "rows" : rows,
+                "bytes" : size,
+                "chunks" : chunks,
+                "steps" : steps,
+                "sql" : sql,
+                "fallback" : False}
+
+    def _shadow_migrate(self, table, alterations, chunk_rows : int = COPY_CHUNK_ROWS, progress=None):
+        """
+        Apply alterations without blocking writes to table: the alterations are applied to an empty copy of the table,
+        triggers replay every write to table on the copy, the rows are copied in chunks of primary keys skipping
+        those already written by the triggers, and the copy replaces the table with an atomic RENAME TABLE.
+        """
+
+        shadow = self._shadow_statements(table, alterations)
+
+        def cleanup():
+            for sql in shadow["cleanup"]:
+                self.query(sql)
+
+        # leftovers of an interrupted migration
+        cleanup()
+        try:
+            for sql in shadow["setup"]:
+                self.query(sql)
+
+            self.copyTable(table, shadow["table"], columns=shadow["columns"], key_field=shadow["key_field"],
+                           chunk_rows=chunk_rows, ignore=True, progress=progress)
+
+            self.query(shadow["swap"][0])
+        except:
+            cleanup()
+            raise
+
+        # the triggers go with the old table
+        self.query(shadow["swap"][1])
+
+    def _shadow_statements(self, table, alterations) -> dict:
+        """
+        Statements of a shadow table migration of table, see _shadow_migrate(): setup creates the altered copy and its triggers,
+        copy is the INSERT ... SELECT copyTable() runs for every chunk of keys, swap renames the copy in and drops the old table,
+        cleanup removes the leftovers of a failed migration
+        """
+
+        key_fields = self._key_fields(table)
+        if len(key_fields) != 1:
+            raise ValueError("a shadow table migration needs a single column primary key, {0} has {1}".format(
+                table, key_fields or "none"))
+        key_field = key_fields[0]
+        columns = list(self.describe(table))
+
+        shadow = "_%s_new" % table
+        old = "_%s_old" % table
+        triggers = ["_%s_sync_%s" % (table, event) for event in ("ins", "upd", "del")]
+        fields = ",".join(columns)
+        new_values = ",".join("NEW." + column for column in columns)
+
+        return {"table" : shadow,
+                "key_field" : key_field,
+                "columns" : columns,
+                "setup" : ["CREATE TABLE %s LIKE %s" % (shadow, table),
+                           "ALTER TABLE %s %s" % (shadow, " , ".join(alterations)),
+                           "CREATE TRIGGER %s AFTER INSERT ON %s FOR EACH ROW REPLACE INTO %s (%s) VALUES (%s)" % (
+                               triggers[0], table, shadow, fields, new_values),
+                           "CREATE TRIGGER %s AFTER UPDATE ON %s FOR EACH ROW BEGIN DELETE FROM %s WHERE %s <=> OLD.%s; "
+                           "REPLACE INTO %s (%s) VALUES (%s); END" % (
+                               triggers[1], table, shadow, key_field, key_field, shadow, fields, new_values),
+                           "CREATE TRIGGER %s AFTER DELETE ON %s FOR EACH ROW DELETE FROM %s WHERE %s <=> OLD.%s" % (
+                               triggers[2], table, shadow, key_field, key_field)],
+                "copy" : "INSERT IGNORE INTO %s (%s) SELECT %s FROM %s WHERE %s > %%s AND %s <= %%s" % (
+                    shadow, fields, fields, table, key_field, key_field),
+                "swap" : ["RENAME TABLE %s TO %s, %s TO %s" % (table, old, shadow, table),
+                          "DROP TABLE %s" % old],
+                "cleanup" : ["DROP TRIGGER IF EXISTS %s" % trigger for trigger in triggers] + ["DROP TABLE IF EXISTS %s" % shadow]}
+
+    @instrumented
+    def insertFromDataFrame(self, table, data : pd.DataFrame, syncColumns : bool = False,
+                            chunk_rows : int = None, chunk_bytes : int = None, commit_every : int = None,
+                            local_infile : bool = False, workers : int = None):
         """
         Insert new rows in the target table, derived from the input dataframe. 
+        Rows are converted and sent in chunks (see insertBatch), so memory use doesn´t grow with the frame. 
         Might require commit afterwards. 
         parameters:
             table: name of the target table
             data: the source DataFrame
             updateColumns: boolean, if True will sync column names before inserting the new rows
+            chunk_rows: max number of rows per INSERT statement
+            chunk_bytes: max estimated size of each statement, defaults to half the server max_allowed_packet
+            commit_every: commit after every N chunks
+            local_infile: load the rows with LOAD DATA LOCAL INFILE instead, see loadDataFrame
+            workers: write the frame over this many connections at once, all or nothing, see writeParallel.
+                     Commits by itself
         """
         if syncColumns:
             self.syncColumns(table, data)
-        data = data.replace(np.nan, None)
-        records = data.to_dict(orient='records')
 
-        return self.insertBatch(table, records)
+        if workers:
+            return self.writeParallel(table, data, workers, chunk_rows=chunk_rows, chunk_bytes=chunk_bytes)["rowcount"]
+
+        if local_infile:
+            return self.loadDataFrame(table, data, chunk_rows or INFILE_CHUNK_ROWS, commit_every)
 
+        return self._insert_chunks(table, list(data.keys()), _iter_frame_values(data), chunk_rows, chunk_bytes, commit_every)
 
-    def insertOrUpdateFromDataFrame(self, table, data : pd.DataFrame, key_field : str, syncColumns : bool = False):
+
+    @instrumented
+    def loadDataFrame(self, table, data : pd.DataFrame, chunk_rows : int = INFILE_CHUNK_ROWS, commit_every : int = None):
+        """
+        Fast bulk insert with LOAD DATA LOCAL INFILE, requires allow_local_infile=True in the connection options
+        and local_infile enabled on the server.
+        The frame is encoded as tab separated text one chunk at a time (NULL/NaN as \\N, booleans as 1/0,
+        datetimes as text, dicts/lists as JSON and bytes as hex, decoded with UNHEX()),
+        and each chunk is loaded from its own temporary file, so the whole frame is never written out at once.
+        Might require commit afterwards. 
+        parameters:
+            table: name of the target table
+            data: the source DataFrame
+            chunk_rows: number of rows per LOAD DATA statement
+            commit_every: commit after every N chunks
+        returns a dict with the rows loaded, the number of warnings and the first warning messages
+        """
+
+        # binary columns go through a user variable, UNHEX(NULL) is NULL
+        binary = [position for position in range(data.shape[1]) if _infile_binary(data.iloc[:, position])]
+        columns = ["@binary%d" % position if position in binary else key for position, key in enumerate(data.keys())]
+        assignments = ["%s = UNHEX(@binary%d)" % (data.keys()[position], position) for position in binary]
+
+        sql = ("LOAD DATA LOCAL INFILE %s INTO TABLE {0} CHARACTER SET utf8mb4 "
+               "FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' LINES TERMINATED BY '\\n' ({1}){2}").format(
+                   table, ",".join(columns), " SET " + ",".join(assignments) if assignments else "")
+
+        result = {"rows" : 0, "warnings" : 0, "messages" : []}
+        chunks = 0
+        with self.connection():
+            for start in range(0, len(data), chunk_rows):
+                text = _infile_text(data.iloc[start:start + chunk_rows], binary)
+
+                infile = tempfile.NamedTemporaryFile("w", encoding="utf-8", suffix=".tsv", delete=False)
+                try:
+                    with infile:
+                        infile.write(text)
+                    del text
+                    cur = self.query(sql, (infile.name,))
+                finally:
+                    os.remove(infile.name)
+
+                result["rows"] += cur.rowcount
+                if cur.warning_count:
+                    result["warnings"] += cur.warning_count
+                    if len(result["messages"]) < 10:
+                        result["messages"] += [row[2] for row in self.query("SHOW WARNINGS LIMIT 10").fetchall()]
+
+                chunks += 1
+                if commit_every and chunks % commit_every == 0:
+                    self.commit()
+
+        return result
+
+    @instrumented
+    def insertOrUpdateFromDataFrame(self, table, data : pd.DataFrame, key_field : str, syncColumns : bool = False,
+                                    chunk_rows : int = None, chunk_bytes : int = None, commit_every : int = None,
+                                    insert_missing : bool = False, workers : int = None):
         """
         Will try to update records in the dataframe if rows already exists matching the value of the key_field.
-        If the key_field is not a unique value or part of the primary key it will run an update query with a 
-        "where" condition for each row, so it can get slow. 
+        If the key_field is a unique value or part of the primary key the rows are sent in chunks of multi row
+        INSERT ... ON DUPLICATE KEY UPDATE statements, and a dict with rowcount, rows, inserted, updated and unchanged
+        counts is returned (see insertOrUpdateBatch).
+        If the key_field is not a unique value or part of the primary key the frame is loaded in a temporary
+        staging table and a single UPDATE ... JOIN is run against it, which is fast if key_field is indexed. 
         In this case it will update *all* rows which fulfill the condition, in case
-        the values repeat. 
+        the values repeat, and rows with new keys are only inserted if insert_missing is True. 
         Might require commit. 
         parameters:
             table: name of the target table
             data: the source DataFrame
             key_field : name of the source column to use to upgrade rows
             updateColumns: boolean, if True will sync column names before inserting the new rows            
+            chunk_rows, chunk_bytes, commit_every: chunking of the upsert statements, see insertBatch
+            insert_missing: for non unique keys, also insert the rows whose key is not in the table
+            workers: for unique keys, upsert the frame over this many connections at once, partitioned by key hash,
+                     all or nothing, see writeParallel. Commits by itself
         """
 
         if syncColumns:
@@ -648,21 +3058,318 @@ class MysqlWrap:
             return print ("could not find key_field {0} in the target table")
         
         target_key_field = target_description[key_field]
-        data = data.replace(np.nan, None)
-        records = data.to_dict(orient='records')
         # check if key used as key_field is primary or unique
         if target_key_field["Key"].lower() in ["pri", "uni"]:
-            return [self.insertOrUpdate(table, record, key_field) for record in records]
+            if workers:
+                result = self.writeParallel(table, data, workers, mode="upsert", key_field=key_field,
+                                            chunk_rows=chunk_rows, chunk_bytes=chunk_bytes)
+                return {count : result[count] for count in ("rowcount", "rows", "inserted", "updated", "unchanged")}
+            return self._upsert_chunks(table, list(data.keys()), _iter_frame_values(data), key_field,
+                                       chunk_rows, chunk_bytes, commit_every)
+
+        # if not, load the frame in a temporary table and update with a single join
+        return self._update_from_staging(table, data, key_field, insert_missing, chunk_rows, chunk_bytes)
+
+    def _update_from_staging(self, table, data : pd.DataFrame, key_field : str, insert_missing : bool = False,
+                             chunk_rows : int = None, chunk_bytes : int = None):
+        """
+        Update the rows of table matching key_field through a temporary staging table:
+        the frame is bulk loaded in the staging table, then one UPDATE ... JOIN updates *all* matching rows,
+        and optionally one INSERT ... SELECT adds the rows whose key is not in the table yet.
+        """
+
+        columns = list(data.keys())
+        staging, statements = _staging_statements(table, columns, key_field)
+
+        # temporary tables live on one connection, and creating or dropping them doesn´t commit
+        with self.connection():
+            self.query(statements["drop"])
+            self.query(statements["create"])
+            try:
+                rows = self._insert_chunks(staging, columns, _iter_frame_values(data), chunk_rows, chunk_bytes)
+
+                updated = self.query(statements["update"]).rowcount
+
+                inserted = 0
+                if insert_missing:
+                    inserted = self.query(statements["insert"]).rowcount
+            finally:
+                self.query(statements["drop"])
+
+        return {"rowcount" : updated + inserted, "rows" : rows, "inserted" : inserted, "updated" : updated, "unchanged" : None}
+
+    @instrumented
+    def syncFromDataFrame(self, table, data : pd.DataFrame, key_field : str, delete_missing : bool = False,
+                          syncColumns : bool = False, chunk_rows : int = None, chunk_bytes : int = None,
+                          commit_every : int = None):
+        """
+        Write only the rows of the dataframe which are new or changed.
+        The server sends the key and a hash of the other columns of every row of the table, which are compared
+        with the same hash of the rows of the frame: rows with a new key are inserted, rows whose hash differs are updated
+        (see insertOrUpdateFromDataFrame) and the others are not sent at all.
+        Might require commit. 
+        parameters:
+            table: name of the target table
+            data: the source DataFrame
+            key_field : name of the source column to use to match rows
+            delete_missing: also delete the rows of the table whose key is not in the frame
+            syncColumns: boolean, if True will sync column names before comparing the rows
+            chunk_rows, chunk_bytes, commit_every: chunking of the statements, see insertBatch
+        returns a dict with the rowcount, rows, inserted, updated, deleted and unchanged counts
+        """
+
+        if syncColumns:
+            self.syncColumns(table, data)
+
+        target_description = self.describe(table)
+        if key_field not in target_description.keys():
+            raise ValueError("could not find key_field {0} in the target table".format(key_field))
+
+        columns = [column for column in data.keys() if column in target_description and column != key_field]
+
+        with self._stream_cursor(_fingerprint_sql(table, key_field, columns)) as cur:
+            existing = self._rows_to_frame(cur.fetchall(), cur.description)
+        existing.columns = [key_field, "_fingerprint"]
+        existing["_fingerprint"] = existing["_fingerprint"].map(_text)
+        # a repeated key is only unchanged if all its rows are
+        existing = existing.drop_duplicates()
+        existing.loc[existing.duplicated(key_field, keep=False), "_fingerprint"] = None
+        existing = existing.drop_duplicates(key_field)
+
+        source = pd.DataFrame({key_field : data[key_field].to_numpy(),
+                               "_source" : _row_fingerprints(data[columns], [target_description[column]["Type"]
+                                                                             for column in columns])})
+        merged = source.merge(existing, on=key_field, how="left", indicator=True)
+
+        new = (merged["_merge"] == "left_only").to_numpy()
+        changed = ~new & (merged["_source"] != merged["_fingerprint"]).to_numpy()
+
+        rowcount = 0
+        if target_description[key_field]["Key"].lower() in ["pri", "uni"]:
+            if (new | changed).any():
+                rowcount += self._upsert_chunks(table, list(data.keys()), _iter_frame_values(data[new | changed]), key_field,
+                                                chunk_rows, chunk_bytes, commit_every, count_changes=False)["rowcount"]
+        else:
+            if changed.any():
+                rowcount += self._update_from_staging(table, data[changed], key_field, False, chunk_rows, chunk_bytes)["rowcount"]
+            if new.any():
+                rowcount += self._insert_chunks(table, list(data.keys()), _iter_frame_values(data[new]),
+                                                chunk_rows, chunk_bytes, commit_every)
+
+        deleted = 0
+        if delete_missing:
+            missing = existing[key_field][~existing[key_field].isin(data[key_field])].tolist()
+            for start in range(0, len(missing), DELETE_CHUNK_KEYS):
+                keys = missing[start:start + DELETE_CHUNK_KEYS]
+                deleted += self.query("DELETE FROM %s WHERE %s IN (%s)" % (table, key_field, ",".join(repeat("%s", len(keys)))),
+                                      keys).rowcount
+            rowcount += deleted
+
+        return {"rowcount" : rowcount, "rows" : len(data), "inserted" : int(new.sum()), "updated" : int(changed.sum()),
+                "deleted" : deleted, "unchanged" : int(len(data) - new.sum() - changed.sum())}
+
+    @instrumented
+    def copyTable(self, src, dst, where=None, columns=None, key_field : str = None, chunk_rows : int = COPY_CHUNK_ROWS,
+                  resume : bool = False, progress=None, ignore : bool = False):
+        """
+        Copy the rows of src to dst without moving them through python: if dst doesn´t exist it is created with
+        CREATE TABLE ... LIKE (dropping the columns not copied), then the rows are copied with INSERT ... SELECT
+        in chunks of chunk_rows consecutive keys, committing after each one, so a large copy doesn´t run as a single
+        huge transaction. Chunks are copied in key order, so an interrupted copy can be resumed from the largest key in dst.
+        parameters:
+            src: name of the source table
+            dst: name of the destination table
+            where = ("parameterizedstatement", [parameters]), copy only the matching rows
+            columns: list of the columns to copy, all by default. Must include the key
+            key_field: a unique and indexed column to split the chunks by, defaults to the primary key
+            chunk_rows: number of rows per chunk
+            resume: skip the keys up to the largest key already in dst
+            progress: callable called after every chunk with a dict of the chunks, rows and seconds so far and the last key copied
+            ignore: skip the rows whose key is already in dst (INSERT IGNORE)
+        returns a dict with the chunks, rows, seconds and last key copied
+        """
+
+        src_columns = self.describe(src)
+        if key_field is None:
+            key_fields = self._key_fields(src)
+            if len(key_fields) != 1:
+                raise ValueError("table {0} has no single column primary key, pass a key_field".format(src))
+            key_field = key_fields[0]
+        columns = list(columns) if columns else list(src_columns)
+        if key_field not in columns:
+            raise ValueError("the copied columns must include the key {0}".format(key_field))
+
+        if not self.tableExist(dst):
+            self.query("CREATE TABLE %s LIKE %s" % (dst, src))
+            dropped = [column for column in src_columns if column not in columns]
+            if dropped:
+                self.query("ALTER TABLE %s %s" % (dst, ", ".join("DROP COLUMN %s" % column for column in dropped)))
+
+        fields = ",".join(columns)
+        clause = lambda conditions : " WHERE " + " AND ".join(conditions) if conditions else ""
+        conditions = ["(%s)" % where[0]] if where else []
+        params = list(where[1]) if where and len(where) > 1 else []
+
+        last = None
+        if resume:
+            last = self.query("SELECT MAX(%s) FROM %s" % (key_field, dst)).fetchone()[0]
+
+        started = time.perf_counter()
+        result = {"chunks" : 0, "rows" : 0, "seconds" : 0.0, "last_key" : last}
+        with self.connection():
+            while True:
+                chunk_conditions = conditions + (["%s > %%s" % key_field] if last is not None else [])
+                chunk_params = params + ([last] if last is not None else [])
+
+                # the last key of the chunk, None when the rest of the table fits in it
+                sql = "SELECT %s FROM %s%s ORDER BY %s LIMIT 1 OFFSET %d" % (
+                    key_field, src, clause(chunk_conditions), key_field, chunk_rows - 1)
+                upper = self.query(sql, chunk_params).fetchone()
+                if upper is not None:
+                    chunk_conditions = chunk_conditions + ["%s <= %%s" % key_field]
+                    chunk_params = chunk_params + [upper[0]]
+
+                sql = "INSERT %sINTO %s (%s) SELECT %s FROM %s%s" % (
+                    "IGNORE " if ignore else "", dst, fields, fields, src, clause(chunk_conditions))
+                copied = self.query(sql, chunk_params).rowcount
+                self.commit()
+
+                result["chunks"] += 1
+                result["rows"] += max(copied, 0)
+                result["seconds"] = time.perf_counter() - started
+                if upper is not None:
+                    last = result["last_key"] = upper[0]
+                elif copied > 0:
+                    result["last_key"] = self.query("SELECT MAX(%s) FROM %s%s" % (key_field, src, clause(chunk_conditions)),
+                                                    chunk_params).fetchone()[0]
+                if progress is not None:
+                    progress(dict(result))
+                if upper is None:
+                    break
+
+        return result
+
+    @instrumented
+    def writeParallel(self, table, data : pd.DataFrame, workers : int = 4, mode : str = "insert", key_field=None,
+                      partition : str = None, chunk_rows : int = None, chunk_bytes : int = None, commit_every : int = None,
+                      atomic : bool = True, executor : str = "thread"):
+        """
+        Insert or upsert a DataFrame over several connections at once. The frame is split in one partition per worker,
+        and every partition is converted and sent by its own thread or process on its own connection,
+        so building the statements is no longer bound to a single thread.
+        Commits by itself, the partitions can´t share a transaction. 
+        parameters:
+            table: name of the target table
+            data: the source DataFrame
+            workers: number of partitions, written concurrently
+            mode: "insert", or "upsert" for INSERT ... ON DUPLICATE KEY UPDATE on key_field (a primary or unique key)
+            key_field: name, or list of names, of the key columns, required for upserts and hash partitioning
+            partition: "rows" for contiguous row ranges, "hash" to send all the rows of a key to the same partition,
+                       so concurrent upserts don´t lock each other´s rows. Defaults to "hash" for upserts
+            chunk_rows, chunk_bytes: chunking of the statements, see insertBatch
+            commit_every: commit every N chunks, only when atomic is False
+            atomic: if True, every partition waits for the others to be written, then all commit or, if any failed
+                    to write, all roll back and the first error is raised.
+                    The commits themselves are still one per connection: if a commit fails (eg the connection drops)
+                    after others went through, those partitions stay committed. The raised error then carries
+                    the summary as its result attribute, with committed_partitions listing them.
+                    If False every partition commits on its own and errors are only reported in the result
+            executor: "thread", or "process" to escape the GIL for very large frames (each process opens its own connection)
+        returns a dict with the rows, rowcount, committed flag, committed_partitions and seconds taken,
+        and the timing and error of each partition
+        """
+
+        if mode not in ("insert", "upsert"):
+            raise ValueError("mode must be 'insert' or 'upsert', not {0}".format(mode))
+        if executor not in ("thread", "process"):
+            raise ValueError("executor must be 'thread' or 'process', not {0}".format(executor))
+        key_fields = [key_field] if isinstance(key_field, str) else list(key_field or ())
+        if mode == "upsert" and not key_fields:
+            raise ValueError("upserts need a key_field")
+        partition = partition or ("hash" if mode == "upsert" else "rows")
+        if partition == "hash" and not key_fields:
+            raise ValueError("hash partitioning needs a key_field")
+        if atomic and commit_every:
+            raise ValueError("commit_every can´t be used with atomic writes")
+
+        started = time.perf_counter()
+        partitions = [frame for frame in _partition_frame(data, max(workers, 1), key_fields if partition == "hash" else None)
+                      if len(frame)]
+        if not partitions:
+            summary = {"rows" : 0, "rowcount" : 0, "committed" : True, "committed_partitions" : [],
+                       "seconds" : time.perf_counter() - started, "partitions" : []}
+            if mode == "upsert":
+                summary.update(inserted=0, updated=0, unchanged=0)
+            return summary
+        if chunk_bytes is None:
+            chunk_bytes = self._max_allowed_packet() // 2
+
+        if executor == "process":
+            manager = multiprocessing.Manager()
+            pool = ProcessPoolExecutor(max_workers=len(partitions))
+            barrier = manager.Barrier(len(partitions)) if atomic else None
+            failed = manager.Event()
+            wrap = None
+        else:
+            manager = None
+            pool = ThreadPoolExecutor(max_workers=len(partitions))
+            barrier = threading.Barrier(len(partitions)) if atomic else None
+            failed = threading.Event()
+            # a pool with a free connection per partition is shared, otherwise every thread opens its own
+            wrap = self if self.pool is not None and \
+                self.pool.max_size - self.pool.stats()["in_use"] >= len(partitions) else None
+
+        conf = self._worker_conf(executor)
+        try:
+            with pool:
+                futures = [pool.submit(_write_partition, wrap, conf, index, table, frame, mode, key_field,
+                                       chunk_rows, chunk_bytes, commit_every, barrier, failed)
+                           for index, frame in enumerate(partitions)]
+                results = [future.result() for future in futures]
+        finally:
+            if manager is not None:
+                manager.shutdown()
+            # worker processes can´t reach the results cache of this wrapper
+            if self.result_cache is not None:
+                self.result_cache.invalidate(table)
+
+        errors = [result["error"] for result in results if result["error"] is not None]
+        summary = {"rows" : sum(result["rows"] for result in results),
+                   "rowcount" : sum(result["rowcount"] for result in results),
+                   "committed" : all(result["committed"] for result in results),
+                   "committed_partitions" : [result["partition"] for result in results if result["committed"]],
+                   "seconds" : time.perf_counter() - started,
+                   "partitions" : results}
+        if mode == "upsert":
+            for count in ("inserted", "updated", "unchanged"):
+                summary[count] = sum(result.get(count) or 0 for result in results)
+
+        if errors:
+            logger.warning("%s of %s partitions failed: %s", len(errors), len(results), errors[0])
+            if atomic:
+                if summary["committed_partitions"]:
+                    logger.error("partitions %s were committed before the failure", summary["committed_partitions"])
+                errors[0].result = summary
+                raise errors[0]
+
+        return summary
+
+    def _worker_conf(self, executor : str = "thread", replicas : bool = False) -> dict:
+        """
+        Options for a wrapper of its own in a worker, with a single connection, sharing the schema cache and instrumentation between threads.
+        Only workers reading with replicas set get the read replicas, the others would open replica pools they never use.
+        """
 
-        # if not needs to run an update with a where condition
-        # a bit dangerous - make it a separate method?
-        return [self.update(table, record, where= ["{0} = {1}".format(key_field, 
-                                                                      "\"{0}\"".format(record[key_field]) 
-                                                                      if target_key_field["Type"].startswith("VARCHAR") 
-                                                                       else record[key_field] )] ) 
-                                                                       for record in records]
+        conf = {key : value for key, value in self.conf.items() if key not in ("schema_cache", "result_cache", "instrumentation")}
+        conf.update(pool_size=None, schema_cache_preload=False)
+        if not replicas:
+            conf["replicas"] = None
+        if executor == "thread":
+            conf.update(schema_cache=self.schema_cache, result_cache=self.result_cache, instrumentation=self.instrumentation)
+        return conf
 
-    def createInsertTable(self, table, data : pd.DataFrame, key_field : str = None, updateColumns : bool = False):
+    def createInsertTable(self, table, data : pd.DataFrame, key_field : str = None, updateColumns : bool = False,
+                          local_infile : bool = False, workers : int = None):
         """
         If it doesn´t exists, creates a new table, using the columns and dataypes in the DataFrame to create fields. 
         If no key_field is specified, creates an "id" field types as Integer as the primary key. 
@@ -673,19 +3380,22 @@ class MysqlWrap:
             table: name of the target table
             data: the source DataFrame
             updateColumns: boolean, if True will sync column names before inserting the new rows
+            local_infile: boolean, if True loads the rows with LOAD DATA LOCAL INFILE, see loadDataFrame
+            workers: write over this many connections at once, see writeParallel
         """
 
         if not self.tableExist(table):
             self.createTable(table, data, key_field)
-        return self.insertFromDataFrame(table, data, updateColumns)
+        return self.insertFromDataFrame(table, data, updateColumns, local_infile=local_infile, workers=workers)
     
-    def createUpdateTable(self, table, data : pd.DataFrame, key_field, updateColumns : bool = False):
+    def createUpdateTable(self, table, data : pd.DataFrame, key_field, updateColumns : bool = False, workers : int = None,
+                          delta : bool = False, delete_missing : bool = False):
         """
         If it doesn´t exists, creates a new table, using the columns and dataypes in the DataFrame to create fields. 
 
         Will try to update records in the dataframe if rows already exists matching the value of the key_field.
-        If the key_field is not a unique value or part of the primary key it will run an update query with a 
-        "where" condition for each row, so it can get slow. In this case it will update *all* rows which fulfill the condition, in case
+        If the key_field is not a unique value or part of the primary key it will update through a temporary staging table
+        (see insertOrUpdateFromDataFrame). In this case it will update *all* rows which fulfill the condition, in case
         the values repeat. 
         Might require commit. 
         parameters:
@@ -693,9 +3403,14 @@ class MysqlWrap:
             data: the source DataFrame
             key_field : name of the source column to use to upgrade rows
             updateColumns: boolean, if True will sync column names before inserting the new rows            
+            workers: for unique keys, upsert over this many connections at once, see writeParallel
+            delta: only write the new and changed rows of an existing table, see syncFromDataFrame
+            delete_missing: with delta, also delete the rows whose key is not in the frame
         """
 
         if not self.tableExist(table):
             self.createTable(table, data, key_field)
-        return self.insertOrUpdateFromDataFrame(table, data, key_field, updateColumns)
+        elif delta:
+            return self.syncFromDataFrame(table, data, key_field, delete_missing, updateColumns)
+        return self.insertOrUpdateFromDataFrame(table, data, key_field, updateColumns, workers=workers)
 
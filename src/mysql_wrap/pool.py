@@ -0,0 +1,224 @@
+import threading
+import time
+from collections import deque
+
+import mysql.connector as mysql
+
+
+"""
+    A small thread safe connection pool used by MysqlWrap when it is created with pool_size.
+
+    Connections are created lazily through a factory callable, handed out with checkout()
+    and given back with checkin(). Idle connections are reused last in, first out, so the
+    warmest socket is used first, and pinged before reuse when they have been idle for a while.
+"""
+
+
+class _PoolBase:
+    """
+    Bookkeeping shared by ConnectionPool and the asyncio AsyncConnectionPool, which only add their lock
+    and the (awaited) connection calls. The underscore methods expect the pool lock to be held.
+    See ConnectionPool for the parameters.
+    """
+
+    def __init__(self, factory, size : int = 5, max_overflow : int = 0, max_idle : int = None,
+                 timeout : float = None, ping_after : float = 1.0):
+        if size < 1:
+            raise ValueError("pool size must be at least 1")
+
+        self._factory = factory
+        self.size = size
+        self.max_overflow = max(max_overflow or 0, 0)
+        self.max_idle = size if max_idle is None else max_idle
+        self.timeout = timeout
+        self.ping_after = ping_after
+
+        self._idle = deque()
+        self._open = 0
+        self._in_use = 0
+        self._closed = False
+
+        self._counters = {"checkouts" : 0,
+                          "created" : 0,
+                          "reused" : 0,
+                          "discarded" : 0,
+                          "waits" : 0,
+                          "timeouts" : 0}
+
+    @property
+    def max_size(self) -> int:
+        return self.size + self.max_overflow
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def stats(self) -> dict:
+        """Snapshot of the pool state and counters"""
+        stats = {"size" : self.size,
+                 "max_size" : self.max_size,
+                 "open" : self._open,
+                 "in_use" : self._in_use,
+                 "idle" : len(self._idle)}
+        stats.update(self._counters)
+        return stats
+
+    def _deadline(self):
+        return None if self.timeout is None else time.monotonic() + self.timeout
+
+    def _take(self):
+        """
+        Claim a connection: (conn, last_used) of an idle one, (None, None) when a new one can be opened,
+        None when the caller has to wait
+        """
+        if self._closed:
+            raise mysql.PoolError("connection pool is closed")
+        if self._idle:
+            slot = self._idle.pop()
+        elif self._open < self.max_size:
+            slot = (None, None)
+            self._open += 1
+        else:
+            return None
+
+        self._in_use += 1
+        self._counters["checkouts"] += 1
+        return slot
+
+    def _wait_time(self, deadline):
+        """Seconds left to wait for a connection, raises PoolError past the deadline"""
+        self._counters["waits"] += 1
+        remaining = None if deadline is None else deadline - time.monotonic()
+        if remaining is not None and remaining <= 0:
+            self._counters["timeouts"] += 1
+            raise mysql.PoolError("no connection available in the pool after {0} seconds".format(self.timeout))
+        return remaining
+
+    def _untake(self):
+        """Give up a claimed connection which couldn´t be opened"""
+        self._open -= 1
+        self._in_use -= 1
+
+    def _needs_ping(self, last_used) -> bool:
+        return self.ping_after is None or time.monotonic() - last_used >= self.ping_after
+
+    def _give_back(self, conn, healthy : bool) -> bool:
+        """Put a returned connection with the idle ones, False when it has to be closed instead"""
+        self._in_use -= 1
+        keep = healthy and not self._closed and len(self._idle) < self.max_idle \
+            and self._open <= self.size + self.max_overflow
+        if keep:
+            self._idle.append((conn, time.monotonic()))
+        else:
+            self._open -= 1
+        return keep
+
+    def _drop(self):
+        """Forget a broken checked out connection"""
+        self._in_use -= 1
+        self._open -= 1
+        self._counters["discarded"] += 1
+
+    def _drain(self) -> list:
+        """Close the pool, the idle connections to close are returned"""
+        self._closed = True
+        idle = [conn for conn, _ in self._idle]
+        self._idle.clear()
+        self._open -= len(idle)
+        return idle
+
+
+class ConnectionPool(_PoolBase):
+    """
+    A fixed or elastic set of mysql connections.
+
+    parameters:
+        factory = callable returning a new, open mysql connection
+        size = (int) number of connections the pool keeps around
+        max_overflow = (int) extra connections that can be opened under load, closed again once returned
+        max_idle = (int) max number of idle connections kept open, defaults to size
+        timeout = (float) seconds to wait for a free connection before raising PoolError, None waits forever
+        ping_after = (float) idle seconds after which a connection is pinged before it is reused
+    """
+
+    def __init__(self, factory, size : int = 5, max_overflow : int = 0, max_idle : int = None,
+                 timeout : float = None, ping_after : float = 1.0):
+        super().__init__(factory, size, max_overflow, max_idle, timeout, ping_after)
+        self._lock = threading.Condition()
+
+    def checkout(self):
+        """Get a live connection from the pool, opening a new one if allowed"""
+
+        deadline = self._deadline()
+
+        with self._lock:
+            slot = self._take()
+            while slot is None:
+                self._lock.wait(self._wait_time(deadline))
+                slot = self._take()
+        conn, last_used = slot
+
+        try:
+            if conn is not None and self._needs_ping(last_used) and not conn.is_connected():
+                self._close(conn)
+                with self._lock:
+                    self._counters["discarded"] += 1
+                conn = None
+            if conn is None:
+                conn = self._factory()
+                with self._lock:
+                    self._counters["created"] += 1
+            else:
+                with self._lock:
+                    self._counters["reused"] += 1
+        except:
+            with self._lock:
+                self._untake()
+                self._lock.notify()
+            raise
+
+        return conn
+
+    def checkin(self, conn):
+        """Give a connection back. Open transactions are rolled back before the connection is reused"""
+
+        healthy = True
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except mysql.Error:
+            healthy = False
+
+        with self._lock:
+            keep = self._give_back(conn, healthy)
+            self._lock.notify()
+
+        if not keep:
+            self._close(conn)
+
+    def discard(self, conn):
+        """Drop a broken connection instead of returning it to the pool"""
+        with self._lock:
+            self._drop()
+            self._lock.notify()
+        self._close(conn)
+
+    def stats(self) -> dict:
+        """Snapshot of the pool state and counters"""
+        with self._lock:
+            return super().stats()
+
+    def close(self):
+        """Close all idle connections, connections still checked out are closed when returned"""
+        with self._lock:
+            idle = self._drain()
+            self._lock.notify_all()
+
+        for conn in idle:
+            self._close(conn)
+
+    def _close(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
@@ -0,0 +1,204 @@
+import itertools
+import logging
+import threading
+import time
+
+import mysql.connector as mysql
+
+from .pool import ConnectionPool
+
+
+"""
+    Read replicas for MysqlWrap, used when it is created with replicas.
+
+    Every replica gets a ConnectionPool of its own. Reads are spread over the healthy replicas round robin,
+    or sent to the replica answering its health checks fastest. A replica that fails, or lags behind the primary
+    more than max_lag seconds, is evicted, and checked again before it gets reads after retry_after seconds.
+"""
+
+logger = logging.getLogger("mysql_wrap")
+
+BALANCE = ("round_robin", "latency")
+CHECK_INTERVAL = 5.0
+RETRY_AFTER = 30.0
+LATENCY_WEIGHT = 0.3
+# SHOW REPLICA STATUS from MySQL 8.0.22, SHOW SLAVE STATUS before
+REPLICA_STATUS = (("SHOW REPLICA STATUS", "Seconds_Behind_Source"), ("SHOW SLAVE STATUS", "Seconds_Behind_Master"))
+
+
+def _endpoint(spec) -> dict:
+    """Connection options of a replica, from "host", "host:port" or a dict of options overriding the primary ones"""
+    if isinstance(spec, dict):
+        return dict(spec)
+    host, _, port = str(spec).partition(":")
+    endpoint = {"host" : host}
+    if port:
+        endpoint["port"] = int(port)
+    return endpoint
+
+
+class ReplicaSet:
+    """
+    parameters:
+        factory = callable returning a new, open connection to the endpoint it is given
+        endpoints = list of replicas, "host", "host:port" or dicts of connection options
+        balance = "round_robin", or "latency" for the replica with the fastest health checks
+        max_lag = (float) seconds a replica can lag behind the primary, None skips the replication checks
+        check_interval = (float) seconds between the health checks of a replica
+        retry_after = (float) seconds an evicted replica waits before it is checked again
+        pool_size, pool_max_overflow, pool_timeout = pool of every replica, see ConnectionPool
+    """
+
+    def __init__(self, factory, endpoints, balance : str = "round_robin", max_lag : float = None,
+                 check_interval : float = CHECK_INTERVAL, retry_after : float = RETRY_AFTER,
+                 pool_size : int = 1, pool_max_overflow : int = 0, pool_timeout : float = None):
+        if balance not in BALANCE:
+            raise ValueError("balance must be 'round_robin' or 'latency', not {0}".format(balance))
+        if not endpoints:
+            raise ValueError("no replica endpoints")
+
+        self.balance = balance
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.retry_after = retry_after
+
+        self._replicas = []
+        for endpoint in map(_endpoint, endpoints):
+            pool = ConnectionPool(lambda endpoint=endpoint : factory(endpoint), size=pool_size or 1,
+                                  max_overflow=pool_max_overflow, timeout=pool_timeout)
+            self._replicas.append({"name" : "{0}:{1}".format(endpoint.get("host"), endpoint.get("port", "")).rstrip(":"),
+                                   "pool" : pool,
+                                   "healthy" : True,
+                                   "evicted_at" : None,
+                                   "checked_at" : None,
+                                   "latency" : None,
+                                   "lag" : None,
+                                   "error" : None,
+                                   "reads" : 0,
+                                   "failures" : 0})
+        self._turn = itertools.count()
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def checkout(self):
+        """(replica, connection) of the replica to read from, None when no replica can take reads"""
+
+        now = time.monotonic()
+        with self._lock:
+            if self._closed:
+                return None
+            candidates = [replica for replica in self._replicas
+                          if replica["healthy"] or now - replica["evicted_at"] >= self.retry_after]
+            if not candidates:
+                return None
+            if self.balance == "latency":
+                # replicas without a check yet come first, to get one
+                candidates.sort(key=lambda replica : replica["latency"] or 0.0)
+            else:
+                start = next(self._turn) % len(candidates)
+                candidates = candidates[start:] + candidates[:start]
+
+        for replica in candidates:
+            try:
+                conn = replica["pool"].checkout()
+            except mysql.PoolError:
+                # busy, not broken
+                continue
+            except mysql.Error as e:
+                self._evict(replica, e)
+                continue
+
+            if replica["healthy"] and replica["checked_at"] is not None and now - replica["checked_at"] < self.check_interval:
+                return replica, conn
+            try:
+                healthy = self._check(replica, conn)
+            except mysql.Error as e:
+                replica["pool"].discard(conn)
+                self._evict(replica, e)
+                continue
+            if healthy:
+                return replica, conn
+            replica["pool"].checkin(conn)
+
+        return None
+
+    def checkin(self, replica, conn, error : Exception = None):
+        """Give the connection of a read back, an error evicts the replica"""
+        if error is None:
+            replica["pool"].checkin(conn)
+            with self._lock:
+                replica["reads"] += 1
+            return
+        replica["pool"].discard(conn)
+        self._evict(replica, error)
+
+    def stats(self) -> list:
+        """State, latency, lag and counters of every replica"""
+        with self._lock:
+            return [{key : replica[key] for key in ("name", "healthy", "latency", "lag", "error", "reads", "failures")}
+                    for replica in self._replicas]
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+        for replica in self._replicas:
+            replica["pool"].close()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def _check(self, replica, conn) -> bool:
+        """Time a round trip to the replica, and read its replication lag when max_lag is set. Raises on connection errors"""
+
+        started = time.perf_counter()
+        if self.max_lag is None:
+            conn.ping()
+            lag = None
+        else:
+            lag = self._lag(conn)
+        latency = time.perf_counter() - started
+
+        with self._lock:
+            replica["checked_at"] = time.monotonic()
+            replica["latency"] = latency if replica["latency"] is None else \
+                LATENCY_WEIGHT * latency + (1 - LATENCY_WEIGHT) * replica["latency"]
+            replica["lag"] = lag
+
+        if self.max_lag is not None and (lag is None or lag > self.max_lag):
+            self._evict(replica, "replication stopped" if lag is None else "lagging {0} seconds".format(lag))
+            return False
+
+        with self._lock:
+            if not replica["healthy"]:
+                logger.info("replica %s is back", replica["name"])
+            replica["healthy"] = True
+            replica["evicted_at"] = None
+            replica["error"] = None
+        return True
+
+    def _lag(self, conn):
+        """Seconds the replica is behind its source, None when it isn´t replicating"""
+
+        cur = conn.cursor(dictionary=True)
+        try:
+            for index, (statement, column) in enumerate(REPLICA_STATUS):
+                try:
+                    cur.execute(statement)
+                except mysql.ProgrammingError:
+                    if index == len(REPLICA_STATUS) - 1:
+                        raise
+                    continue
+                rows = cur.fetchall()
+                return rows[0].get(column) if rows else None
+        finally:
+            cur.close()
+
+    def _evict(self, replica, error):
+        with self._lock:
+            if replica["healthy"]:
+                logger.warning("replica %s evicted: %s", replica["name"], error)
+            replica["healthy"] = False
+            replica["evicted_at"] = time.monotonic()
+            replica["error"] = str(error)
+            replica["failures"] += 1
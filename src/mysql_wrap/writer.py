@@ -0,0 +1,230 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from .mysqlwrap import _estimate_row_size
+
+
+"""
+    Write behind buffering for MysqlWrap, for high rates of single row inserts.
+
+    Rows are queued per table and column set, and a background thread sends each queue as multi row
+    INSERT (or INSERT ... ON DUPLICATE KEY UPDATE) statements once it holds enough rows or bytes, or once
+    its oldest row has waited long enough. A full buffer blocks the callers until the thread catches up.
+    Errors of the background writes are raised to the caller by the next call.
+"""
+
+logger = logging.getLogger("mysql_wrap")
+
+FLUSH_ROWS = 1000
+FLUSH_BYTES = 1024 * 1024
+FLUSH_SECONDS = 1.0
+MAX_ROWS = 100000
+
+
+class BufferedWriter:
+    """
+    parameters:
+        db = MysqlWrap the rows are written to. A pooled wrapper is shared, otherwise the writer opens its own connection
+        flush_rows = (int) write a queue once it holds this many rows
+        flush_bytes = (int) write a queue once its rows are estimated to take this many bytes in a statement
+        flush_seconds = (float) max time a row waits in its queue, None waits for flush_rows or flush_bytes
+        max_rows = (int) max rows buffered over all the queues, insert() and upsert() block when reached
+        timeout = (float) seconds to wait for room in the buffer before raising TimeoutError, None waits forever
+    Every write is committed on its own.
+    """
+
+    def __init__(self, db, flush_rows : int = FLUSH_ROWS, flush_bytes : int = FLUSH_BYTES,
+                 flush_seconds : float = FLUSH_SECONDS, max_rows : int = MAX_ROWS, timeout : float = None):
+        if max_rows < flush_rows:
+            raise ValueError("max_rows can´t be smaller than flush_rows")
+
+        self.db = db
+        self.flush_rows = flush_rows
+        self.flush_bytes = flush_bytes
+        self.flush_seconds = flush_seconds
+        self.max_rows = max_rows
+        self.timeout = timeout
+
+        self._wrap = db if db.pool is not None else None
+        self._queues = OrderedDict()
+        self._queued = 0
+        self._flushing = 0
+        self._closed = False
+        self._error = None
+        self._condition = threading.Condition()
+
+        self.rows_written = 0
+        self.writes = 0
+        self.errors = 0
+        self.failed_rows = 0
+
+        self._thread = threading.Thread(target=self._run, name="mysql-wrap-writer", daemon=True)
+        self._thread.start()
+
+    def insert(self, table, data : dict):
+        """Queue a record to be inserted"""
+        self._add((table, None, tuple(data.keys())), tuple(data.values()))
+
+    def upsert(self, table, data : dict, key_field):
+        """Queue a record to be inserted, or updated if key_field (a primary or unique key) already exists"""
+        key_fields = (key_field,) if isinstance(key_field, str) else tuple(key_field)
+        self._add((table, key_fields, tuple(data.keys())), tuple(data.values()))
+
+    def flush(self):
+        """Write all the queued rows and wait for them, raises the first error of the background writes"""
+        with self._condition:
+            self._flushing += 1
+            self._condition.notify_all()
+            try:
+                while self._queued and self._thread.is_alive():
+                    self._condition.wait()
+            finally:
+                self._flushing -= 1
+            self._raise_error()
+
+    def close(self):
+        """Write all the queued rows and stop the background thread"""
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join()
+
+        if self._wrap is not None and self._wrap is not self.db:
+            self._wrap.end()
+        with self._condition:
+            self._raise_error()
+
+    def stats(self) -> dict:
+        with self._condition:
+            return {"queued" : self._queued,
+                    "queues" : len(self._queues),
+                    "rows_written" : self.rows_written,
+                    "writes" : self.writes,
+                    "errors" : self.errors,
+                    "failed_rows" : self.failed_rows}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        if type is None:
+            self.close()
+            return
+        # don´t hide the exception of the block behind a write error
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    def _add(self, key, values):
+        size = _estimate_row_size(values)
+
+        with self._condition:
+            self._raise_error()
+            if self._closed:
+                raise ValueError("the writer is closed")
+
+            if self._queued >= self.max_rows:
+                deadline = None if self.timeout is None else time.monotonic() + self.timeout
+                while self._queued >= self.max_rows:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError("the writer buffer is still full after {0} seconds".format(self.timeout))
+                    self._condition.wait(remaining)
+                    self._raise_error()
+
+            queue = self._queues.get(key)
+            if queue is None:
+                queue = self._queues[key] = {"rows" : [], "bytes" : 0, "since" : time.monotonic()}
+                # the background thread may be waiting without a deadline
+                self._condition.notify_all()
+            queue["rows"].append(values)
+            queue["bytes"] += size
+            self._queued += 1
+
+            if len(queue["rows"]) >= self.flush_rows or queue["bytes"] >= self.flush_bytes:
+                self._condition.notify_all()
+
+    def _raise_error(self):
+        """Raise the pending error of the background writes, once"""
+        error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+    def _due(self, now : float) -> list:
+        """Keys of the queues to write now"""
+        if self._flushing or self._closed:
+            return list(self._queues)
+        return [key for key, queue in self._queues.items()
+                if len(queue["rows"]) >= self.flush_rows or queue["bytes"] >= self.flush_bytes
+                or (self.flush_seconds is not None and now - queue["since"] >= self.flush_seconds)]
+
+    def _wait_time(self, now : float):
+        """Seconds until the oldest queue is due, None if only a full queue or a flush can wake the thread"""
+        if self.flush_seconds is None or not self._queues:
+            return None
+        oldest = min(queue["since"] for queue in self._queues.values())
+        return max(oldest + self.flush_seconds - now, 0)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while True:
+                    now = time.monotonic()
+                    due = self._due(now)
+                    if due or (self._closed and not self._queues):
+                        break
+                    self._condition.wait(self._wait_time(now))
+                if not due:
+                    return
+                # rows stay counted in the buffer until written, so callers are held back by the writes in flight
+                batches = [(key, self._queues.pop(key)) for key in due]
+
+            for key, queue in batches:
+                self._write(key, queue["rows"])
+
+    def _write(self, key, rows):
+        table, key_fields, columns = key
+        error = None
+
+        try:
+            if self._wrap is None:
+                # a connection of its own, the wrapper isn´t safe to share between threads without a pool
+                self._wrap = type(self.db)(**self.db._worker_conf())
+            with self._wrap.connection():
+                if key_fields is None:
+                    self._wrap._insert_chunks(table, list(columns), iter(rows))
+                else:
+                    self._wrap._upsert_chunks(table, list(columns), iter(rows), list(key_fields), count_changes=False)
+                self._wrap.commit()
+        except Exception as e:
+            error = e
+            try:
+                if self._wrap is not None:
+                    self._wrap.rollback()
+            except Exception:
+                pass
+            if self._wrap is not None and self._wrap is not self.db and not self._wrap.is_open():
+                # its own connection went away with the write, the next write opens a new one
+                wrap, self._wrap = self._wrap, None
+                try:
+                    wrap.end()
+                except Exception:
+                    pass
+
+        with self._condition:
+            self._queued -= len(rows)
+            self.writes += 1
+            if error is None:
+                self.rows_written += len(rows)
+            else:
+                logger.warning("buffered write of %s rows to %s failed: %s", len(rows), table, error)
+                self.errors += 1
+                self.failed_rows += len(rows)
+                if self._error is None:
+                    self._error = error
+            self._condition.notify_all()
@@ -0,0 +1,48 @@
+import pandas as pd
+import pytest
+
+from benchmarks.fakeserver import FakeServer
+from src.mysql_wrap.mysqlwrap import MysqlWrap
+
+
+BOOKS = pd.DataFrame({"id" : [1, 2, 3],
+                      "name" : ["Time Machine", "Invisible Man", "War of the Worlds"],
+                      "author" : ["Wells", "Wells", "Wells"],
+                      "year" : [1895, 1897, 1898]})
+
+
+@pytest.fixture
+def server():
+    """A fake mysql server serving the books table, see benchmarks/fakeserver.py"""
+    with FakeServer() as server:
+        server.addTable("books", BOOKS, key_field="id")
+        yield server
+
+
+@pytest.fixture
+def connect(server):
+    """Open wrappers on the fake server, closed at the end of the test"""
+    wrappers = []
+
+    def connect(**kwargs):
+        db = MysqlWrap(host=server.host, port=server.port, db="test", user="test", passwd="", **kwargs)
+        wrappers.append(db)
+        return db
+
+    yield connect
+    for db in wrappers:
+        db.end()
+
+
+@pytest.fixture
+def statements(monkeypatch):
+    """(connection, sql) of every statement run by the wrappers of the test"""
+    recorded = []
+    execute = MysqlWrap._execute
+
+    def recording(self, conn, sql, params=None):
+        recorded.append((conn, sql))
+        return execute(self, conn, sql, params)
+
+    monkeypatch.setattr(MysqlWrap, "_execute", recording)
+    return recorded
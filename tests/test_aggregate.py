@@ -0,0 +1,61 @@
+import decimal
+
+import pytest
+from mysql.connector import FieldType
+
+from src.mysql_wrap.mysqlwrap import _aggregate_columns
+
+
+class FakeCursor:
+    def __init__(self, description, rows):
+        self.description = [(name, type_code, None, None, None, None, 1, 0, 45) for name, type_code in description]
+        self.rows = rows
+
+    def fetchall(self):
+        return self.rows
+
+
+@pytest.mark.parametrize("aggs, columns", [
+    ({"year" : "max"}, [("year", "MAX(`year`)")]),
+    ({"year" : ["min", "mean"]}, [("year_min", "MIN(`year`)"), ("year_mean", "AVG(`year`)")]),
+    ({"books" : ("id", "size"), "authors" : ("author", "nunique")}, [("books", "COUNT(*)"),
+                                                                      ("authors", "COUNT(DISTINCT `author`)")]),
+    ({"year" : "STD"}, [("year", "STDDEV_SAMP(`year`)")]),
+])
+def test_aggregate_columns(aggs, columns):
+    assert _aggregate_columns(aggs) == columns
+
+
+def test_unknown_aggregates_are_refused():
+    with pytest.raises(ValueError):
+        _aggregate_columns({"year" : "median"})
+
+
+def test_groups_are_aggregated_on_the_server(connect, monkeypatch):
+    db = connect()
+    queries = []
+    description = [("author", FieldType.VAR_STRING), ("year_max", FieldType.LONG), ("year_sum", FieldType.NEWDECIMAL),
+                   ("books", FieldType.LONGLONG)]
+    rows = [("Wells", 1898, decimal.Decimal("5690"), 3)]
+    monkeypatch.setattr(db, "_run", lambda sql, params=None : queries.append((sql, params)) or FakeCursor(description, rows))
+
+    frame = db.getAggregate("books", "author", {"year" : ["max", "sum"], "books" : ("id", "size")},
+                            where=("year > %s", [1890]), having=("books > %s", [1]))
+
+    assert queries == [("SELECT `author`,MAX(`year`) AS `year_max`,SUM(`year`) AS `year_sum`,COUNT(*) AS `books` "
+                        "FROM `books` WHERE year > %s GROUP BY `author` HAVING books > %s ORDER BY `author`", [1890, 1])]
+    assert frame.to_dict("records") == [{"author" : "Wells", "year_max" : 1898, "year_sum" : decimal.Decimal("5690"),
+                                         "books" : 3}]
+
+
+def test_whole_tables_are_one_group(connect, monkeypatch):
+    db = connect()
+    queries = []
+    cursor = FakeCursor([("books", FieldType.LONGLONG)], [(3,)])
+    monkeypatch.setattr(db, "_run", lambda sql, params=None : queries.append(sql) or cursor)
+
+    assert db.getAggregate("books", aggs={"books" : ("id", "size")})["books"].tolist() == [3]
+    assert queries == ["SELECT COUNT(*) AS `books` FROM `books`"]
+
+    with pytest.raises(ValueError):
+        db.getAggregate("books")
@@ -0,0 +1,130 @@
+import asyncio
+import subprocess
+import sys
+import time
+
+import mysql.connector as mysql
+import pytest
+
+from src.mysql_wrap.asyncmysqlwrap import AsyncConnectionPool, AsyncMysqlWrap
+
+
+class FakeConnection:
+    def __init__(self):
+        self.in_transaction = False
+        self.unread_result = False
+        self.closed = False
+
+    async def rollback(self):
+        self.in_transaction = False
+
+    async def is_connected(self):
+        return not self.closed
+
+    async def close(self):
+        self.closed = True
+
+
+async def open_connection():
+    return FakeConnection()
+
+
+def test_import_does_not_need_the_asyncio_connector():
+    code = ("import sys; sys.modules['mysql.connector.aio'] = None\n"
+            "import src.mysql_wrap as mysql_wrap\n"
+            "try:\n"
+            "    mysql_wrap.AsyncMysqlWrap\n"
+            "except ImportError as e:\n"
+            "    print(e)\n")
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+
+    assert "8.3" in output
+
+
+def test_pool_reuses_and_times_out():
+    async def run():
+        pool = AsyncConnectionPool(open_connection, size=1, timeout=0.05)
+        conn = await pool.checkout()
+        with pytest.raises(mysql.PoolError):
+            await pool.checkout()
+        conn.in_transaction = True
+        await pool.checkin(conn)
+
+        assert await pool.checkout() is conn and not conn.in_transaction
+        return pool.stats()
+
+    stats = asyncio.run(run())
+    assert stats["created"] == 1 and stats["reused"] == 1 and stats["timeouts"] == 1
+
+
+def test_tasks_wait_for_a_connection_given_back():
+    async def run():
+        pool = AsyncConnectionPool(open_connection, size=1)
+
+        async def borrow():
+            conn = await pool.checkout()
+            await asyncio.sleep(0.01)
+            await pool.checkin(conn)
+            return conn
+
+        connections = await asyncio.gather(*[borrow() for _ in range(3)])
+        return connections, pool.stats()
+
+    connections, stats = asyncio.run(run())
+    assert len(set(map(id, connections))) == 1 and stats["waits"] >= 2 and stats["open"] == 1
+
+
+def test_async_wrapper_sends_the_sync_statements(server, connect):
+    async def run():
+        async with AsyncMysqlWrap(host=server.host, port=server.port, db="test", user="test", passwd="",
+                                  ssl={"ssl_disabled" : True}) as db:
+            book = await db.getOne("books", ["id", "name"], ("id=%s", [1]))
+            columns = await db.describe("books")
+            await db.insert("books", {"name" : "The Island of Doctor Moreau"})
+            return book, columns, db.lastQuery()
+
+    book, columns, statement = asyncio.run(run())
+    db = connect()
+    db.insert("books", {"name" : "The Island of Doctor Moreau"})
+
+    assert statement == db.lastQuery()
+    assert book == {"id" : 1, "name" : "Time Machine"}
+    assert columns == db.describe("books")
+
+
+def test_failed_chunks_dont_wait_for_the_next_one(server):
+    def values():
+        yield ("The Sleeper Awakes",)
+        # the second chunk is still being built when the first one fails
+        time.sleep(1)
+        yield ("Kipps",)
+
+    async def failing_query(sql, params=None):
+        raise mysql.DatabaseError("Deadlock found when trying to get lock", errno=1213)
+
+    async def run():
+        async with AsyncMysqlWrap(host=server.host, port=server.port, db="test", user="test", passwd="",
+                                  ssl={"ssl_disabled" : True}) as db:
+            db.query = failing_query
+            started = time.monotonic()
+            with pytest.raises(mysql.DatabaseError):
+                await db._insert_chunks("books", ["name"], values(), chunk_rows=1, chunk_bytes=1 << 20)
+            return time.monotonic() - started
+
+    assert asyncio.run(run()) < 0.5
+
+
+def test_lost_writes_are_not_retried(server):
+    async def run():
+        async with AsyncMysqlWrap(host=server.host, port=server.port, db="test", user="test", passwd="",
+                                  ssl={"ssl_disabled" : True}) as db:
+            server.dropNext("^SELECT .* FROM `books`")
+            book = await db.getOne("books", ["id", "name"], ("id=%s", [1]))
+
+            # the server may have applied it before the connection dropped
+            server.dropNext("^INSERT")
+            with pytest.raises(mysql.Error) as error:
+                await db.insert("books", {"name" : "The Sleeper Awakes"})
+            return book, error.value.errno
+
+    assert asyncio.run(run()) == ({"id" : 1, "name" : "Time Machine"}, 2013)
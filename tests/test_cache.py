@@ -0,0 +1,80 @@
+import time
+
+import pytest
+
+from src.mysql_wrap.cache import TTLCache
+from src.mysql_wrap.mysqlwrap import _written_tables
+
+
+def test_entries_expire_after_their_ttl():
+    cache = TTLCache(ttl=0.01)
+    cache.set("key", 1)
+    assert cache.get("key") == 1
+
+    time.sleep(0.02)
+    assert cache.get("key") is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = TTLCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None and cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_are_invalidated_by_tag():
+    cache = TTLCache()
+    cache.set("books", 1, tags=("`books`",))
+    cache.set("authors", 2, tags=("authors",))
+    cache.invalidate("books")
+
+    assert cache.get("books") is None and cache.get("authors") == 2
+
+
+@pytest.mark.parametrize("sql, tables", [
+    ("SELECT * FROM books", None),
+    ("  (SELECT 1)", None),
+    ("INSERT INTO `books` (name) VALUES (%s)", ["books"]),
+    ("INSERT IGNORE INTO books (name) VALUES (%s)", ["books"]),
+    ("REPLACE books (name) VALUES (%s)", ["books"]),
+    ("UPDATE books t JOIN _staging_books s ON t.id = s.id SET t.name = s.name", ["books"]),
+    ("DELETE FROM books WHERE id = 1", ["books"]),
+    ("ALTER TABLE books ADD COLUMN pages INT", ["books"]),
+    ("CALL refresh_books()", []),
+])
+def test_written_tables(sql, tables):
+    assert _written_tables(sql) == tables
+
+
+def test_results_are_cached_until_the_table_is_written(connect, statements):
+    db = connect(result_cache_ttl=60)
+
+    def reads():
+        return [sql for _, sql in statements if sql.startswith("SELECT")]
+
+    first = db.getOne("books", ["id", "name"], ("id=%s", [1]))
+    assert db.getOne("books", ["id", "name"], ("id=%s", [1])) == first
+    assert len(reads()) == 1
+
+    # a copy is returned, changing it leaves the cached result alone
+    first["name"] = "changed"
+    assert db.getOne("books", ["id", "name"], ("id=%s", [1]))["name"] == "Time Machine"
+
+    db.insert("books", {"name" : "The First Men in the Moon"})
+    db.getOne("books", ["id", "name"], ("id=%s", [1]))
+    assert len(reads()) == 2
+    assert db.resultCacheStats()["hits"] == 2
+
+
+def test_results_of_other_tables_survive_invalidation(connect):
+    db = connect(result_cache_ttl=60)
+    db.getOne("books", ["id"], ("id=%s", [1]))
+    db.invalidateResults("authors")
+    db.getOne("books", ["id"], ("id=%s", [1]))
+
+    assert db.resultCacheStats()["hits"] == 1
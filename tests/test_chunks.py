@@ -0,0 +1,44 @@
+from src.mysql_wrap.mysqlwrap import _estimate_row_size
+
+
+BOOKS = [{"name" : "The Sleeper Awakes", "year" : 1899}, {"name" : "The First Men in the Moon", "year" : 1901},
+         {"name" : "The Food of the Gods", "year" : 1904}, {"name" : "Kipps", "year" : 1905},
+         {"name" : "Tono-Bungay", "year" : 1909}]
+
+
+def inserts(statements):
+    return [sql for _, sql in statements if sql.startswith("INSERT")]
+
+
+def test_chunks_are_capped_by_rows(connect, statements):
+    connect().insertBatch("books", BOOKS, chunk_rows=2)
+
+    assert [sql.count("(%s,%s)") for sql in inserts(statements)] == [2, 2, 1]
+
+
+def test_chunks_are_capped_by_bytes(connect, statements):
+    # a chunk ends with the row reaching chunk_bytes
+    size = _estimate_row_size(tuple(BOOKS[0].values())) + _estimate_row_size(tuple(BOOKS[1].values()))
+    connect().insertBatch("books", BOOKS, chunk_bytes=size)
+    connect().insertBatch("books", BOOKS, chunk_bytes=1)
+
+    counts = [sql.count("(%s,%s)") for sql in inserts(statements)]
+    assert counts[0] == 2 and sum(counts) == 2 * len(BOOKS)
+    assert counts[-len(BOOKS):] == [1] * len(BOOKS)
+
+
+def test_chunks_default_to_half_the_packet_size(connect, statements):
+    db = connect()
+    db.insertBatch("books", iter(BOOKS))
+
+    assert db._max_allowed_packet() > 0
+    assert [sql.count("(%s,%s)") for sql in inserts(statements)] == [5]
+
+
+def test_same_sized_chunks_share_their_statement(connect):
+    build = connect()._chunk_builder("books", ["name", "year"], iter(tuple(book.values()) for book in BOOKS), 2, 1 << 20)
+    first, second, last = build(), build(), build()
+
+    assert first[0] is second[0] and first[2] == second[2] == 2
+    assert last[0] == "INSERT INTO books (name,year) VALUES (%s,%s)" and last[1] == ["Tono-Bungay", 1909]
+    assert build() is None
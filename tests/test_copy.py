@@ -0,0 +1,141 @@
+import operator
+import re
+
+import mysql.connector as mysql
+import pandas as pd
+import pytest
+
+SHELF = pd.DataFrame({"id" : range(1, 11), "year" : range(1891, 1901), "name" : ["book %d" % i for i in range(1, 11)]})
+
+OPERATORS = {">" : operator.gt, ">=" : operator.ge, "<=" : operator.le, "<" : operator.lt, "=" : operator.eq}
+CONDITION = re.compile(r"^\(?(\w+) (>=|<=|>|<|=) %s\)?$")
+
+
+class Cursor:
+    def __init__(self, row=None, rowcount=-1):
+        self.row = row
+        self.rowcount = rowcount
+
+    def fetchone(self):
+        return self.row
+
+
+class Copier:
+    """Run the statements of copyTable on SHELF, applying the conditions, order and offset the fake server ignores"""
+
+    def __init__(self, db, fail_chunk=None):
+        self.query = db.query
+        self.copied = []
+        self.statements = []
+        self.inserts = 0
+        self.fail_chunk = fail_chunk
+
+    def rows(self, sql, params):
+        where = re.search(r" WHERE (.*?)(?: ORDER BY|$)", sql)
+        rows = SHELF
+        params = list(params or [])
+        for condition in where.group(1).split(" AND ") if where else []:
+            field, op = CONDITION.match(condition).groups()
+            rows = rows[OPERATORS[op](rows[field], params.pop(0))]
+        return rows
+
+    def __call__(self, sql, params=None):
+        self.statements.append(sql)
+        if sql.startswith("SELECT MAX(id) FROM shelf_copy"):
+            return Cursor((max(self.copied, default=None),))
+        if sql.startswith("SELECT MAX(id) FROM shelf"):
+            return Cursor((self.rows(sql, params)["id"].max(),))
+        if sql.startswith("SELECT id FROM shelf"):
+            offset = int(re.search(r"OFFSET (\d+)", sql).group(1))
+            keys = list(self.rows(sql, params)["id"])
+            return Cursor((keys[offset],) if offset < len(keys) else None)
+        if re.match(r"INSERT (IGNORE )?INTO shelf_copy", sql):
+            self.inserts += 1
+            if self.inserts == self.fail_chunk:
+                raise mysql.OperationalError("Lost connection to MySQL server during query", errno=2013)
+            keys = [key for key in self.rows(sql, params)["id"] if not (sql.startswith("INSERT IGNORE") and key in self.copied)]
+            self.copied += keys
+            return Cursor(rowcount=len(keys))
+        if sql.startswith(("CREATE", "ALTER")):
+            return Cursor()
+        return self.query(sql, params)
+
+
+@pytest.fixture
+def shelf(server):
+    server.addTable("shelf", SHELF, key_field="id")
+
+
+def copier(db, monkeypatch, **kwargs):
+    copier = Copier(db, **kwargs)
+    monkeypatch.setattr(db, "query", copier)
+    return copier
+
+
+def test_rows_are_copied_in_key_chunks(connect, shelf, monkeypatch):
+    db = connect()
+    copy = copier(db, monkeypatch)
+    commits = []
+    monkeypatch.setattr(db, "commit", lambda: commits.append(len(copy.copied)))
+    progress = []
+
+    result = db.copyTable("shelf", "shelf_copy", chunk_rows=3, progress=progress.append)
+
+    assert copy.copied == list(range(1, 11))
+    assert (result["chunks"], result["rows"], result["last_key"]) == (4, 10, 10)
+    # committed after every chunk
+    assert commits == [3, 6, 9, 10]
+    assert [(step["chunks"], step["rows"], step["last_key"]) for step in progress] == [
+        (1, 3, 3), (2, 6, 6), (3, 9, 9), (4, 10, 10)]
+    assert "CREATE TABLE shelf_copy LIKE shelf" in copy.statements
+
+
+def test_full_last_chunk(connect, shelf, monkeypatch):
+    db = connect()
+    copy = copier(db, monkeypatch)
+    result = db.copyTable("shelf", "shelf_copy", chunk_rows=5)
+
+    # the chunk after the last full one finds no rows
+    assert (result["chunks"], result["rows"], result["last_key"]) == (3, 10, 10)
+    assert copy.copied == list(range(1, 11))
+
+
+def test_where_and_columns(connect, shelf, monkeypatch):
+    db = connect()
+    copy = copier(db, monkeypatch)
+    result = db.copyTable("shelf", "shelf_copy", where=("year >= %s", [1896]), columns=["id", "name"], chunk_rows=3)
+
+    assert copy.copied == [6, 7, 8, 9, 10]
+    assert result["last_key"] == 10
+    assert "ALTER TABLE shelf_copy DROP COLUMN year" in copy.statements
+    assert all(" (id,name) SELECT id,name FROM shelf" in sql for sql in copy.statements if sql.startswith("INSERT"))
+
+
+def test_interrupted_copies_resume_from_the_last_key(connect, shelf, monkeypatch):
+    db = connect()
+    copy = copier(db, monkeypatch, fail_chunk=3)
+    progress = []
+
+    with pytest.raises(mysql.OperationalError):
+        db.copyTable("shelf", "shelf_copy", chunk_rows=3, progress=progress.append)
+    assert copy.copied == list(range(1, 7)) and progress[-1]["last_key"] == 6
+
+    result = db.copyTable("shelf", "shelf_copy", chunk_rows=3, resume=True)
+
+    assert copy.copied == list(range(1, 11))
+    assert (result["chunks"], result["rows"], result["last_key"]) == (2, 4, 10)
+    assert "SELECT MAX(id) FROM shelf_copy" in copy.statements
+
+
+def test_ignore_skips_the_keys_already_copied(connect, shelf, monkeypatch):
+    db = connect()
+    copy = copier(db, monkeypatch)
+    copy.copied = [2, 3]
+    result = db.copyTable("shelf", "shelf_copy", chunk_rows=4, ignore=True)
+
+    assert sorted(copy.copied) == list(range(1, 11)) and result["rows"] == 8
+
+
+def test_the_key_must_be_copied(connect, shelf):
+    with pytest.raises(ValueError):
+        connect().copyTable("shelf", "shelf_copy", columns=["name"])
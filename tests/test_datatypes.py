@@ -0,0 +1,79 @@
+import datetime
+import decimal
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.mysql_wrap.mysqlwrap import MysqlWrap, _infer_datatype, _merge_datatype, ROW_MAX_BYTES, _row_bytes
+
+
+@pytest.mark.parametrize("values, datatype", [
+    (pd.Series([True, False]), "TINYINT(1)"),
+    (pd.Series([1, 200]), "SMALLINT"),
+    (pd.Series([-1, 2 ** 40]), "BIGINT"),
+    (pd.Series([1.5], dtype=np.float32), "FLOAT"),
+    (pd.Series([1.5, None]), "DOUBLE"),
+    (pd.Series([decimal.Decimal("-12.345"), decimal.Decimal("1.5")]), "DECIMAL(5,3)"),
+    (pd.Series([datetime.date(2024, 1, 1)]), "DATE"),
+    (pd.Series(pd.to_datetime(["2024-01-01 10:00:00.5"])), "DATETIME(6)"),
+    (pd.Series(['{"a" : 1}', "[1, 2]"]), "JSON"),
+    (pd.Series(["a" * 300]), "VARCHAR(300)"),
+    (pd.Series(["a" * 5000]), "TEXT"),
+    (pd.Series([b"abc"]), "VARBINARY(255)"),
+    (pd.Series([None, None], dtype=object), "VARCHAR(255)"),
+])
+def test_infer_datatype(values, datatype):
+    assert _infer_datatype(values) == datatype
+
+
+@pytest.mark.parametrize("source, dest, merged", [
+    ("INT", "BIGINT", "BIGINT"),
+    ("BIGINT", "INT", "BIGINT"),
+    ("INT UNSIGNED", "INT", "INT UNSIGNED"),
+    ("INT", "TINYINT(1)", "INT"),
+    ("INT", "DOUBLE", "DOUBLE"),
+    ("DOUBLE", "INT", "DOUBLE"),
+    ("DECIMAL(12,4)", "DECIMAL(10,2)", "DECIMAL(12,4)"),
+    ("BIGINT", "DECIMAL(10,2)", "DECIMAL(22,2)"),
+    # exact and approximate numbers keep the existing column
+    ("DOUBLE", "DECIMAL(10,2)", "DECIMAL(10,2)"),
+    ("DECIMAL(10,2)", "DOUBLE", "DOUBLE"),
+    ("DATE", "DATETIME", "DATETIME"),
+    ("DATETIME(6)", "DATE", "DATETIME(6)"),
+    # numbers into strings only widen the string when its text doesn´t fit
+    ("TINYINT", "VARCHAR(255)", "VARCHAR(255)"),
+    ("VARCHAR(255)", "INT", "VARCHAR(255)"),
+    ("VARCHAR(300)", "VARCHAR(255)", "VARCHAR(300)"),
+    ("VARCHAR(100)", "VARCHAR(255)", "VARCHAR(255)"),
+    # TINYTEXT holds 255 bytes, 63 characters of utf8mb4
+    ("VARCHAR(300)", "TINYTEXT", "TEXT"),
+    ("TINYTEXT", "VARCHAR(300)", "VARCHAR(300)"),
+    ("VARCHAR(300)", "MEDIUMTEXT", "MEDIUMTEXT"),
+    ("LONGTEXT", "TEXT", "LONGTEXT"),
+    ("VARBINARY(300)", "TINYBLOB", "BLOB"),
+    ("JSON", "VARCHAR(255)", "LONGTEXT"),
+])
+def test_merge_datatype_only_widens(source, dest, merged):
+    assert _merge_datatype(source, dest) == merged
+
+
+def serialize(data, key_field):
+    # no connection needed
+    return MysqlWrap.__new__(MysqlWrap)._serialize_datatypes(data, key_field)
+
+
+def test_string_keys_are_capped_at_the_index_limit():
+    data = pd.DataFrame({"code" : ["a" * 1000], "notes" : ["a" * 1000]})
+
+    assert serialize(data, "code") == ["VARCHAR(768) NOT NULL PRIMARY KEY", "VARCHAR(1000) NULL"]
+    assert serialize(data.assign(code=["a" * 5000]), "code")[0] == "VARCHAR(768) NOT NULL PRIMARY KEY"
+
+
+def test_wide_rows_fall_back_to_text():
+    data = pd.DataFrame({"id" : [1], **{"c%s" % index : ["a" * 4000] for index in range(5)}})
+    datatypes = serialize(data, "id")
+
+    assert datatypes[0] == "TINYINT NOT NULL PRIMARY KEY"
+    assert datatypes.count("TEXT NULL") == 1 and datatypes.count("VARCHAR(4000) NULL") == 4
+    assert sum(_row_bytes(datatype.split(" ")[0]) for datatype in datatypes) <= ROW_MAX_BYTES
@@ -0,0 +1,52 @@
+import datetime
+import decimal
+import hashlib
+
+import pandas as pd
+import pytest
+
+from src.mysql_wrap.mysqlwrap import _fingerprint_sql, _float_text, _row_fingerprints
+
+
+def md5(*values):
+    return hashlib.md5("\x1f".join(values).encode("utf-8")).hexdigest()[:16]
+
+
+@pytest.mark.parametrize("value, single, text", [
+    (1.0, False, "1"),
+    (0.1, False, "0.1"),
+    (1e20, False, "1e20"),
+    (1.5e-7, False, "1.5e-7"),
+    (0.1, True, "0.1"),
+])
+def test_float_text(value, single, text):
+    assert _float_text(value, single) == text
+
+
+def test_rows_hash_as_the_server_text():
+    data = pd.DataFrame({"pages" : [300, None],
+                         "price" : [9.5, 1e20],
+                         "cost" : [decimal.Decimal("1.5"), 2.25],
+                         "published" : [datetime.datetime(1895, 5, 7, 10, 30, 0, 500000), None],
+                         "name" : ["Time Machine", None]})
+    datatypes = ["INT", "DOUBLE", "DECIMAL(10,2)", "DATETIME(3)", "VARCHAR(255)"]
+
+    assert list(_row_fingerprints(data, datatypes)) == [
+        md5("300", "9.5", "1.50", "1895-05-07 10:30:00.500", "Time Machine"),
+        md5("\x00", "1e20", "2.25", "\x00", "\x00")]
+
+
+def test_nulls_and_empty_strings_differ():
+    fingerprints = _row_fingerprints(pd.DataFrame({"name" : [None, ""]}), ["VARCHAR(255)"])
+
+    assert list(fingerprints) == [md5("\x00"), md5("")]
+
+
+def test_rows_without_columns_hash_alike():
+    assert list(_row_fingerprints(pd.DataFrame(index=range(2)), [])) == [md5("")] * 2
+
+
+def test_fingerprint_sql():
+    assert _fingerprint_sql("books", "id", ["name", "year"]) == \
+        "SELECT id, LEFT(MD5(CONCAT_WS(CHAR(31), IFNULL(name, CHAR(0)),IFNULL(year, CHAR(0)))), 16) FROM books"
+    assert _fingerprint_sql("books", "id", []) == "SELECT id, LEFT(MD5(''), 16) FROM books"
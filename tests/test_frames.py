@@ -0,0 +1,81 @@
+import datetime
+import decimal
+
+import numpy as np
+import pyarrow as pa
+from mysql.connector.constants import FieldFlag, FieldType
+
+from src.mysql_wrap.mysqlwrap import _arrow_batch, _arrow_schema, _column_array, _columns_from_rows
+
+
+def field(name, type_code, flags=0, charset=45):
+    return (name, type_code, None, None, None, None, 1, flags, charset)
+
+
+def test_decimal_columns_stay_exact():
+    values = (decimal.Decimal("12345678901234567.89"), None)
+    array = _column_array(values, FieldType.NEWDECIMAL)
+
+    assert array.dtype == object
+    assert array[0] == decimal.Decimal("12345678901234567.89") and array[1] is None
+
+
+def test_decimal_as_float_is_opt_in():
+    array = _column_array((decimal.Decimal("1.25"), None), FieldType.NEWDECIMAL, decimal_as_float=True)
+
+    assert array.dtype == np.float64
+    assert array[0] == 1.25 and np.isnan(array[1])
+
+
+def test_columns_are_typed_from_the_description():
+    rows = [(1, 1, 1.5, datetime.datetime(2024, 1, 1), "a"), (2, None, None, None, None)]
+    description = [field("id", FieldType.LONGLONG, FieldFlag.UNSIGNED), field("flag", FieldType.TINY),
+                   field("score", FieldType.DOUBLE), field("at", FieldType.DATETIME), field("name", FieldType.VAR_STRING)]
+    ids, flags, scores, dates, names = _columns_from_rows(rows, description, {"flag"})
+
+    assert ids.dtype == np.uint64
+    assert str(flags.dtype) == "boolean" and flags[0] is np.True_
+    assert scores.dtype == np.float64
+    assert dates.dtype == "datetime64[us]"
+    assert names.dtype == object
+
+
+def test_arrow_decimals_take_precision_from_the_table():
+    description = [field("price", FieldType.NEWDECIMAL), field("total", FieldType.NEWDECIMAL)]
+    rows = [(decimal.Decimal("12.50"), decimal.Decimal("1234.500")), (None, None)]
+    schema = _arrow_schema(pa, description, {"price" : {"Type" : "DECIMAL(10,2)"}}, rows)
+
+    assert schema.field("price").type == pa.decimal128(10, 2)
+    # computed, no table column: widest decimal128 at the scale of the values
+    assert schema.field("total").type == pa.decimal128(38, 3)
+
+    batch = _arrow_batch(pa, rows, description, schema)
+    assert batch.column(0).to_pylist() == [decimal.Decimal("12.50"), None]
+
+
+def test_arrow_wide_decimals_use_decimal256():
+    schema = _arrow_schema(pa, [field("big", FieldType.NEWDECIMAL)], {"big" : {"Type" : "DECIMAL(65,4)"}})
+
+    assert schema.field("big").type == pa.decimal256(65, 4)
+
+
+def test_arrow_set_columns_become_text():
+    description = [field("tags", FieldType.STRING, FieldFlag.SET), field("flag", FieldType.TINY)]
+    rows = [({"b", "a"}, 1), (None, 0)]
+    schema = _arrow_schema(pa, description, {"flag" : {"Type" : "TINYINT(1)"}}, rows)
+    batch = _arrow_batch(pa, rows, description, schema)
+
+    assert schema.field("tags").type == pa.string() and schema.field("flag").type == pa.bool_()
+    assert batch.column(0).to_pylist() == ["a,b", None]
+    assert batch.column(1).to_pylist() == [True, False]
+
+
+def test_arrow_json_columns_are_strings():
+    # both come with the binary charset
+    description = [field("meta", FieldType.JSON, charset=63), field("cover", FieldType.BLOB, charset=63)]
+    rows = [('{"pages": 300}', b"\x89PNG"), (None, None)]
+    schema = _arrow_schema(pa, description, {}, rows)
+    batch = _arrow_batch(pa, rows, description, schema)
+
+    assert schema.field("meta").type == pa.string() and schema.field("cover").type == pa.binary()
+    assert batch.column(0).to_pylist() == ['{"pages": 300}', None]
@@ -0,0 +1,43 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.mysql_wrap.mysqlwrap import _infile_column, _infile_text
+
+
+@pytest.mark.parametrize("values, text", [
+    (pd.Series([1, None]), ["1.0", "\\N"]),
+    (pd.Series([1, None], dtype="Int64"), ["1", "\\N"]),
+    (pd.Series([True, False]), ["1", "0"]),
+    (pd.Series([np.bool_(True), None], dtype=object), ["1", "\\N"]),
+    (pd.Series(pd.to_datetime(["2024-01-02 03:04:05.5", None])), ["2024-01-02 03:04:05.500000", "\\N"]),
+    (pd.Series([datetime.date(2024, 1, 2), pd.Timestamp("2024-01-02 03:04:05")]),
+     ["2024-01-02", "2024-01-02 03:04:05.000000"]),
+    (pd.Series(["a\tb\nc\\d\re", None, "\\N"]), ["a\\tb\\nc\\\\d\\re", "\\N", "\\\\N"]),
+    (pd.Series([{"a" : 1}, [1, 2]]), ['{"a": 1}', "[1, 2]"]),
+])
+def test_infile_column(values, text):
+    assert _infile_column(values).tolist() == text
+
+
+def test_binary_columns_are_hex():
+    values = pd.Series([b"\xff\x00\t", "é", None])
+
+    assert _infile_column(values, binary=True).tolist() == ["ff0009", "c3a9", "\\N"]
+
+
+def test_infile_text():
+    data = pd.DataFrame({"name" : ["Time Machine", None], "year" : [1895, 1897], "cover" : [b"\x89PNG", None]})
+
+    assert _infile_text(data, [2]) == "Time Machine\t1895\t89504e47\n\\N\t1897\t\\N\n"
+
+
+def test_binary_columns_are_unhexed(connect, statements):
+    data = pd.DataFrame({"name" : ["Time Machine"], "cover" : [b"\x89PNG"]})
+    connect(allow_local_infile=True).loadDataFrame("books", data)
+
+    sql = [sql for _, sql in statements if sql.startswith("LOAD DATA")]
+    assert len(sql) == 1
+    assert sql[0].endswith("(name,@binary1) SET cover = UNHEX(@binary1)")
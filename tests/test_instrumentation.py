@@ -0,0 +1,97 @@
+import logging
+
+import mysql.connector as mysql
+import pytest
+
+from src.mysql_wrap import Instrumentation, fingerprint
+from src.mysql_wrap.instrumentation import OTHER_FINGERPRINT
+
+
+@pytest.mark.parametrize("sql, normalized", [
+    ("SELECT * FROM books WHERE id = 3", "SELECT * FROM books WHERE id = ?"),
+    ("SELECT * FROM books WHERE name = 'it''s'  AND year > %s", "SELECT * FROM books WHERE name = ? AND year > ?"),
+    ("SELECT * FROM t1 WHERE id IN (1, 2, 3)", "SELECT * FROM t1 WHERE id IN (?+)"),
+    ("INSERT INTO books VALUES (%s,%s),(%s,%s),(%s,%s)", "INSERT INTO books VALUES (?+)+"),
+    (b"SELECT 0x1f", "SELECT ?"),
+])
+def test_fingerprints(sql, normalized):
+    assert fingerprint(sql) == normalized
+
+
+def test_statements_share_a_fingerprint():
+    instrumentation = Instrumentation(buckets=(0.01, 0.1))
+    instrumentation.record("SELECT * FROM books WHERE id = 1", seconds=0.005, rows=1)
+    instrumentation.record("SELECT * FROM books WHERE id = 2", seconds=0.05, rows=1)
+    instrumentation.record("SELECT * FROM books WHERE id = 3", seconds=1.0, error=ValueError())
+
+    stats = instrumentation.stats()["SELECT * FROM books WHERE id = ?"]
+    assert (stats["count"], stats["errors"], stats["rows"]) == (3, 1, 2)
+    assert (stats["min_seconds"], stats["max_seconds"]) == (0.005, 1.0)
+    assert stats["histogram"] == {0.01 : 1, 0.1 : 1, float("inf") : 1}
+    assert (stats["p50"], stats["p99"]) == (0.1, float("inf"))
+
+
+def test_fingerprints_beyond_the_limit_are_counted_together():
+    instrumentation = Instrumentation(max_fingerprints=1)
+    instrumentation.record("SELECT * FROM books")
+    instrumentation.record("SELECT * FROM authors")
+    instrumentation.record("SELECT * FROM shelves")
+
+    assert instrumentation.stats()[OTHER_FINGERPRINT]["count"] == 2
+    assert [key for key, _ in instrumentation.slowest()] == ["SELECT * FROM books", OTHER_FINGERPRINT]
+
+
+def test_slow_queries_are_logged(caplog):
+    instrumentation = Instrumentation(slow_query_seconds=0.5)
+    with caplog.at_level(logging.WARNING, logger="mysql_wrap"):
+        instrumentation.record("SELECT * FROM books WHERE id = %s", [1], seconds=0.1)
+        instrumentation.record("SELECT * FROM books WHERE id = %s", [2], seconds=0.6)
+        Instrumentation(slow_query_seconds=0, log_params=False).record("SELECT 1", [3])
+
+    assert [record.getMessage() for record in caplog.records] == [
+        "slow query (0.600s): SELECT * FROM books WHERE id = %s params=[2]",
+        "slow query (0.000s): SELECT 1"]
+
+
+def test_a_failing_callback_does_not_stop_the_others(caplog):
+    events = []
+
+    def failing(event):
+        raise RuntimeError("callback")
+
+    instrumentation = Instrumentation(callbacks=[failing, events.append])
+    with caplog.at_level(logging.ERROR, logger="mysql_wrap"):
+        instrumentation.record("SELECT 1", seconds=0.1, rows=1)
+
+    assert [(event.fingerprint, event.rows) for event in events] == [("SELECT ?", 1)]
+    assert caplog.records[0].getMessage() == "instrumentation callback failed"
+
+
+def test_queries_and_methods_are_recorded(connect):
+    events = []
+    db = connect(instrumentation=Instrumentation(callbacks=[events.append]))
+    data = db.getTable("books")
+
+    operations = {event.operation : event for event in events}
+    assert operations["getTable"].fingerprint == "getTable(books)"
+    assert operations["getTable"].rows == len(data)
+    assert db.instrumentation.stats()["getTable(books)"]["count"] == 1
+    assert any(event.operation == "query" and "`books`" in event.sql for event in events)
+
+
+def test_failures_are_recorded_and_logged(connect, caplog):
+    db = connect(instrumentation=Instrumentation())
+    with caplog.at_level(logging.ERROR, logger="mysql_wrap"), pytest.raises(mysql.Error):
+        db.query("EXPLAIN missing")
+
+    stats = db.instrumentation.stats()["EXPLAIN missing"]
+    assert (stats["count"], stats["errors"]) == (1, 1)
+    assert caplog.records[-1].getMessage() == "Query failed: EXPLAIN missing"
+    assert caplog.records[-1].exc_info is not None
+
+
+def test_methods_are_not_timed_without_instrumentation(connect, monkeypatch):
+    db = connect()
+    monkeypatch.setattr(Instrumentation, "operation", None)
+
+    assert len(db.getTable("books")) == 3
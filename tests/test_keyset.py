@@ -0,0 +1,74 @@
+import pytest
+
+from tests.conftest import BOOKS
+
+
+class FakeCursor:
+    def __init__(self, names, rows):
+        self.description = [(name, 253, None, None, None, None, 1, 0, 45) for name in names]
+        self.rows = rows
+
+    def fetchall(self):
+        return self.rows
+
+
+def paging(db, monkeypatch, rows=BOOKS):
+    """Serve _select() from rows, applying the key condition the fake server ignores, and record its arguments"""
+    calls = []
+
+    def select(table, fields, where=None, order=None, limit=None, *args):
+        calls.append((fields, where, order, limit))
+        names = list(rows.columns) if fields == '*' else list(fields)
+        data = rows
+        # authors are all the same, the id alone orders the compound keys too
+        if where and where[0].endswith(("id > %s", "> (%s,%s)")):
+            data = data[data["id"] > where[1][-1]]
+        return FakeCursor(names, [tuple(row) for row in data[names].head(limit[0]).itertuples(index=False)])
+
+    monkeypatch.setattr(db, "_select", select)
+    return calls
+
+
+def test_pages_follow_the_last_key(connect, monkeypatch):
+    db = connect()
+    calls = paging(db, monkeypatch)
+
+    assert [row["name"] for row in db.iterRows("books", page_rows=2)] == list(BOOKS["name"])
+    # the primary key comes from describe(), the last page is short so no empty page is read
+    assert [call[1] for call in calls] == [None, ("id > %s", [2])]
+    assert all(call[2] == ["id", "ASC"] and call[3] == [2] for call in calls)
+
+
+def test_keys_are_read_but_not_returned_unless_selected(connect, monkeypatch):
+    db = connect()
+    calls = paging(db, monkeypatch)
+    rows = list(db.iterRows("books", ["name"], ("year > %s", [1890]), key_field="id", page_rows=2, as_tuple=True))
+
+    assert rows == [(name,) for name in BOOKS["name"]]
+    assert calls[0][0] == ["name", "id"]
+    assert calls[1][1] == ("(year > %s) AND id > %s", [1890, 2])
+
+
+def test_keyset_chunks_of_iter_table(connect, monkeypatch):
+    db = connect()
+    paging(db, monkeypatch)
+    frames = list(db.iterTable("books", ["id", "year"], chunksize=2, keyset=True))
+
+    assert [len(frame) for frame in frames] == [2, 1]
+    assert list(frames[1]["year"]) == [1898]
+
+
+def test_compound_keys_compare_as_row_constructors(connect, monkeypatch):
+    db = connect()
+    calls = paging(db, monkeypatch)
+    list(db.iterRows("books", ["name"], key_field=["author", "id"], page_rows=1))
+
+    assert calls[1][1][0] == "(author,id) > (%s,%s)"
+    assert calls[0][2] == ["author,id", "ASC"]
+
+
+def test_order_and_limit_are_refused(connect):
+    with pytest.raises(ValueError):
+        next(connect().iterTable("books", order=["year", "DESC"], keyset=True))
+    with pytest.raises(ValueError):
+        next(connect().iterTable("books", keyset=True, output="arrow"))
@@ -0,0 +1,129 @@
+import datetime
+import threading
+
+import mysql.connector as mysql
+import pandas as pd
+import pytest
+
+from src.mysql_wrap import mysqlwrap
+from src.mysql_wrap.mysqlwrap import MysqlWrap, _partition_frame, _range_bounds
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_empty_frames_write_nothing(connect, executor):
+    result = connect().writeParallel("books", pd.DataFrame({"name" : []}), workers=4, executor=executor)
+
+    assert result["rows"] == 0 and result["committed"] and result["partitions"] == []
+
+
+def test_partitions_commit_together(connect):
+    result = connect().writeParallel("books", pd.DataFrame({"name" : list("abcdef")}), workers=3)
+
+    assert result["rowcount"] == 6 and result["committed"]
+    assert result["committed_partitions"] == [0, 1, 2]
+
+
+def test_failed_commits_report_the_committed_partitions(connect, monkeypatch, caplog):
+    commit = MysqlWrap.commit
+    lock = threading.Lock()
+    calls = []
+
+    # the last partition to commit fails, the others are already committed
+    def failing_commit(self):
+        with lock:
+            calls.append(self)
+            last = len(calls) == 3
+        if last:
+            raise mysql.OperationalError("Lost connection to MySQL server during query", errno=2013)
+        return commit(self)
+
+    monkeypatch.setattr(MysqlWrap, "commit", failing_commit)
+    with pytest.raises(mysql.OperationalError) as error:
+        connect().writeParallel("books", pd.DataFrame({"name" : list("abcdef")}), workers=3)
+
+    summary = error.value.result
+    assert not summary["committed"] and len(summary["committed_partitions"]) == 2
+    assert [record.levelname for record in caplog.records if record.name == "mysql_wrap"] == ["WARNING", "ERROR"]
+
+
+def test_write_workers_skip_the_replicas(connect):
+    db = connect()
+    db.conf["replicas"] = ["replica:3306"]
+
+    assert db._worker_conf("process")["replicas"] is None
+    assert db._worker_conf("thread", replicas=True)["replicas"] == ["replica:3306"]
+
+
+def test_hash_partitions_keep_keys_together():
+    data = pd.DataFrame({"id" : [1, 2, 3, 1, 2, 3], "name" : list("abcdef")})
+    partitions = _partition_frame(data, 2, ["id"])
+
+    assert sum(map(len, partitions)) == 6
+    for frame in partitions:
+        for other in partitions:
+            if other is not frame:
+                assert not set(frame["id"]) & set(other["id"])
+
+
+@pytest.mark.parametrize("low, high, slices, bounds", [
+    (1, 1, 4, [1]),
+    (1, 2, 4, [1, 2]),
+    (-5, 5, 4, [-5, -3, 0, 2, 5]),
+    (datetime.date(2024, 1, 1), datetime.date(2024, 1, 1), 4, [datetime.date(2024, 1, 1)]),
+    # DATE ranges split on whole days
+    (datetime.date(2024, 1, 1), datetime.date(2024, 1, 3), 4,
+     [datetime.date(2024, 1, 1), datetime.date(2024, 1, 2), datetime.date(2024, 1, 3)]),
+    (datetime.datetime(2024, 1, 1), datetime.datetime(2024, 1, 2), 2,
+     [datetime.datetime(2024, 1, 1), datetime.datetime(2024, 1, 1, 12), datetime.datetime(2024, 1, 2)]),
+    (datetime.datetime(2024, 1, 1), datetime.datetime(2024, 1, 1, 0, 0, 0, 1), 4,
+     [datetime.datetime(2024, 1, 1), datetime.datetime(2024, 1, 1, 0, 0, 0, 1)]),
+])
+def test_range_bounds(low, high, slices, bounds):
+    assert _range_bounds(low, high, slices) == bounds
+
+
+class MinMaxCursor:
+    def __init__(self, low, high):
+        self.row = (low, high)
+
+    def fetchone(self):
+        return self.row
+
+
+def reading(db, monkeypatch, low, high):
+    """Answer the MIN/MAX lookup with low and high, the fake server has no aggregates, and record the range conditions"""
+    query = db.query
+    ranges = []
+
+    def min_max(sql, params=None):
+        return MinMaxCursor(low, high) if sql.startswith("SELECT MIN(") else query(sql, params)
+
+    def read_partition(wrap, conf, table, fields, where, order):
+        ranges.append(where)
+        return pd.DataFrame({"id" : [len(ranges)]})
+
+    monkeypatch.setattr(db, "query", min_max)
+    monkeypatch.setattr(mysqlwrap, "_read_partition", read_partition)
+    return ranges
+
+
+def test_parallel_reads_split_the_key_range(connect, monkeypatch):
+    db = connect()
+    ranges = reading(db, monkeypatch, 1, 9)
+    frame = db.getTable("books", ["id"], ("year > %s", [1890]), parallel=3)
+
+    assert sorted(ranges, key=str) == sorted([
+        # NULL keys go to the first range
+        ("(year > %s) AND (id < %s OR id IS NULL)", [1890, 3]),
+        ("(year > %s) AND id >= %s AND id < %s", [1890, 3, 6]),
+        ("(year > %s) AND id >= %s", [1890, 6])], key=str)
+    assert len(frame) == 3
+
+
+@pytest.mark.parametrize("low, high", [(None, None), (5, 5)])
+def test_empty_and_single_key_tables_are_read_at_once(connect, monkeypatch, low, high):
+    db = connect()
+    ranges = reading(db, monkeypatch, low, high)
+    db.getTable("books", parallel=4)
+
+    assert ranges == [None]
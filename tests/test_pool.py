@@ -0,0 +1,148 @@
+import threading
+import time
+
+import mysql.connector as mysql
+import pytest
+
+from src.mysql_wrap.pool import ConnectionPool
+
+
+class FakeConnection:
+    def __init__(self):
+        self.in_transaction = False
+        self.closed = False
+        self.rollbacks = 0
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.in_transaction = False
+
+    def is_connected(self):
+        return not self.closed
+
+    def close(self):
+        self.closed = True
+
+
+def test_checkout_reuses_the_last_returned_connection():
+    pool = ConnectionPool(FakeConnection, size=2)
+    first = pool.checkout()
+    second = pool.checkout()
+    pool.checkin(first)
+    pool.checkin(second)
+
+    assert pool.checkout() is second
+    stats = pool.stats()
+    assert stats["created"] == 2 and stats["reused"] == 1 and stats["in_use"] == 1
+
+
+def test_checkin_rolls_back_open_transactions():
+    pool = ConnectionPool(FakeConnection, size=1)
+    conn = pool.checkout()
+    conn.in_transaction = True
+    pool.checkin(conn)
+
+    assert conn.rollbacks == 1
+    assert pool.checkout() is conn
+
+
+def test_overflow_connections_are_closed_when_returned():
+    pool = ConnectionPool(FakeConnection, size=1, max_overflow=1, max_idle=1)
+    first = pool.checkout()
+    overflow = pool.checkout()
+    assert pool.stats()["open"] == 2
+
+    pool.checkin(first)
+    pool.checkin(overflow)
+
+    assert overflow.closed and not first.closed
+    assert pool.stats()["open"] == 1
+
+
+def test_checkout_times_out_when_exhausted():
+    pool = ConnectionPool(FakeConnection, size=1, timeout=0.05)
+    pool.checkout()
+
+    started = time.monotonic()
+    with pytest.raises(mysql.PoolError):
+        pool.checkout()
+    assert time.monotonic() - started >= 0.05
+    assert pool.stats()["timeouts"] == 1
+
+
+def test_checkout_waits_for_a_connection_given_back():
+    pool = ConnectionPool(FakeConnection, size=1, timeout=5)
+    conn = pool.checkout()
+    threading.Timer(0.05, pool.checkin, [conn]).start()
+
+    assert pool.checkout() is conn
+    assert pool.stats()["waits"] >= 1
+
+
+def test_dead_idle_connections_are_replaced():
+    pool = ConnectionPool(FakeConnection, size=1, ping_after=0)
+    conn = pool.checkout()
+    pool.checkin(conn)
+    conn.closed = True
+
+    assert pool.checkout() is not conn
+    assert pool.stats()["discarded"] == 1
+
+
+def test_closed_pool_refuses_checkouts():
+    pool = ConnectionPool(FakeConnection, size=1)
+    pool.close()
+    with pytest.raises(mysql.PoolError):
+        pool.checkout()
+
+
+def test_uncommitted_writes_pin_the_connection(connect):
+    db = connect(pool_size=2)
+    db.query("INSERT INTO books (name) VALUES (%s)", ["Time Machine"])
+    pinned = db.conn
+    assert pinned is not None and db.pool.stats()["in_use"] == 1
+
+    db.query("INSERT INTO books (name) VALUES (%s)", ["Invisible Man"])
+    assert db.conn is pinned
+
+    db.commit()
+    assert db.conn is None and db.pool.stats()["in_use"] == 0
+
+
+def test_connection_block_holds_one_connection(connect):
+    db = connect(pool_size=2)
+    with db.connection() as conn:
+        db.query("SELECT 1")
+        assert db.conn is conn
+    assert db.conn is None and db.pool.stats()["in_use"] == 0
+
+
+@pytest.mark.parametrize("pool_size", [None, 2])
+def test_lost_reads_are_retried_on_a_new_connection(server, connect, pool_size):
+    db = connect(pool_size=pool_size)
+    server.dropNext("^SELECT .* FROM `books`")
+
+    assert db.getOne("books", ["id", "name"], ("id=%s", [1]))["name"] == "Time Machine"
+
+
+@pytest.mark.parametrize("pool_size", [None, 2])
+def test_lost_transactions_are_not_retried(server, connect, pool_size):
+    db = connect(pool_size=pool_size)
+    db.insert("books", {"name" : "The Sleeper Awakes"})
+    server.dropNext("^INSERT")
+    statements = server.statements
+
+    # the first insert is gone with the connection, running the second alone would commit half the transaction
+    with pytest.raises(mysql.Error) as error:
+        db.insert("books", {"name" : "The First Men in the Moon"})
+    assert error.value.errno == 2013 and server.statements == statements
+
+
+def test_lost_writes_are_not_retried(server, connect):
+    db = connect(autocommit=True)
+    server.dropNext("^INSERT")
+
+    # the server may have applied it before the connection dropped
+    with pytest.raises(mysql.Error) as error:
+        db.insert("books", {"name" : "The Sleeper Awakes"})
+    assert error.value.errno == 2013
@@ -0,0 +1,94 @@
+import logging
+
+import mysql.connector as mysql
+import pandas as pd
+import pytest
+
+from benchmarks.fakeserver import FakeServer
+from src.mysql_wrap.replicas import ReplicaSet
+from tests.conftest import BOOKS
+
+
+class FakeConnection:
+    def __init__(self):
+        self.in_transaction = False
+        self.unread_result = False
+
+    def ping(self, reconnect=False):
+        pass
+
+    def rollback(self):
+        pass
+
+    def is_connected(self):
+        return True
+
+    def close(self):
+        pass
+
+
+def test_evicted_replicas_are_logged_and_come_back(caplog):
+    down = {"replica-a"}
+
+    def factory(endpoint):
+        if endpoint["host"] in down:
+            raise mysql.InterfaceError("Can't connect to MySQL server", errno=2003)
+        return FakeConnection()
+
+    replicas = ReplicaSet(factory, ["replica-a", "replica-b:3307"], retry_after=0)
+    with caplog.at_level(logging.INFO, logger="mysql_wrap"):
+        replica, conn = replicas.checkout()
+        replicas.checkin(replica, conn)
+        down.clear()
+        # round robin, the next two reads go to replica-b and then to replica-a, checked again
+        names = []
+        for _ in range(2):
+            checked, conn = replicas.checkout()
+            replicas.checkin(checked, conn)
+            names.append(checked["name"])
+
+    assert replica["name"] == "replica-b:3307" and names == ["replica-b:3307", "replica-a"]
+    assert [(record.levelname, record.getMessage().split(":")[0]) for record in caplog.records] == \
+        [("WARNING", "replica replica-a evicted"), ("INFO", "replica replica-a is back")]
+    replicas.close()
+
+
+@pytest.fixture
+def replica():
+    """A fake replica serving the books table, with names of its own to tell its reads apart"""
+    with FakeServer() as server:
+        server.addTable("books", BOOKS.assign(name=BOOKS["name"].str.upper()), key_field="id")
+        yield server
+
+
+def read_from(frames) -> set:
+    """'replica' or 'primary' for each server the frames were read from"""
+    names = pd.concat(frames)["name"]
+    return {"replica" if name.isupper() else "primary" for name in names}
+
+
+@pytest.mark.parametrize("pool_size", [None, 2])
+def test_streams_read_from_the_replicas(connect, replica, pool_size):
+    db = connect(pool_size=pool_size, replicas=["127.0.0.1:%d" % replica.port])
+
+    assert read_from(db.iterTable("books", chunksize=2)) == {"replica"}
+    # the fake server ignores the key condition, pages hold the whole table so that the first one is the last
+    assert read_from(db.iterTable("books", chunksize=10, keyset=True)) == {"replica"}
+    assert read_from([pd.DataFrame(list(db.iterRows("books", page_rows=10)))]) == {"replica"}
+    assert read_from([db.getTable("books", output="arrow").to_pandas()]) == {"replica"}
+    if pool_size:
+        assert db.pool.stats()["in_use"] == 0
+
+
+def test_streams_stay_on_the_primary_in_transactions(connect, replica):
+    db = connect(replicas=["127.0.0.1:%d" % replica.port])
+    with db.transaction():
+        assert read_from(db.iterTable("books", chunksize=2)) == {"primary"}
+
+
+def test_streams_fall_back_to_the_primary_before_the_first_row(connect, replica):
+    db = connect(replicas=["127.0.0.1:%d" % replica.port], replica_retry=60)
+    replica.dropNext("^SELECT .* FROM `books`")
+
+    assert read_from(db.iterTable("books", chunksize=2)) == {"primary"}
+    assert not db.replicaStats()[0]["healthy"]
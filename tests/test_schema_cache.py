@@ -0,0 +1,71 @@
+import pytest
+
+from src.mysql_wrap.mysqlwrap import SCHEMA_SQL, _ddl_tables
+
+
+class RowsCursor:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def fetchall(self):
+        return self.rows
+
+
+def lookups(statements):
+    return [sql for _, sql in statements if sql.startswith(("EXPLAIN", "SHOW TABLES"))]
+
+
+@pytest.mark.parametrize("sql, tables", [
+    ("SELECT * FROM books", None),
+    ("ALTER TABLE `books` ADD COLUMN pages INT", ["books"]),
+    ("CREATE TABLE IF NOT EXISTS test.books (id INT)", ["test.books"]),
+    ("DROP TABLE IF EXISTS books, authors", ["books", "authors"]),
+    ("TRUNCATE TABLE books", ["books"]),
+    ("RENAME TABLE books TO old_books", []),
+    ("CREATE INDEX year ON books (year)", []),
+])
+def test_ddl_tables(sql, tables):
+    assert _ddl_tables(sql) == tables
+
+
+def test_definitions_are_cached(connect, statements):
+    db = connect(schema_cache_ttl=60)
+    columns = db.describe("books")
+
+    assert db.describe("books") == columns and db.tableExist("books")
+    assert lookups(statements) == ["EXPLAIN books"]
+
+
+@pytest.mark.parametrize("ddl", ["ALTER TABLE books ADD INDEX year (year)", "ALTER TABLE `test`.`books` ADD pages INT",
+                                 "DROP TABLE IF EXISTS authors, books", "RENAME TABLE books TO old_books"])
+def test_ddl_evicts_the_definitions(connect, statements, ddl):
+    db = connect(schema_cache_ttl=60)
+    db.describe("books")
+    db.query(ddl)
+    db.describe("books")
+    db.tableExist("books")
+
+    assert lookups(statements) == ["EXPLAIN books", "EXPLAIN books"]
+
+
+def test_ddl_keeps_the_definitions_of_other_tables(connect, statements):
+    db = connect(schema_cache_ttl=60)
+    db.describe("books")
+    db.addIndex("authors", "name", ["name"])
+    db.describe("books")
+
+    assert lookups(statements) == ["EXPLAIN books"]
+
+
+def test_load_schema_fills_the_cache(connect, statements, monkeypatch):
+    db = connect()
+    query = db.query
+    rows = [("authors", "id", "int", "NO", "PRI", None, "auto_increment"),
+            ("authors", "name", "varchar(255)", "YES", "", None, ""),
+            ("books", "id", "bigint", "NO", "PRI", None, "")]
+    monkeypatch.setattr(db, "query", lambda sql, params=None : RowsCursor(rows) if sql == SCHEMA_SQL else query(sql, params))
+
+    assert db.loadSchema() == 2
+    assert db.describe("authors")["name"]["Type"] == "VARCHAR(255)" and db.tableExist("authors")
+    assert list(db.describe("books")) == ["id"]
+    assert lookups(statements) == []
@@ -0,0 +1,94 @@
+import mysql.connector as mysql
+
+
+class FakeCursor:
+    def __init__(self, fail=None):
+        self.fail = fail
+        self.closed = False
+        self.executed = []
+
+    def execute(self, sql, params=None):
+        if self.fail is not None:
+            raise self.fail
+        self.executed.append((sql, params))
+
+    def close(self):
+        self.closed = True
+
+
+class FakeConnection:
+    def __init__(self, fail=None):
+        self.fail = fail
+        self.cursors = []
+
+    def cursor(self, prepared=False):
+        assert prepared
+        self.cursors.append(FakeCursor(self.fail))
+        return self.cursors[-1]
+
+
+def test_compiled_sql_is_reused_for_the_same_shape(connect):
+    db = connect()
+    db.getOne("books", ["id", "name"], ("id=%s", [1]))
+    db.getOne("books", ["id", "name"], ("id=%s", [2]))
+    db.getOne("books", ["id", "name"], ("name=%s", ["Time Machine"]))
+
+    stats = db.sqlCacheStats()
+    assert stats["hits"] == 1 and stats["misses"] == 2 and stats["size"] == 2
+
+
+def test_compiled_sql_keys_cover_order_and_limit(connect):
+    db = connect()
+    first, params = db._compile_select("books", ["id"], ("year > %s", [1890]), ["year", "DESC"], [0, 10])
+    second, _ = db._compile_select("books", ["id"], ("year > %s", [1890]), ["year", "ASC"], [0, 10])
+
+    assert first == "SELECT id FROM `books` WHERE year > %s ORDER BY year DESC LIMIT 0, 10" and params == [1890]
+    assert second.endswith("ORDER BY year ASC LIMIT 0, 10")
+
+
+def test_prepared_statements_are_reused_and_evicted(connect):
+    db = connect(prepared_statements=True, prepared_cache_size=2)
+    conn = FakeConnection()
+
+    first = db._prepared_cursor(conn, "SELECT 1")
+    assert db._prepared_cursor(conn, "SELECT 1") is first
+    db._prepared_cursor(conn, "SELECT 2")
+    db._prepared_cursor(conn, "SELECT 3")
+
+    assert first.closed
+    assert db.sqlCacheStats()["prepared_statements"] == 2
+
+
+def test_lost_statement_handles_fall_back_to_a_text_query(connect, monkeypatch):
+    db = connect(prepared_statements=True)
+    conn = FakeConnection(fail=mysql.OperationalError(errno=2055))
+    fallback = []
+    monkeypatch.setattr(db, "_execute", lambda conn, sql, params=None : fallback.append(sql) or "text cursor")
+
+    assert db._execute_prepared(conn, "SELECT 1") == "text cursor"
+    assert fallback == ["SELECT 1"] and db.sqlCacheStats()["prepared_statements"] == 0
+
+
+class UnbufferedCursor:
+    """A prepared statement result, only readable while its connection is checked out, the pool drains it on checkin"""
+
+    def __init__(self, db, conn, cur):
+        self.db = db
+        self.conn = conn
+        self.description = cur.description
+        self.with_rows = cur.with_rows
+        self.rows = cur.fetchall() if cur.with_rows else []
+
+    def fetchall(self):
+        return self.rows if getattr(self.db._local, "conn", None) is self.conn else []
+
+
+def test_pooled_prepared_results_are_read_before_checkin(connect, monkeypatch):
+    db = connect(pool_size=2, prepared_statements=True)
+    monkeypatch.setattr(db, "_execute_prepared",
+                        lambda conn, sql, params=None : UnbufferedCursor(db, conn, db._execute(conn, sql, params)))
+
+    assert len(db.getTable("books")) == 3
+    assert len(db.getAggregate("books", "author", {"books" : ("id", "size")})) == 1
+    assert len(db.getAll("books")) == 3 and db.getOne("books")["id"] == 1
+    assert db.pool.stats()["in_use"] == 0
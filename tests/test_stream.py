@@ -0,0 +1,32 @@
+import pandas as pd
+
+from tests.conftest import BOOKS
+
+
+def test_chunks_hold_chunksize_rows(connect):
+    db = connect()
+    frames = list(db.iterTable("books", chunksize=2))
+
+    assert [len(frame) for frame in frames] == [2, 1]
+    pd.testing.assert_frame_equal(pd.concat(frames, ignore_index=True), db.getTable("books"))
+    assert frames[0]["name"].tolist() == BOOKS["name"].tolist()[:2]
+
+
+def test_abandoned_streams_free_the_connection(connect):
+    db = connect()
+    frames = db.iterTable("books", chunksize=1)
+    next(frames)
+    frames.close()
+
+    assert db.getOne("books", ["name"], ("id=%s", [1])) == {"name" : "Time Machine"}
+
+
+def test_pooled_streams_take_a_connection_of_their_own(connect):
+    db = connect(pool_size=2)
+    names = []
+    for frame in db.iterTable("books", ["id", "name"], chunksize=1):
+        # the stream holds one connection, queries run on the other
+        assert db.pool.stats()["in_use"] == 1
+        names.append(db.getOne("books", ["name"], ("id=%s", [int(frame["id"][0])]))["name"])
+
+    assert len(names) == 3 and db.pool.stats()["in_use"] == 0
@@ -0,0 +1,80 @@
+import logging
+
+import mysql.connector as mysql
+import pandas as pd
+import pytest
+
+
+def refusing(db, monkeypatch, errno):
+    """Fail the online ALTER statements of db with errno, and record the statements run"""
+    query = db.query
+    statements = []
+
+    def refuse(sql, params=None):
+        statements.append(sql)
+        if sql.startswith("ALTER") and "ALGORITHM" in sql:
+            raise mysql.DatabaseError("refused", errno=errno)
+        return query(sql, params)
+
+    monkeypatch.setattr(db, "query", refuse)
+    return statements
+
+
+def test_added_columns_are_instant(connect):
+    plan = connect().syncColumns("books", pd.DataFrame({"pages" : [300]}), dry_run=True)
+
+    assert plan["strategy"] == "instant" and not plan["blocks_writes"]
+    assert plan["steps"] == [(["ADD COLUMN pages SMALLINT NULL"], ["ALGORITHM=INSTANT"])]
+
+
+def test_refused_online_changes_fall_back_to_a_copy(connect, monkeypatch):
+    db = connect()
+    statements = refusing(db, monkeypatch, 1846)
+    plan = db.syncColumns("books", pd.DataFrame({"pages" : [300]}))
+
+    assert plan["fallback"] and plan["strategy"] == "copy"
+    assert statements[-1] == "ALTER TABLE books ADD COLUMN pages SMALLINT NULL"
+
+
+def test_other_errors_are_raised(connect, monkeypatch):
+    db = connect()
+    refusing(db, monkeypatch, 1064)
+
+    with pytest.raises(mysql.DatabaseError):
+        db.syncColumns("books", pd.DataFrame({"pages" : [300]}))
+
+
+def test_the_plan_and_the_fallback_are_logged(connect, monkeypatch, caplog):
+    db = connect()
+    refusing(db, monkeypatch, 1846)
+    with caplog.at_level(logging.INFO, logger="mysql_wrap"):
+        db.syncColumns("books", pd.DataFrame({"pages" : [300]}))
+
+    assert [(record.levelname, record.getMessage()) for record in caplog.records] == [
+        ("INFO", "syncing columns of books: instant, not blocking writes"),
+        ("WARNING", "the server refused ALGORITHM=INSTANT on books, falling back to a copy: 1846: refused")]
+
+
+def test_shadow_plans_hold_the_statements_run(connect, monkeypatch):
+    db = connect()
+    frame = pd.DataFrame({"year" : [1.5], "pages" : [300]})
+    plan = db.syncColumns("books", frame, online=True, dry_run=True)
+
+    assert plan["strategy"] == "shadow" and not plan["blocks_writes"]
+    assert plan["sql"][:2] == ["CREATE TABLE _books_new LIKE books",
+                               "ALTER TABLE _books_new ADD COLUMN pages SMALLINT NULL , CHANGE COLUMN year year DOUBLE NULL"]
+    assert plan["sql"][-3:] == [
+        "INSERT IGNORE INTO _books_new (id,name,author,year) SELECT id,name,author,year FROM books WHERE id > %s AND id <= %s",
+        "RENAME TABLE books TO _books_old, _books_new TO books",
+        "DROP TABLE _books_old"]
+
+    statements = refusing(db, monkeypatch, 1846)
+    copies = []
+    monkeypatch.setattr(db, "copyTable", lambda src, dst, **kwargs: copies.append((src, dst, kwargs["key_field"])))
+    db.syncColumns("books", frame, online=True)
+
+    # every statement of the plan but the chunked copy, after dropping the leftovers of an earlier migration
+    assert statements[-7:] == [sql for sql in plan["sql"] if not sql.startswith("INSERT")]
+    assert statements[-11:-7] == ["DROP TRIGGER IF EXISTS _books_sync_ins", "DROP TRIGGER IF EXISTS _books_sync_upd",
+                                  "DROP TRIGGER IF EXISTS _books_sync_del", "DROP TABLE IF EXISTS _books_new"]
+    assert copies == [("books", "_books_new", "id")]
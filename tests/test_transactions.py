@@ -0,0 +1,149 @@
+import mysql.connector as mysql
+import pytest
+from mysql.connector.connection import MySQLConnection
+
+TRANSACTION_WORDS = ("INSERT", "START", "COMMIT", "ROLLBACK", "SAVEPOINT", "RELEASE")
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    """Statements sent to the server, including the COMMIT / ROLLBACK of the connection methods, without the reads"""
+    recorded = []
+    cmd_query = MySQLConnection.cmd_query
+
+    def recording(self, query, *args, **kwargs):
+        sql = query.decode() if isinstance(query, bytes) else query
+        if sql.startswith(TRANSACTION_WORDS):
+            recorded.append(sql.split(" (")[0])
+        return cmd_query(self, query, *args, **kwargs)
+
+    monkeypatch.setattr(MySQLConnection, "cmd_query", recording)
+    return recorded
+
+
+def insert(db, name):
+    db.query("INSERT INTO books (name) VALUES (%s)", [name])
+
+
+@pytest.mark.parametrize("pool_size", [None, 2])
+def test_blocks_commit_on_exit(connect, sent, pool_size):
+    db = connect(pool_size=pool_size)
+    with db.transaction():
+        insert(db, "Time Machine")
+        insert(db, "Invisible Man")
+
+    assert sent == ["INSERT INTO books", "INSERT INTO books", "COMMIT"]
+    if pool_size:
+        assert db.conn is None and db.pool.stats()["in_use"] == 0
+
+
+@pytest.mark.parametrize("pool_size", [None, 2])
+def test_blocks_roll_back_when_they_raise(connect, sent, pool_size):
+    db = connect(pool_size=pool_size)
+    with pytest.raises(KeyError):
+        with db.transaction():
+            insert(db, "Time Machine")
+            raise KeyError("name")
+
+    assert sent == ["INSERT INTO books", "ROLLBACK"]
+    if pool_size:
+        assert db.conn is None and db.pool.stats()["in_use"] == 0
+
+
+def test_autocommit_connections_start_a_transaction(connect, sent):
+    db = connect(autocommit=True)
+    with db.transaction():
+        insert(db, "Time Machine")
+
+    assert sent == ["START TRANSACTION", "INSERT INTO books", "COMMIT"]
+
+
+def test_nested_blocks_are_savepoints(connect, sent):
+    db = connect()
+    with db.transaction():
+        with db.transaction():
+            insert(db, "Time Machine")
+            with db.transaction():
+                insert(db, "Invisible Man")
+
+    assert sent == ["SAVEPOINT mysql_wrap_sp1", "INSERT INTO books",
+                    "SAVEPOINT mysql_wrap_sp2", "INSERT INTO books", "RELEASE SAVEPOINT mysql_wrap_sp2",
+                    "RELEASE SAVEPOINT mysql_wrap_sp1", "COMMIT"]
+
+
+def test_a_failing_nested_block_rolls_back_to_its_savepoint(connect, sent):
+    db = connect()
+    with db.transaction():
+        insert(db, "Time Machine")
+        with pytest.raises(ValueError):
+            with db.transaction():
+                insert(db, "Invisible Man")
+                raise ValueError()
+        # the savepoint name is reused by the next block at the same depth
+        with db.transaction():
+            insert(db, "The Sleeper Awakes")
+
+    assert sent == ["INSERT INTO books", "SAVEPOINT mysql_wrap_sp1", "INSERT INTO books",
+                    "ROLLBACK TO SAVEPOINT mysql_wrap_sp1",
+                    "SAVEPOINT mysql_wrap_sp1", "INSERT INTO books", "RELEASE SAVEPOINT mysql_wrap_sp1", "COMMIT"]
+
+
+def test_errors_escaping_nested_blocks_roll_back_everything(connect, sent):
+    db = connect()
+    with pytest.raises(ValueError):
+        with db.transaction():
+            insert(db, "Time Machine")
+            with db.transaction():
+                insert(db, "Invisible Man")
+                raise ValueError()
+
+    assert sent[-2:] == ["ROLLBACK TO SAVEPOINT mysql_wrap_sp1", "ROLLBACK"]
+    assert db._local.scope is None
+
+
+def test_commit_every_statements(connect, sent):
+    db = connect()
+    with db.transaction(commit_every=2):
+        for name in ["Time Machine", "Invisible Man", "The Sleeper Awakes"]:
+            insert(db, name)
+        # reads don't count
+        db.getTable("books")
+        insert(db, "The First Men in the Moon")
+
+    assert sent == ["INSERT INTO books", "INSERT INTO books", "COMMIT",
+                    "INSERT INTO books", "INSERT INTO books", "COMMIT", "COMMIT"]
+
+
+def test_commit_policy_waits_for_nested_blocks(connect, sent):
+    db = connect()
+    with db.transaction(commit_every=1):
+        with db.transaction():
+            insert(db, "Time Machine")
+            insert(db, "Invisible Man")
+        insert(db, "The Sleeper Awakes")
+
+    # committing inside the nested block would release its savepoint
+    assert sent == ["SAVEPOINT mysql_wrap_sp1", "INSERT INTO books", "INSERT INTO books",
+                    "RELEASE SAVEPOINT mysql_wrap_sp1", "INSERT INTO books", "COMMIT", "COMMIT"]
+
+
+def test_commit_seconds(connect, sent):
+    db = connect(autocommit=True)
+    with db.transaction(commit_seconds=0):
+        insert(db, "Time Machine")
+        insert(db, "Invisible Man")
+
+    assert sent == ["START TRANSACTION", "INSERT INTO books", "COMMIT", "START TRANSACTION",
+                    "INSERT INTO books", "COMMIT", "START TRANSACTION", "COMMIT"]
+
+
+@pytest.mark.parametrize("pool_size", [None, 2])
+def test_lost_reads_are_not_retried_inside_a_block(server, connect, pool_size):
+    db = connect(pool_size=pool_size)
+    server.dropNext("^SELECT .* FROM `books`")
+
+    # a new connection would run the rest of the block outside of the transaction
+    with pytest.raises(mysql.Error) as error:
+        with db.transaction():
+            db.getTable("books")
+    assert error.value.errno == 2013
@@ -0,0 +1,40 @@
+import pandas as pd
+
+
+FRAME = pd.DataFrame({"author" : ["Wells", "Verne"], "name" : ["The Time Machine", "Around the World"], "year" : [1895, 1872]})
+
+
+def test_non_unique_key_updates_through_a_staging_table(connect, statements):
+    db = connect(pool_size=2)
+    result = db.insertOrUpdateFromDataFrame("books", FRAME, "author")
+    sql = [statement for _, statement in statements if not statement.startswith(("EXPLAIN", "SELECT @@"))]
+
+    assert sql[0] == "DROP TEMPORARY TABLE IF EXISTS _staging_books"
+    assert sql[1] == "CREATE TEMPORARY TABLE _staging_books (INDEX (author)) SELECT author,name,year FROM books LIMIT 0"
+    assert sql[2].startswith("INSERT INTO _staging_books (author,name,year) VALUES")
+    assert sql[3] == "UPDATE books t JOIN _staging_books s ON t.author = s.author SET t.name = s.name,t.year = s.year"
+    assert sql[4] == "DROP TEMPORARY TABLE IF EXISTS _staging_books"
+    assert len(sql) == 5
+    assert result["rows"] == 2 and result["inserted"] == 0
+
+
+def test_staging_table_stays_on_one_connection(connect, statements):
+    db = connect(pool_size=4)
+    db.insertOrUpdateFromDataFrame("books", FRAME, "author", insert_missing=True)
+    staging = [conn for conn, sql in statements if "_staging_books" in sql]
+
+    assert len(staging) == 6
+    assert all(conn is staging[0] for conn in staging)
+    assert any(sql.startswith("INSERT INTO books (author,name,year) SELECT s.author,s.name,s.year FROM _staging_books s "
+                              "LEFT JOIN books t ON t.author = s.author WHERE t.author IS NULL") for _, sql in statements)
+
+
+def test_unique_key_upserts_in_multi_row_statements(connect, statements):
+    db = connect()
+    frame = pd.DataFrame({"id" : [1, 4], "name" : ["The Time Machine", "The Island of Doctor Moreau"]})
+    db.insertOrUpdateFromDataFrame("books", frame, "id")
+    upserts = [sql for _, sql in statements if sql.startswith("INSERT INTO books")]
+
+    assert len(upserts) == 1
+    assert "ON DUPLICATE KEY UPDATE" in upserts[0]
+    assert "_staging_" not in " ".join(sql for _, sql in statements)
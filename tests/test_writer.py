@@ -0,0 +1,152 @@
+import logging
+import threading
+import time
+
+import mysql.connector as mysql
+import pytest
+
+from src.mysql_wrap import MysqlWrap
+
+
+@pytest.fixture
+def writes(monkeypatch):
+    """(thread name, sql) of every INSERT sent by the wrappers of the test"""
+    recorded = []
+    execute = MysqlWrap._execute
+
+    def recording(self, conn, sql, params=None):
+        if sql.startswith("INSERT"):
+            recorded.append((threading.current_thread().name, sql))
+        return execute(self, conn, sql, params)
+
+    monkeypatch.setattr(MysqlWrap, "_execute", recording)
+    return recorded
+
+
+def wait_for(condition, seconds=2.0):
+    deadline = time.monotonic() + seconds
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def test_full_queues_are_written_in_the_background(connect, writes):
+    with connect().bufferedWriter(flush_rows=2, flush_seconds=None) as writer:
+        writer.insert("books", {"name" : "Time Machine", "year" : 1895})
+        time.sleep(0.05)
+        assert writes == []
+
+        writer.insert("books", {"name" : "Invisible Man", "year" : 1897})
+        wait_for(lambda: writer.stats()["rows_written"] == 2)
+
+    assert len(writes) == 1
+    thread, sql = writes[0]
+    assert thread == "mysql-wrap-writer"
+    assert sql.startswith("INSERT INTO books (name,year) VALUES")
+
+
+def test_old_rows_are_written_after_flush_seconds(connect, writes):
+    with connect().bufferedWriter(flush_seconds=0.05) as writer:
+        writer.insert("books", {"name" : "Time Machine"})
+        wait_for(lambda: writer.stats()["rows_written"] == 1)
+        assert writer.stats()["queued"] == 0
+
+
+def test_flush_writes_every_queue(connect, writes):
+    with connect().bufferedWriter(flush_seconds=None) as writer:
+        writer.insert("books", {"name" : "Time Machine"})
+        writer.insert("books", {"name" : "Invisible Man", "year" : 1897})
+        writer.upsert("books", {"id" : 1, "name" : "The Time Machine"}, "id")
+        writer.insert("books", {"name" : "The Sleeper Awakes"})
+        writer.flush()
+
+        # one statement per table and column set
+        assert len(writes) == 3
+        assert writer.stats() == {"queued" : 0, "queues" : 0, "rows_written" : 4, "writes" : 3, "errors" : 0,
+                                  "failed_rows" : 0}
+    assert any("ON DUPLICATE KEY UPDATE" in sql for _, sql in writes)
+
+
+def test_close_writes_the_queued_rows(connect, writes):
+    writer = connect().bufferedWriter(flush_seconds=None)
+    writer.insert("books", {"name" : "Time Machine"})
+    writer.close()
+
+    assert len(writes) == 1 and not writer._thread.is_alive()
+    with pytest.raises(ValueError):
+        writer.insert("books", {"name" : "Invisible Man"})
+
+
+def test_pooled_wrappers_are_shared(connect):
+    db = connect(pool_size=2)
+    with db.bufferedWriter() as writer:
+        writer.insert("books", {"name" : "Time Machine"})
+        writer.flush()
+        assert writer._wrap is db
+    assert db.pool.stats()["in_use"] == 0
+
+
+def test_a_full_buffer_holds_the_callers_back(connect, monkeypatch):
+    release = threading.Event()
+    insert_chunks = MysqlWrap._insert_chunks
+
+    def slow(self, *args, **kwargs):
+        release.wait(2)
+        return insert_chunks(self, *args, **kwargs)
+
+    monkeypatch.setattr(MysqlWrap, "_insert_chunks", slow)
+
+    writer = connect().bufferedWriter(flush_rows=2, max_rows=2, timeout=0.05)
+    writer.insert("books", {"name" : "Time Machine"})
+    writer.insert("books", {"name" : "Invisible Man"})
+
+    # the rows being written still take room in the buffer
+    with pytest.raises(TimeoutError):
+        writer.insert("books", {"name" : "The Sleeper Awakes"})
+
+    writer.timeout = None
+    threading.Timer(0.05, release.set).start()
+    started = time.monotonic()
+    writer.insert("books", {"name" : "The Sleeper Awakes"})
+    assert time.monotonic() - started >= 0.04
+    writer.close()
+    assert writer.stats()["rows_written"] == 3
+
+
+def test_write_errors_are_raised_by_the_next_call(server, connect, caplog):
+    writer = connect().bufferedWriter(flush_rows=1)
+    server.dropNext("^INSERT")
+    with caplog.at_level(logging.WARNING, logger="mysql_wrap"):
+        writer.insert("books", {"name" : "Time Machine"})
+        wait_for(lambda: writer.stats()["errors"] == 1)
+
+    assert "buffered write of 1 rows to books failed" in caplog.text
+    with pytest.raises(mysql.Error) as error:
+        writer.insert("books", {"name" : "Invisible Man"})
+    assert error.value.errno == 2013
+
+    # raised once, the writer keeps going on a new connection
+    writer.insert("books", {"name" : "Invisible Man"})
+    writer.close()
+    assert writer.stats()["rows_written"] == 1 and writer.stats()["failed_rows"] == 1
+
+
+def test_failing_flush_raises(server, connect):
+    writer = connect().bufferedWriter(flush_seconds=None)
+    writer.insert("books", {"name" : "Time Machine"})
+    server.dropNext("^INSERT")
+
+    with pytest.raises(mysql.Error):
+        writer.flush()
+    assert writer.stats()["queued"] == 0
+    writer.close()
+
+
+def test_close_raises_the_last_error(server, connect):
+    writer = connect().bufferedWriter(flush_seconds=None)
+    writer.insert("books", {"name" : "Time Machine"})
+    server.dropNext("^INSERT")
+
+    with pytest.raises(mysql.Error):
+        writer.close()
+    assert not writer._thread.is_alive()